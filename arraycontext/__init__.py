@@ -48,13 +48,14 @@ from .metadata import _FirstAxisIsElementsTag
 from .container import (
         ArrayContainer, ArrayContainerT,
         NotAnArrayContainerError,
-        is_array_container, is_array_container_type,
+        is_array_container, is_array_container_type, classify_types,
         get_container_context_opt,
         get_container_context_recursively, get_container_context_recursively_opt,
-        serialize_container, deserialize_container,
+        serialize_container, deserialize_container, try_serialize_container,
         register_multivector_as_array_container)
 from .container.arithmetic import with_container_arithmetic
 from .container.dataclass import dataclass_array_container
+from .container.packed import packed_array_container, pack_array_container
 
 from .container.traversal import (
         map_array_container,
@@ -63,12 +64,14 @@ from .container.traversal import (
         rec_multimap_array_container,
         mapped_over_array_containers,
         multimapped_over_array_containers,
+        ContainerStructure, get_container_structure, rebuild,
         map_reduce_array_container,
         multimap_reduce_array_container,
         rec_map_reduce_array_container,
         rec_multimap_reduce_array_container,
+        iter_leaves, iter_leaves_multi,
         thaw, freeze,
-        flatten, unflatten, flat_size_and_dtype,
+        flatten, unflatten, flat_size_and_dtype, FlatLayout,
         from_numpy, to_numpy,
         outer, with_array_context)
 
@@ -99,23 +102,26 @@ __all__ = (
 
         "ArrayContainer", "ArrayContainerT",
         "NotAnArrayContainerError",
-        "is_array_container", "is_array_container_type",
+        "is_array_container", "is_array_container_type", "classify_types",
         "get_container_context_opt",
         "get_container_context_recursively_opt",
         "get_container_context_recursively",
-        "serialize_container", "deserialize_container",
+        "serialize_container", "deserialize_container", "try_serialize_container",
         "register_multivector_as_array_container",
         "with_container_arithmetic",
         "dataclass_array_container",
+        "packed_array_container", "pack_array_container",
 
         "map_array_container", "multimap_array_container",
         "rec_map_array_container", "rec_multimap_array_container",
         "mapped_over_array_containers",
         "multimapped_over_array_containers",
+        "ContainerStructure", "get_container_structure", "rebuild",
         "map_reduce_array_container", "multimap_reduce_array_container",
         "rec_map_reduce_array_container", "rec_multimap_reduce_array_container",
+        "iter_leaves", "iter_leaves_multi",
         "thaw", "freeze",
-        "flatten", "unflatten", "flat_size_and_dtype",
+        "flatten", "unflatten", "flat_size_and_dtype", "FlatLayout",
         "from_numpy", "to_numpy", "with_array_context",
         "outer",
 
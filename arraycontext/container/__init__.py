@@ -13,8 +13,10 @@
 Serialization/deserialization
 -----------------------------
 .. autofunction:: is_array_container_type
+.. autofunction:: classify_types
 .. autofunction:: serialize_container
 .. autofunction:: deserialize_container
+.. autofunction:: try_serialize_container
 
 Context retrieval
 -----------------
@@ -68,9 +70,14 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
-from functools import singledispatch
+from abc import get_cache_token
+from functools import lru_cache, singledispatch
+from operator import itemgetter
+import weakref
 from arraycontext.context import ArrayContext
-from typing import Any, Iterable, Tuple, Optional, TypeVar, Protocol, TYPE_CHECKING
+from typing import (
+        Any, Callable, Dict, Iterable, List, Tuple, Optional, TypeVar, Protocol,
+        TYPE_CHECKING)
 import numpy as np
 
 # For use in singledispatch type annotations, because sphinx can't figure out
@@ -197,10 +204,26 @@ def is_array_container_type(cls: type) -> bool:
     """
     assert isinstance(cls, type), f"must pass a {type!r}, not a '{cls!r}'"
 
+    # NOTE: the lookup is cached per type and invalidated when new
+    # implementations of serialize_container are registered
     return (
             cls is ArrayContainer
-            or (serialize_container.dispatch(cls)
-                is not serialize_container.__wrapped__))  # type:ignore[attr-defined]
+            or (_serialize_container.lookup(cls)
+                is not _serialize_container.default))
+
+
+def classify_types(types: Iterable[type]) -> Tuple[bool, ...]:
+    """A batched version of :func:`is_array_container_type`.
+
+    :returns: a :class:`tuple` of the same length as *types*, where each
+        entry is *True* if the corresponding type is an array container type.
+    """
+    lookup = _serialize_container.lookup
+    default = _serialize_container.default
+
+    return tuple(
+            cls is ArrayContainer or lookup(cls) is not default
+            for cls in types)
 
 
 def is_array_container(ary: Any) -> bool:
@@ -215,8 +238,8 @@ def is_array_container(ary: Any) -> bool:
             "try serializing it and catch NotAnArrayContainerError. For a "
             "cheaper option, see is_array_container_type.",
             DeprecationWarning, stacklevel=2)
-    return (serialize_container.dispatch(ary.__class__)
-            is not serialize_container.__wrapped__)       # type:ignore[attr-defined]
+    return (_serialize_container.lookup(ary.__class__)
+            is not _serialize_container.default)
 
 
 @singledispatch
@@ -232,6 +255,106 @@ def get_container_context_opt(ary: ArrayContainer) -> Optional[ArrayContext]:
 # }}}
 
 
+# {{{ dispatch caches
+
+class _DispatchCache:
+    """A cache for the implementations of a :func:`~functools.singledispatch`
+    function *func*, indexed by the exact type of the first argument.
+
+    Lookups for types that are not in the cache go through ``func.dispatch``,
+    i.e. they fall back to the method resolution order. The cache is cleared
+    whenever a new implementation is registered with ``func.register`` and,
+    as in :func:`functools.singledispatch`, when :func:`abc.get_cache_token`
+    changes (e.g. due to virtual subclass registration with
+    :meth:`abc.ABCMeta.register`) if implementations for ABCs are registered.
+
+    .. attribute:: default
+
+        The implementation used for types without a registered implementation.
+    """
+
+    def __init__(self, func: Any) -> None:
+        self.func = func
+        self.default = func.dispatch(object)
+        self._cache: Dict[type, Callable[..., Any]] = {}
+        self._cache_token: Optional[object] = None
+        self._invalidate()
+
+        register = func.register
+
+        def _register_and_invalidate(cls: Any, impl: Any = None) -> Any:
+            result = register(cls, impl)
+            self._invalidate()
+
+            if impl is None and isinstance(cls, type):
+                # NOTE: `register(cls)` returns a decorator
+                def _decorator(impl: Any) -> Any:
+                    result_impl = result(impl)
+                    self._invalidate()
+                    return result_impl
+
+                return _decorator
+
+            return result
+
+        func.register = _register_and_invalidate
+
+    def _invalidate(self) -> None:
+        self._cache.clear()
+
+        # NOTE: the token is only checked if ABCs are registered, since only
+        # then the dispatch can change without a call to `register`
+        if any(hasattr(cls, "__abstractmethods__") for cls in self.func.registry):
+            self._cache_token = get_cache_token()
+        else:
+            self._cache_token = None
+
+    def lookup(self, cls: type) -> Callable[..., Any]:
+        if (self._cache_token is not None
+                and self._cache_token != get_cache_token()):
+            self._invalidate()
+
+        try:
+            return self._cache[cls]
+        except KeyError:
+            impl = self._cache[cls] = self.func.dispatch(cls)
+            return impl
+
+    def __call__(self, *args: Any) -> Any:
+        return self.lookup(args[0].__class__)(*args)
+
+
+_serialize_container = _DispatchCache(serialize_container)
+_deserialize_container = _DispatchCache(deserialize_container)
+_get_container_context_opt = _DispatchCache(get_container_context_opt)
+
+
+def try_serialize_container(
+        ary: Any) -> Optional[Iterable[Tuple[Any, ArrayOrContainer]]]:
+    """Like :func:`serialize_container`, but returns *None* for objects that
+    are not array containers instead of raising a
+    :exc:`NotAnArrayContainerError`.
+
+    The implementations are looked up in a cache indexed by the exact type of
+    *ary*, so this is the cheaper option when traversing containers and
+    probing each of their leaves.
+    """
+    serializer = _serialize_container.lookup(ary.__class__)
+    if serializer is _serialize_container.default:
+        return None
+
+    # NOTE: special-cased to avoid raising for every non-object array leaf
+    if serializer is _serialize_ndarray_container and ary.dtype.char != "O":
+        return None
+
+    try:
+        return serializer(ary)
+    except NotAnArrayContainerError:
+        return None
+
+# }}}
+
+
 # {{{ object arrays as array containers
 
 @serialize_container.register(np.ndarray)
@@ -241,16 +364,18 @@ def _serialize_ndarray_container(
         raise NotAnArrayContainerError(
                 f"cannot serialize '{type(ary).__name__}' with dtype '{ary.dtype}'")
 
-    # special-cased for speed
-    if ary.ndim == 1:
-        return [(i, ary[i]) for i in range(ary.shape[0])]
-    elif ary.ndim == 2:
-        return [((i, j), ary[i, j])
-                for i in range(ary.shape[0])
-                for j in range(ary.shape[1])
-                ]
-    else:
-        return np.ndenumerate(ary)
+    # NOTE: the keys are indices into the flattened array (in C order), which
+    # avoids building an index tuple for each entry of multi-dimensional arrays
+    return list(enumerate(ary.ravel().tolist()))
+
+
+@lru_cache(maxsize=16)
+def _get_flat_ndarray_keys(size: int) -> List[int]:
+    return list(range(size))
+
+
+_get_key = itemgetter(0)
+_get_value = itemgetter(1)
 
 
 @deserialize_container.register(np.ndarray)
@@ -262,11 +387,92 @@ def _deserialize_ndarray_container(  # type: ignore[misc]
     assert type(template) is np.ndarray
     assert template.dtype.char == "O"
 
-    result = type(template)(template.shape, dtype=object)
+    if not isinstance(iterable, list):
+        iterable = list(iterable)
+
+    # NOTE: the keys produced by _serialize_ndarray_container are just
+    # range(size), in which case the values can be copied in one go
+    size = template.size
+    if (len(iterable) == size
+            and list(map(_get_key, iterable)) == _get_flat_ndarray_keys(size)):
+        return np.fromiter(
+                map(_get_value, iterable), dtype=object, count=size
+                ).reshape(template.shape)
+
+    # NOTE: filled through a flat view, so that (integer) keys in any order
+    # can be used directly
+    result = type(template)(size, dtype=object)
+    result_nd = result.reshape(template.shape)
+
     for i, subary in iterable:
-        result[i] = subary
+        # NOTE: multi-dimensional index tuples are also allowed as keys
+        if i.__class__ is tuple:
+            result_nd[i] = subary
+        else:
+            result[i] = subary
+
+    return result_nd
+
+# }}}
+
+
+# {{{ context slots
+
+def _is_immutable_container_type(cls: type) -> bool:
+    if getattr(cls, "_array_container_is_immutable", False):
+        return True
+
+    params = getattr(cls, "__dataclass_params__", None)
+    return params is not None and params.frozen
+
+
+class _ContextSlots:
+    """Caches the array context of container instances, so that it does not
+    need to be recovered by walking the container each time.
+
+    The entries are keyed by the :func:`id` of the container and hold a weak
+    reference to it, so that they are removed together with the container.
+    Only containers of immutable types are cached, i.e. frozen dataclasses
+    and classes that set ``_array_container_is_immutable = True``, since the
+    cached context of other containers would become stale if their
+    components are modified. Containers that cannot be weakly referenced
+    are not cached either.
+    """
 
-    return result
+    def __init__(self) -> None:
+        self._slots: Dict[int, Tuple[Any, ArrayContext]] = {}
+
+    def get(self, ary: Any) -> Optional[ArrayContext]:
+        entry = self._slots.get(id(ary))
+        if entry is not None and entry[0]() is ary:
+            return entry[1]
+
+        return None
+
+    def set(self, ary: Any, actx: Optional[ArrayContext]) -> None:
+        if actx is None or not _is_immutable_container_type(type(ary)):
+            return
+
+        key = id(ary)
+        slots = self._slots
+
+        def _remove(ref: Any) -> None:
+            entry = slots.get(key)
+            if entry is not None and entry[0] is ref:
+                del slots[key]
+
+        try:
+            ref = weakref.ref(ary, _remove)
+        except TypeError:
+            return
+
+        slots[key] = (ref, actx)
+
+    def clear(self) -> None:
+        self._slots.clear()
+
+
+_CONTEXT_SLOTS = _ContextSlots()
 
 # }}}
 
@@ -274,7 +480,7 @@ def _deserialize_ndarray_container(  # type: ignore[misc]
 # {{{ get_container_context_recursively
 
 def get_container_context_recursively_opt(
-        ary: ArrayContainer) -> Optional[ArrayContext]:
+        ary: ArrayContainer, *, validate: bool = False) -> Optional[ArrayContext]:
     """Walks the :class:`ArrayContainer` hierarchy to find an
     :class:`ArrayContext` associated with it.
 
@@ -282,33 +488,64 @@ def get_container_context_recursively_opt(
     any level, an assertion error is raised.
 
     Returns *None* if no array context was found.
+
+    The array context found for a container of an immutable type (a frozen
+    :func:`~dataclasses.dataclass` or a class that sets the class attribute
+    ``_array_container_is_immutable = True``) is cached with the container,
+    so that subsequent lookups do not need to walk it again. The arithmetic
+    generated by :func:`~arraycontext.with_container_arithmetic` passes the
+    cached context on to the containers it constructs.
+
+    :arg validate: if *True*, the cache is ignored and the whole container
+        is checked for consistency, even if :data:`__debug__` is not set.
+        A :exc:`ValueError` is raised if different array contexts are found
+        or if the cached context does not match the components.
     """
+    cached_actx = _CONTEXT_SLOTS.get(ary)
+    if cached_actx is not None and not validate:
+        return cached_actx
+
     # try getting the array context directly
-    actx = get_container_context_opt(ary)
+    actx = _get_container_context_opt(ary)
     if actx is not None:
         return actx
 
-    try:
-        iterable = serialize_container(ary)
-    except NotAnArrayContainerError:
+    iterable = try_serialize_container(ary)
+    if iterable is None:
         return actx
     else:
         for _, subary in iterable:
-            context = get_container_context_recursively_opt(subary)
+            context = get_container_context_recursively_opt(
+                    subary, validate=validate)
             if context is None:
                 continue
 
-            if not __debug__:
-                return context
+            if validate:
+                if actx is not None and actx is not context:
+                    raise ValueError(
+                            "found different array contexts in the components "
+                            f"of '{type(ary).__name__}'")
+                actx = context
+            elif not __debug__:
+                actx = context
+                break
             elif actx is None:
                 actx = context
             else:
                 assert actx is context
 
+        if cached_actx is not None:
+            if cached_actx is not actx:
+                raise ValueError(
+                        f"stale cached array context of '{type(ary).__name__}'")
+        else:
+            _CONTEXT_SLOTS.set(ary, actx)
+
         return actx
 
 
-def get_container_context_recursively(ary: ArrayContainer) -> Optional[ArrayContext]:
+def get_container_context_recursively(
+        ary: ArrayContainer, *, validate: bool = False) -> Optional[ArrayContext]:
     """Walks the :class:`ArrayContainer` hierarchy to find an
     :class:`ArrayContext` associated with it.
 
@@ -316,8 +553,10 @@ def get_container_context_recursively(ary: ArrayContainer) -> Optional[ArrayCont
     any level, an assertion error is raised.
 
     Raises an error if no array container is found.
+
+    :arg validate: see :func:`get_container_context_recursively_opt`.
     """
-    actx = get_container_context_recursively_opt(ary)
+    actx = get_container_context_recursively_opt(ary, validate=validate)
     if actx is None:
         # raise ValueError("no array context was found")
         from warnings import warn
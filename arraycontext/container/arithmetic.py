@@ -31,8 +31,12 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+from numbers import Number
+import operator
+import weakref
 from warnings import warn
-from typing import Any, Callable, Optional, Tuple, TypeVar, Union, Type
+from typing import (
+        Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union, Type, cast)
 
 import numpy as np
 
@@ -86,6 +90,8 @@ _BINARY_OP_AND_DUNDER = [
         ("ge", "{} >= {}", False, _OpClass.REL_COMPARISON),
         ]
 
+_INPLACE_OP_CLASSES = {_OpClass.ARITHMETIC, _OpClass.BITWISE, _OpClass.SHIFT}
+
 
 def _format_unary_op_str(op_str: str, arg1: Union[Tuple[str, ...], str]) -> str:
     if isinstance(arg1, tuple):
@@ -129,6 +135,54 @@ class _FailSafe:
     pass
 
 
+# {{{ code object cache
+
+_CODE_CACHE: Any = None
+
+
+def _compile_generated_code(source: str, filename: str) -> Any:
+    """Compile the generated module *source*, reusing the code object from an
+    on-disk cache if the same source was compiled before (e.g. by a previous
+    import or by another MPI rank).
+
+    Set the environment variable ``ARRAYCONTEXT_NO_CACHE`` to disable the
+    cache.
+    """
+    import os
+    if os.environ.get("ARRAYCONTEXT_NO_CACHE"):
+        return compile(source, filename, "exec")
+
+    import marshal
+    import sys
+    from pytools.persistent_dict import (
+            WriteOncePersistentDict, NoSuchEntryError, ReadOnlyEntryError)
+
+    global _CODE_CACHE
+    if _CODE_CACHE is None:
+        _CODE_CACHE = WriteOncePersistentDict(
+                "arraycontext-container-arithmetic-code-v1")
+
+    # NOTE: marshalled code objects are specific to the Python version
+    key = (sys.implementation.cache_tag, filename, source)
+
+    try:
+        return marshal.loads(_CODE_CACHE.fetch(key))
+    except NoSuchEntryError:
+        pass
+
+    code = compile(source, filename, "exec")
+
+    try:
+        _CODE_CACHE.store(key, marshal.dumps(code))
+    except ReadOnlyEntryError:
+        # stored concurrently by someone else
+        pass
+
+    return code
+
+# }}}
+
+
 def with_container_arithmetic(
         *,
         bcast_number: bool = True,
@@ -142,7 +196,10 @@ def with_container_arithmetic(
         shift: bool = False,
         _cls_has_array_context_attr: Optional[bool] = None,
         eq_comparison: Optional[bool] = None,
-        rel_comparison: Optional[bool] = None) -> Callable[[type], type]:
+        rel_comparison: Optional[bool] = None,
+        deferred: bool = False,
+        inplace: bool = False,
+        numpy_protocols: bool = False) -> Callable[[type], type]:
     """A class decorator that implements built-in operators for array containers
     by propagating the operations to the elements of the container.
 
@@ -173,6 +230,38 @@ def with_container_arithmetic(
     :arg rel_comparison: If *True*, implement ``<``, ``<=``, ``>``, ``>=``.
         In that case, if *eq_comparison* is unspecified, it is also set to
         *True*.
+    :arg deferred: If *True*, the operators ``+``, ``-``, ``*``, ``/`` and
+        ``**`` between containers of this type and numbers are not evaluated
+        immediately. Instead, they build up an expression that is evaluated
+        when the result is first used, in a single elementwise operation for
+        each leaf (see :meth:`ArrayContext._fused_elementwise`). This avoids
+        the temporaries of intermediate results in eager array contexts, but
+        it also means that in-place modifications of the leaves of the operands
+        before the result is used are visible in the result. The deferred
+        results are instances of the class, whose attributes are set when the
+        expression is evaluated, i.e. on the first access of any of them.
+        This requires that the instances can be weakly referenced.
+    :arg inplace: If *True*, also implement the in-place operators (e.g.
+        ``+=``) for the arithmetic, bitwise and shift operators (except
+        :func:`divmod`). If the array context of the left operand
+        :attr:`~ArrayContext.permits_inplace_modification`, these modify the
+        leaf arrays of the left operand in place, as long as the result has
+        the same shape and dtype, and return a container holding the modified
+        arrays. Otherwise (e.g. in lazy array contexts), they fall back to the
+        out-of-place operators. Note that other containers sharing these leaf
+        arrays (e.g. the frozen arrays that the operand was thawed from in
+        :class:`~arraycontext.PyOpenCLArrayContext`) see the modifications.
+        Cannot be combined with *deferred*.
+    :arg numpy_protocols: If *True*, implement ``__array_ufunc__`` and
+        ``__array_function__``, so that :mod:`numpy` functions can be called on
+        the containers. Ufuncs that correspond to operators (e.g.
+        :data:`numpy.multiply`) use the operators generated here, including
+        for :mod:`numpy` operands, e.g. ``obj_array * container``. Math
+        functions such as :data:`numpy.sin` are evaluated for all the leaves
+        at once where possible (see
+        :meth:`ArrayContext._batched_fused_elementwise`) and other functions
+        are forwarded to :attr:`ArrayContext.np` of the container's array
+        context.
     :arg _cls_has_array_context_attr: A flag indicating whether the decorated
         class has an ``array_context`` attribute. If so, and if :data:`__debug__`
         is *True*, an additional check is performed in binary operators
@@ -203,6 +292,19 @@ def with_container_arithmetic(
     :func:`dataclass_array_container` automatically generates an appropriate
     implementation of these methods, so :func:`with_container_arithmetic`
     should nest "outside" :func:dataclass_array_container`.
+
+    Classes can additionally provide the class methods
+    ``_fast_serialize_init_arrays_code``, ``_fast_deserialize_init_arrays_code``
+    (with the same interface as above) and
+    ``_fast_init_arrays_condition_code(instance_names)``, which returns an
+    expression that is true if the former can be used for the operands
+    *instance_names*, e.g. :func:`packed_array_container` uses this to
+    operate on the whole buffer of packed instances. Similarly, the class
+    method ``_check_init_arrays_code(instance_names)`` can return an
+    expression that raises if the operands *instance_names* cannot be
+    combined and is true otherwise, e.g. :func:`dataclass_array_container`
+    uses this to check that :class:`typing.Optional` fields are present in
+    either all or none of the operands.
     """
 
     # {{{ handle inputs
@@ -222,6 +324,10 @@ def with_container_arithmetic(
     if not bcast_obj_array and bcast_numpy_array:
         raise TypeError("bcast_obj_array must be set if bcast_numpy_array is")
 
+    if deferred and inplace:
+        # NOTE: pending deferred results would see the modified operands
+        raise TypeError("deferred and inplace cannot be used together")
+
     if bcast_numpy_array:
         def numpy_pred(name: str) -> str:
             return f"isinstance({name}, np.ndarray)"
@@ -304,19 +410,47 @@ def with_container_arithmetic(
         if cls_has_array_context_attr is _FailSafe:
             def actx_getter_code(arg: str) -> str:
                 return f"_get_actx({arg})"
+
+            # NOTE: recovering the array context of these containers requires
+            # walking them, so pass on the cached context of the operand
+            def construct_code(template: str, init_args: str) -> str:
+                return f"_with_actx_of(_construct({init_args}), {template})"
         else:
             def actx_getter_code(arg: str) -> str:
                 return f"{arg}.array_context"
 
+            def construct_code(template: str, init_args: str) -> str:
+                return f"_construct({init_args})"
+
+        if cls_has_array_context_attr:
+            inplace_actx_getter_code = actx_getter_code
+        else:
+            def inplace_actx_getter_code(arg: str) -> str:
+                return f"get_container_context_recursively_opt({arg})"
+
         from pytools.codegen import CodeGenerator, Indentation
         gen = CodeGenerator()
         gen("""
             from numbers import Number
+            import operator
             import numpy as np
             from arraycontext import (
-                ArrayContainer, get_container_context_recursively)
+                ArrayContainer, get_container_context_recursively,
+                get_container_context_recursively_opt, is_array_container_type,
+                rec_map_array_container, rec_multimap_array_container)
+            from arraycontext.container import _CONTEXT_SLOTS
             from warnings import warn
 
+            # NOTE: the operands were already validated, so skip that if the
+            # class allows it (see dataclass_array_container)
+            _construct = getattr(cls, "_construct_unchecked", cls)
+
+            def _with_actx_of(result, template):
+                actx = _CONTEXT_SLOTS.get(template)
+                if actx is not None:
+                    _CONTEXT_SLOTS.set(result, actx)
+                return result
+
             def _raise_if_actx_none(actx):
                 if actx is None:
                     raise ValueError("array containers with frozen arrays "
@@ -361,6 +495,52 @@ def with_container_arithmetic(
                     return ()
 
                 return actx.array_types
+
+            def _make_inplace_leaf_op(iop, op, inexact_only):
+                def inplace_leaf_op(actx, x, y):
+                    # NOTE: only modify arrays in place if that gives the same
+                    # result as the out-of-place operator
+                    if isinstance(x, actx.array_types):
+                        if isinstance(y, Number):
+                            y_dtype = y
+                        elif (isinstance(y, actx.array_types)
+                                and y.shape == x.shape):
+                            y_dtype = y.dtype
+                        else:
+                            return op(x, y)
+
+                        if ((inexact_only and x.dtype.kind not in "fc")
+                                or np.result_type(x.dtype, y_dtype) != x.dtype):
+                            return op(x, y)
+
+                    elif x.__class__ is np.ndarray:
+                        # NOTE: numpy would use the out-of-place operator on
+                        # the entries of object arrays and replace them
+                        if x.dtype.char == "O":
+                            if (y.__class__ is np.ndarray
+                                    and y.dtype.char == "O"
+                                    and y.shape == x.shape):
+                                return rec_multimap_array_container(
+                                    lambda xi, yi: inplace_leaf_op(actx, xi, yi),
+                                    x, y)
+                            elif isinstance(y, Number):
+                                return rec_map_array_container(
+                                    lambda xi: inplace_leaf_op(actx, xi, y), x)
+
+                    elif is_array_container_type(x.__class__):
+                        # NOTE: also modify the leaves of nested containers
+                        # that do not implement in-place operators themselves
+                        if y.__class__ is x.__class__:
+                            return rec_multimap_array_container(
+                                lambda xi, yi: inplace_leaf_op(actx, xi, yi),
+                                x, y)
+                        elif isinstance(y, Number):
+                            return rec_map_array_container(
+                                lambda xi: inplace_leaf_op(actx, xi, y), x)
+
+                    return iop(x, y)
+
+                return inplace_leaf_op
             """)
         gen("")
 
@@ -384,6 +564,75 @@ def with_container_arithmetic(
             else:
                 return "(%s,)" % ", ".join(t)
 
+        fast_init_arrays_condition_code = getattr(
+                cls, "_fast_init_arrays_condition_code", None)
+        check_init_arrays_code = getattr(cls, "_check_init_arrays_code", None)
+
+        def init_code(template: str, instance_names: Tuple[str, ...],
+                get_init_args: Callable[[Any, Any], str]) -> str:
+            """
+            :arg get_init_args: a callable that takes the serialization and
+                deserialization hooks and returns the constructor arguments.
+            :returns: an expression constructing the result, which uses the
+                fast hooks if the class provides them and the condition holds
+                for *instance_names*.
+            """
+            code = construct_code(template, get_init_args(
+                    cls._serialize_init_arrays_code,
+                    cls._deserialize_init_arrays_code))
+
+            if fast_init_arrays_condition_code is not None:
+                fast_code = construct_code(template, get_init_args(
+                        cls._fast_serialize_init_arrays_code,
+                        cls._fast_deserialize_init_arrays_code))
+                code = (f"({fast_code} "
+                        f"if {fast_init_arrays_condition_code(instance_names)} "
+                        f"else {code})")
+
+            if check_init_arrays_code is not None and len(instance_names) > 1:
+                code = f"({check_init_arrays_code(instance_names)} and {code})"
+
+            return code
+
+        def unary_init_code(op_str: str, arg1: str) -> str:
+            def get_init_args(serialize: Any, deserialize: Any) -> str:
+                return cast(str, deserialize(arg1, {
+                        key_arg1: _format_unary_op_str(op_str, expr_arg1)
+                        for key_arg1, expr_arg1 in serialize(arg1).items()
+                        }))
+
+            return init_code(arg1, (arg1,), get_init_args)
+
+        def zip_init_code(
+                template: str, op_str: str, arg1: str, arg2: str) -> str:
+            def get_init_args(serialize: Any, deserialize: Any) -> str:
+                return cast(str, deserialize(arg1, {
+                        same_key(key_arg1, key_arg2):
+                        _format_binary_op_str(op_str, expr_arg1, expr_arg2)
+                        for (key_arg1, expr_arg1), (key_arg2, expr_arg2) in zip(
+                            serialize(arg1).items(),
+                            serialize(arg2).items())
+                        }))
+
+            return init_code(template, (arg1, arg2), get_init_args)
+
+        def bcast_init_code(template: str,
+                op_str: str, arg1: str, arg2: str, reverse: bool) -> str:
+            def get_init_args(serialize: Any, deserialize: Any) -> str:
+                if reverse:
+                    return cast(str, deserialize(arg2, {
+                            key_arg2: _format_binary_op_str(op_str, arg1, expr_arg2)
+                            for key_arg2, expr_arg2 in serialize(arg2).items()
+                            }))
+                else:
+                    return cast(str, deserialize(arg1, {
+                            key_arg1: _format_binary_op_str(op_str, expr_arg1, arg2)
+                            for key_arg1, expr_arg1 in serialize(arg1).items()
+                            }))
+
+            return init_code(
+                    template, (arg2,) if reverse else (arg1,), get_init_args)
+
         gen(f"cls._outer_bcast_types = {tup_str(outer_bcast_type_names)}")
         gen(f"cls._bcast_numpy_array = {bcast_numpy_array}")
         gen(f"cls._bcast_obj_array = {bcast_obj_array}")
@@ -396,15 +645,10 @@ def with_container_arithmetic(
                 continue
 
             fname = f"_{cls.__name__.lower()}_{dunder_name}"
-            init_args = cls._deserialize_init_arrays_code("arg1", {
-                    key_arg1: _format_unary_op_str(op_str, expr_arg1)
-                    for key_arg1, expr_arg1 in
-                    cls._serialize_init_arrays_code("arg1").items()
-                    })
 
             gen(f"""
                 def {fname}(arg1):
-                    return cls({init_args})
+                    return {unary_init_code(op_str, "arg1")}
                 cls.__{dunder_name}__ = {fname}""")
             gen("")
 
@@ -432,18 +676,9 @@ def with_container_arithmetic(
 
             # {{{ "forward" binary operators
 
-            zip_init_args = cls._deserialize_init_arrays_code("arg1", {
-                    same_key(key_arg1, key_arg2):
-                    _format_binary_op_str(op_str, expr_arg1, expr_arg2)
-                    for (key_arg1, expr_arg1), (key_arg2, expr_arg2) in zip(
-                        cls._serialize_init_arrays_code("arg1").items(),
-                        cls._serialize_init_arrays_code("arg2").items())
-                    })
-            bcast_same_cls_init_args = cls._deserialize_init_arrays_code("arg1", {
-                    key_arg1: _format_binary_op_str(op_str, expr_arg1, "arg2")
-                    for key_arg1, expr_arg1 in
-                    cls._serialize_init_arrays_code("arg1").items()
-                    })
+            zip_init = zip_init_code("arg1", op_str, "arg1", "arg2")
+            bcast_same_cls_init = bcast_init_code(
+                    "arg1", op_str, "arg1", "arg2", reverse=False)
 
             gen(f"def {fname}(arg1, arg2):")
             with Indentation(gen):
@@ -466,7 +701,7 @@ def with_container_arithmetic(
                                         "(i.e. has no array context)")
                                 else:
                                     raise ValueError(msg)""")
-                    gen(f"return cls({zip_init_args})")
+                    gen(f"return {zip_init}")
 
                 if bcast_actx_array_type is _FailSafe:
                     bcast_actx_ary_types: Tuple[str, ...] = (
@@ -487,11 +722,18 @@ def with_container_arithmetic(
                     if isinstance(arg2,
                                   {tup_str(outer_bcast_type_names
                                            + bcast_actx_ary_types)}):
-                        return cls({bcast_same_cls_init_args})
+                        return {bcast_same_cls_init}
                 if {numpy_pred("arg2")}:
-                    result = np.empty_like(arg2, dtype=object)
-                    for i in np.ndindex(arg2.shape):
-                        result[i] = {op_str.format("arg1", "arg2[i]")}
+                    # NOTE: the entries are handled by calling this function
+                    # directly, instead of going through the operator for each
+                    # of them
+                    result = np.empty(arg2.shape, dtype=object)
+                    result_flat = result.reshape(-1)
+                    for i, arg2_i in enumerate(arg2.flat):
+                        result_i = {fname}(arg1, arg2_i)
+                        if result_i is NotImplemented:
+                            result_i = {op_str.format("arg1", "arg2_i")}
+                        result_flat[i] = result_i
                     return result
                 return NotImplemented
                 """)
@@ -503,13 +745,10 @@ def with_container_arithmetic(
             # {{{ "reverse" binary operators
 
             if reversible:
+                forward_fname = fname
                 fname = f"_{cls.__name__.lower()}_r{dunder_name}"
-                bcast_init_args = cls._deserialize_init_arrays_code("arg2", {
-                        key_arg2: _format_binary_op_str(
-                            op_str, "arg1", expr_arg2)
-                        for key_arg2, expr_arg2 in
-                        cls._serialize_init_arrays_code("arg2").items()
-                        })
+                bcast_init = bcast_init_code(
+                        "arg2", op_str, "arg1", "arg2", reverse=True)
 
                 if bcast_actx_array_type is _FailSafe:
                     bcast_actx_ary_types = (
@@ -533,11 +772,18 @@ def with_container_arithmetic(
                             if isinstance(arg1,
                                           {tup_str(outer_bcast_type_names
                                                    + bcast_actx_ary_types)}):
-                                return cls({bcast_init_args})
+                                return {bcast_init}
                         if {numpy_pred("arg1")}:
-                            result = np.empty_like(arg1, dtype=object)
-                            for i in np.ndindex(arg1.shape):
-                                result[i] = {op_str.format("arg1[i]", "arg2")}
+                            result = np.empty(arg1.shape, dtype=object)
+                            result_flat = result.reshape(-1)
+                            for i, arg1_i in enumerate(arg1.flat):
+                                if arg1_i.__class__ is cls:
+                                    result_i = {forward_fname}(arg1_i, arg2)
+                                else:
+                                    result_i = {fname}(arg2, arg1_i)
+                                if result_i is NotImplemented:
+                                    result_i = {op_str.format("arg1_i", "arg2")}
+                                result_flat[i] = result_i
                             return result
                         return NotImplemented
 
@@ -548,13 +794,70 @@ def with_container_arithmetic(
 
         # }}}
 
+        # {{{ in-place binary operators
+
+        for dunder_name, _, _, op_cls in _BINARY_OP_AND_DUNDER:
+            if (not inplace
+                    or op_cls not in desired_op_classes
+                    or op_cls not in _INPLACE_OP_CLASSES
+                    or dunder_name == "divmod"):
+                continue
+
+            fname = f"_{cls.__name__.lower()}_i{dunder_name}"
+            leaf_op_name = f"_inplace_{dunder_name}"
+            leaf_op_str = f"{leaf_op_name}(actx, {{}}, {{}})"
+
+            zip_init = zip_init_code("arg1", leaf_op_str, "arg1", "arg2")
+            bcast_same_cls_init = bcast_init_code(
+                    "arg1", leaf_op_str, "arg1", "arg2", reverse=False)
+
+            if bcast_actx_array_type:
+                bcast_actx_ary_types = ("*actx.array_types",)
+            else:
+                bcast_actx_ary_types = ()
+
+            gen(f"""
+                {leaf_op_name} = _make_inplace_leaf_op(
+                    operator.__i{dunder_name}__, operator.__{dunder_name}__,
+                    {dunder_name == "truediv"})
+
+                def {fname}(arg1, arg2):
+                    actx = {inplace_actx_getter_code("arg1")}
+                    if actx is None or not actx.permits_inplace_modification:
+                        return NotImplemented
+
+                    if arg2.__class__ is cls:
+                        if {bool(cls_has_array_context_attr)}:  # optimized away
+                            if {inplace_actx_getter_code("arg2")} is not actx:
+                                # NOTE: the out-of-place operator reports this
+                                return NotImplemented
+                        return {zip_init}
+                    if {bool(outer_bcast_type_names or bcast_actx_ary_types)}:
+                        if isinstance(arg2,
+                                      {tup_str(outer_bcast_type_names
+                                               + bcast_actx_ary_types)}):
+                            return {bcast_same_cls_init}
+                    return NotImplemented
+
+                cls.__i{dunder_name}__ = {fname}""")
+            gen("")
+
+        # }}}
+
         # This will evaluate the module, which is all we need.
         code = gen.get().rstrip()+"\n"
 
         result_dict = {"_MODULE_SOURCE_CODE": code, "cls": cls}
-        exec(compile(code, f"<container arithmetic for {cls.__name__}>", "exec"),
+        exec(_compile_generated_code(
+                code, f"<container arithmetic for {cls.__name__}>"),
                 result_dict)
 
+        if deferred and _OpClass.ARITHMETIC in desired_op_classes:
+            _make_arithmetic_deferred(cls, bcast_number=bcast_number)
+
+        if numpy_protocols:
+            _add_numpy_protocols(cls)
+
         return cls
 
     # we're being called as @with_container_arithmetic(...), with parens
@@ -563,4 +866,465 @@ def with_container_arithmetic(
 # }}}
 
 
+# {{{ deferred arithmetic
+
+_DEFERRED_UNARY_OPS: Dict[str, Callable[..., Any]] = {
+        "neg": operator.neg,
+        "pos": operator.pos,
+        }
+_DEFERRED_BINARY_OPS: Dict[str, Callable[..., Any]] = {
+        "add": operator.add,
+        "sub": operator.sub,
+        "mul": operator.mul,
+        "truediv": operator.truediv,
+        "pow": operator.pow,
+        }
+
+# NOTE: limits the size of the generated kernels (e.g. for sums in loops)
+_MAX_DEFERRED_OPERANDS = 16
+
+
+class _DeferredArithmetic:
+    """The unevaluated arithmetic expression of a deferred result (see the
+    *deferred* argument of :func:`with_container_arithmetic`).
+
+    .. attribute:: tree
+
+        A tree of tuples ``(op_name, *children)``, with leaves
+        ``("c", container)`` and ``("s", number)``.
+
+    .. attribute:: noperands
+
+        The number of container leaves of :attr:`tree`.
+
+    .. attribute:: ref
+
+        A weak reference to the result.
+    """
+
+    __slots__ = ("tree", "noperands", "ref")
+
+    def __init__(self, tree: Tuple[Any, ...], noperands: int, ref: Any) -> None:
+        self.tree = tree
+        self.noperands = noperands
+        self.ref = ref
+
+
+class _DeferredResults:
+    """Keeps track of the deferred arithmetic results that are not evaluated
+    yet.
+
+    The results are instances of the container class, whose attributes are
+    only set when their expression is evaluated, i.e. on the first access of
+    a missing attribute (see :func:`_make_arithmetic_deferred`). Like in
+    :class:`arraycontext.container._ContextSlots`, the entries are keyed by
+    the :func:`id` of the result and hold a weak reference to it, so that
+    they are removed together with the result.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[int, _DeferredArithmetic] = {}
+
+    def make(self, cls: type, tree: Tuple[Any, ...], noperands: int) -> Any:
+        result: Any = object.__new__(cls)
+
+        key = id(result)
+        pending = self._pending
+
+        def _remove(ref: Any) -> None:
+            entry = pending.get(key)
+            if entry is not None and entry.ref is ref:
+                del pending[key]
+
+        pending[key] = _DeferredArithmetic(
+                tree, noperands, weakref.ref(result, _remove))
+        return result
+
+    def get(self, ary: Any) -> Optional[_DeferredArithmetic]:
+        entry = self._pending.get(id(ary))
+        if entry is not None and entry.ref() is ary:
+            return entry
+
+        return None
+
+    def evaluate(self, ary: Any) -> bool:
+        """Evaluate *ary* if it is a pending deferred result.
+
+        :returns: *True* if *ary* was evaluated.
+        """
+        entry = self.get(ary)
+        if entry is None:
+            return False
+
+        _copy_instance_state(ary, _evaluate_deferred(entry.tree))
+        del self._pending[id(ary)]
+        return True
+
+
+_DEFERRED_RESULTS = _DeferredResults()
+
+
+def _copy_instance_state(dest: Any, src: Any) -> None:
+    # NOTE: this bypasses `__setattr__`, e.g. of frozen dataclasses
+    src_dict = getattr(src, "__dict__", None)
+    if src_dict is not None:
+        object.__getattribute__(dest, "__dict__").update(src_dict)
+
+    for klass in type(src).__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name in ("__dict__", "__weakref__"):
+                continue
+
+            try:
+                value = object.__getattribute__(src, name)
+            except AttributeError:
+                continue
+
+            object.__setattr__(dest, name, value)
+
+
+class _DeferredFieldDefault:
+    """Replaces the class attribute holding the default of a dataclass field,
+    which would otherwise hide that the attribute of a pending deferred
+    result is missing.
+    """
+
+    def __init__(self, name: str, default: Any) -> None:
+        self.name = name
+        self.default = default
+
+    def __get__(self, obj: Any, objtype: Any = None) -> Any:
+        if obj is not None and _DEFERRED_RESULTS.evaluate(obj):
+            return getattr(obj, self.name)
+
+        return self.default
+
+
+def _as_deferred_operand(cls: type, arg: Any, bcast_number: bool
+                         ) -> Optional[Tuple[Tuple[Any, ...], int]]:
+    if type(arg) is cls:
+        entry = _DEFERRED_RESULTS.get(arg)
+        if entry is not None:
+            return entry.tree, entry.noperands
+        else:
+            return ("c", arg), 1
+    elif bcast_number and isinstance(arg, Number):
+        return ("s", arg), 0
+    else:
+        return None
+
+
+def _evaluate_deferred(tree: Tuple[Any, ...]) -> Any:
+    from pymbolic import var
+
+    containers: List[Any] = []
+    container_names: Dict[int, str] = {}
+    scalars: Dict[str, Any] = {}
+
+    def to_expr(node: Tuple[Any, ...]) -> Any:
+        kind = node[0]
+        if kind == "c":
+            name = container_names.get(id(node[1]))
+            if name is None:
+                name = container_names[id(node[1])] = f"_inp{len(containers)}"
+                containers.append(node[1])
+
+            return var(name)
+        elif kind == "s":
+            name = f"_s{len(scalars)}"
+            scalars[name] = node[1]
+            return var(name)
+        elif kind in _DEFERRED_UNARY_OPS:
+            return _DEFERRED_UNARY_OPS[kind](to_expr(node[1]))
+        else:
+            return _DEFERRED_BINARY_OPS[kind](to_expr(node[1]), to_expr(node[2]))
+
+    expr = to_expr(tree)
+    return _map_fused_elementwise(
+            expr, list(container_names.values()), containers, scalars)
+
+
+def _map_fused_elementwise(
+        expr: Any, names: List[str], containers: List[Any],
+        scalars: Dict[str, Any],
+        functions: Optional[Dict[str, Callable[..., Any]]] = None) -> Any:
+    """Evaluate the :mod:`pymbolic` expression *expr* for the leaves of
+    *containers* (named *names* in *expr*), using
+    :meth:`ArrayContext._batched_fused_elementwise` where possible.
+
+    :arg functions: the functions called in *expr*, used for the leaves that
+        are not arrays of the array context.
+    """
+    from arraycontext.container import get_container_context_recursively_opt
+    actx = get_container_context_recursively_opt(containers[0])
+
+    from arraycontext.container.traversal import (
+            rec_multimap_array_container, rec_multimap_reduce_array_container)
+
+    # NOTE: gather the leaves first, so that the array context can evaluate
+    # the expression for all of them at once
+    leaves_list: Any = rec_multimap_reduce_array_container(
+            lambda partials: [leaves for p in partials for leaves in p],
+            lambda *leaves: [leaves],
+            *containers)
+
+    def make_args(leaves: Tuple[Any, ...]) -> Dict[str, Any]:
+        args = dict(zip(names, leaves))
+        args.update(scalars)
+        return args
+
+    is_fusable = [
+            actx is not None
+            and all(isinstance(leaf, actx.array_types) for leaf in leaves)
+            for leaves in leaves_list]
+
+    if actx is not None and any(is_fusable):
+        fused_results = iter(actx._batched_fused_elementwise(expr, [
+            make_args(leaves)
+            for leaves, fusable in zip(leaves_list, is_fusable) if fusable
+            ]))
+
+    from pymbolic import evaluate
+    results = iter([
+            next(fused_results) if fusable
+            else evaluate(expr, {**make_args(leaves), **(functions or {})})
+            for leaves, fusable in zip(leaves_list, is_fusable)])
+
+    return rec_multimap_array_container(
+            lambda *leaves: next(results), *containers)
+
+
+def _make_arithmetic_deferred(cls: Any, *, bcast_number: bool) -> None:
+    """Replace the (eager) arithmetic operators of *cls* generated by
+    :func:`with_container_arithmetic` by deferred ones.
+
+    The deferred results are instances of *cls* without any attributes, which
+    are set from the evaluated expression on the first access of a missing
+    attribute through ``__getattr__``.
+    """
+    if not cls.__weakrefoffset__:
+        raise TypeError(f"deferred arithmetic needs weak references to "
+                f"instances of '{cls.__name__}'")
+
+    def make_unary_op(op_name: str) -> Callable[..., Any]:
+        def deferred_op(arg1: Any) -> Any:
+            operand = _as_deferred_operand(cls, arg1, bcast_number)
+            assert operand is not None
+            tree, noperands = operand
+            return _DEFERRED_RESULTS.make(cls, (op_name, tree), noperands)
+
+        return deferred_op
+
+    def make_binary_op(op_name: str, reverse: bool,
+                       eager: Callable[..., Any]) -> Callable[..., Any]:
+        def deferred_op(arg1: Any, arg2: Any) -> Any:
+            operand1 = _as_deferred_operand(cls, arg1, bcast_number)
+            operand2 = _as_deferred_operand(cls, arg2, bcast_number)
+
+            if (operand1 is not None
+                    and operand2 is not None
+                    and (operand1[1] + operand2[1]
+                        <= _MAX_DEFERRED_OPERANDS)):
+                tree1, noperands1 = operand1
+                tree2, noperands2 = operand2
+                if reverse:
+                    tree1, tree2 = tree2, tree1
+
+                return _DEFERRED_RESULTS.make(cls,
+                        (op_name, tree1, tree2), noperands1 + noperands2)
+
+            return eager(arg1, arg2)
+
+        return deferred_op
+
+    for op_name in _DEFERRED_UNARY_OPS:
+        dunder_name = f"__{op_name}__"
+        if dunder_name in cls.__dict__:
+            setattr(cls, dunder_name, make_unary_op(op_name))
+
+    for op_name in _DEFERRED_BINARY_OPS:
+        for reverse in [False, True]:
+            dunder_name = f"__r{op_name}__" if reverse else f"__{op_name}__"
+            if dunder_name in cls.__dict__:
+                setattr(cls, dunder_name, make_binary_op(
+                    op_name, reverse, cls.__dict__[dunder_name]))
+
+    # {{{ evaluate pending results on attribute access
+
+    base_getattr = getattr(cls, "__getattr__", None)
+
+    def __getattr__(self: Any, name: str) -> Any:
+        # NOTE: special names are probed by many libraries (e.g. numpy), which
+        # should not force the evaluation
+        if (not (name.startswith("__") and name.endswith("__"))
+                and _DEFERRED_RESULTS.evaluate(self)):
+            return getattr(self, name)
+
+        if base_getattr is not None:
+            return base_getattr(self, name)
+
+        raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    base_reduce_ex = cls.__reduce_ex__
+
+    def __reduce_ex__(self: Any, protocol: Any) -> Any:
+        # NOTE: copying and pickling access the state directly
+        _DEFERRED_RESULTS.evaluate(self)
+        return base_reduce_ex(self, protocol)
+
+    cls.__getattr__ = __getattr__
+    cls.__reduce_ex__ = __reduce_ex__
+
+    from dataclasses import is_dataclass, fields
+    if is_dataclass(cls):
+        for f in fields(cls):
+            default = cls.__dict__.get(f.name)
+            if f.name in cls.__dict__ and not hasattr(type(default), "__get__"):
+                setattr(cls, f.name, _DeferredFieldDefault(f.name, default))
+
+    # }}}
+
+# }}}
+
+
+# {{{ numpy protocols
+
+_UFUNC_TO_UNARY_DUNDER = {
+        np.negative: "neg",
+        np.positive: "pos",
+        np.absolute: "abs",
+        np.invert: "inv",
+        }
+_UFUNC_TO_BINARY_DUNDER = {
+        np.add: "add",
+        np.subtract: "sub",
+        np.multiply: "mul",
+        np.true_divide: "truediv",
+        np.floor_divide: "floordiv",
+        np.power: "pow",
+        np.remainder: "mod",
+        np.divmod: "divmod",
+        np.matmul: "matmul",
+        np.bitwise_and: "and",
+        np.bitwise_or: "or",
+        np.bitwise_xor: "xor",
+        np.left_shift: "lshift",
+        np.right_shift: "rshift",
+        np.equal: "eq",
+        np.not_equal: "ne",
+        np.less: "lt",
+        np.greater: "gt",
+        np.less_equal: "le",
+        np.greater_equal: "ge",
+        }
+_REFLECTED_COMPARISON_DUNDER = {
+        "eq": "eq", "ne": "ne", "lt": "gt", "gt": "lt", "le": "ge", "ge": "le",
+        }
+
+# NOTE: math functions that array contexts can evaluate in fused kernels
+# (see ArrayContext._fused_elementwise)
+_FUSABLE_UFUNC_NAMES = frozenset({
+        "sin", "cos", "tan", "arcsin", "arccos", "arctan", "arctan2",
+        "sinh", "cosh", "tanh",
+        "exp", "log", "log10", "sqrt",
+        "floor", "ceil",
+        })
+
+
+def _add_numpy_protocols(cls: Any) -> None:
+    """Add the ``__array_ufunc__`` and ``__array_function__`` hooks to *cls*
+    (see the *numpy_protocols* argument of :func:`with_container_arithmetic`).
+    """
+    def __array_ufunc__(self: Any, ufunc: Any, method: str,
+                        *inputs: Any, **kwargs: Any) -> Any:
+        if method != "__call__" or kwargs:
+            return NotImplemented
+
+        # {{{ operators
+
+        dunder_name = _UFUNC_TO_UNARY_DUNDER.get(ufunc)
+        if dunder_name is not None:
+            op = getattr(cls, f"__{dunder_name}__", None)
+            return NotImplemented if op is None else op(*inputs)
+
+        dunder_name = _UFUNC_TO_BINARY_DUNDER.get(ufunc)
+        if dunder_name is not None:
+            arg1, arg2 = inputs
+            if arg1.__class__ is cls:
+                op = getattr(cls, f"__{dunder_name}__", None)
+            else:
+                arg1, arg2 = arg2, arg1
+                op = getattr(cls, "__{}__".format(
+                    _REFLECTED_COMPARISON_DUNDER.get(
+                        dunder_name, f"r{dunder_name}")), None)
+
+            return NotImplemented if op is None else op(arg1, arg2)
+
+        # }}}
+
+        # {{{ math functions
+
+        if not all(arg.__class__ is cls or isinstance(arg, Number)
+                   for arg in inputs):
+            return NotImplemented
+
+        if ufunc.__name__ in _FUSABLE_UFUNC_NAMES:
+            from pymbolic import var
+
+            names: List[str] = []
+            containers: List[Any] = []
+            scalars: Dict[str, Any] = {}
+            expr_args: List[Any] = []
+            for arg in inputs:
+                if arg.__class__ is cls:
+                    name = f"_inp{len(containers)}"
+                    names.append(name)
+                    containers.append(arg)
+                else:
+                    name = f"_s{len(scalars)}"
+                    scalars[name] = arg
+
+                expr_args.append(var(name))
+
+            return _map_fused_elementwise(
+                    var(ufunc.__name__)(*expr_args), names, containers, scalars,
+                    functions={ufunc.__name__: ufunc})
+
+        from arraycontext.container import get_container_context_recursively_opt
+        actx = get_container_context_recursively_opt(self)
+        if actx is not None:
+            func = getattr(actx.np, ufunc.__name__, None)
+            if func is not None:
+                return func(*inputs)
+
+        from arraycontext.container.traversal import rec_multimap_array_container
+        return rec_multimap_array_container(ufunc, *inputs)
+
+        # }}}
+
+    def __array_function__(self: Any, func: Any, types: Any,
+                           args: Any, kwargs: Any) -> Any:
+        from arraycontext.container import get_container_context_recursively_opt
+        actx = get_container_context_recursively_opt(self)
+
+        if actx is not None:
+            namespace = actx.np
+            if func.__module__ == "numpy.linalg":
+                namespace = namespace.linalg
+
+            impl = getattr(namespace, func.__name__, None)
+            if impl is not None:
+                return impl(*args, **kwargs)
+
+        # NOTE: no equivalent in the array context, so use numpy's version
+        return func._implementation(*args, **kwargs)
+
+    cls.__array_ufunc__ = __array_ufunc__
+    cls.__array_function__ = __array_function__
+
+# }}}
+
+
 # vim: foldmethod=marker
@@ -30,7 +30,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
-from typing import Tuple, Union, get_args
+from typing import Any, Callable, List, Optional, Tuple, Union, get_args
 try:
     # NOTE: only available in python >= 3.8
     from typing import get_origin
@@ -48,22 +48,83 @@ def is_array_type(tp: type) -> bool:
     return tp is Array or is_array_container_type(tp)
 
 
-def dataclass_array_container(cls: type) -> type:
+def _is_optional_array_type(tp: Any) -> bool:
+    if get_origin(tp) is not Union:
+        return False
+
+    args = get_args(tp)
+    return (type(None) in args
+            and len(args) > 1
+            and all(is_array_type(arg) for arg in args if arg is not type(None)))
+
+
+def _get_array_tuple_length(tp: Any) -> Optional[int]:
+    """
+    :returns: the length of the tuple if *tp* is a fixed-length tuple of
+        array types, e.g. ``Tuple[np.ndarray, np.ndarray]``, and *None* if
+        *tp* is not a tuple type.
+    """
+    if get_origin(tp) is not tuple:
+        return None
+
+    args = get_args(tp)
+    if not args or Ellipsis in args:
+        raise TypeError(f"only fixed-length tuples are supported: '{tp!r}'")
+
+    if not all(is_array_type(arg) for arg in args):
+        raise TypeError(
+                f"tuple contains non-array container arguments: '{tp!r}'. "
+                "All arguments must be array containers.")
+
+    return len(args)
+
+
+def dataclass_array_container(
+        cls: Optional[type] = None, *,
+        slots: bool = False) -> Any:
     """A class decorator that makes the class to which it is applied an
     :class:`ArrayContainer` by registering appropriate implementations of
     :func:`serialize_container` and :func:`deserialize_container`.
     *cls* must be a :func:`~dataclasses.dataclass`.
 
+    It can be used as ``@dataclass_array_container`` or, to pass options,
+    as ``@dataclass_array_container(slots=True)``.
+
+    :arg slots: If *True*, the decorator returns a new class with the same
+        contents as *cls*, but with ``__slots__`` for its fields (and
+        ``__weakref__``) instead of a per-instance ``__dict__``. In addition,
+        containers created by :func:`deserialize_container` and by the
+        operators of :func:`with_container_arithmetic` are constructed by
+        setting the fields directly, i.e. without calling ``__init__`` and
+        ``__post_init__``, since their leaves come from containers that were
+        already validated. This reduces the memory use and construction cost
+        of the (usually many) temporary containers. As for
+        :func:`dataclasses.dataclass` with ``slots=True``, methods of *cls*
+        using the zero-argument form of :func:`super` are not supported.
+
     Attributes that are not array containers are allowed. In order to decide
     whether an attribute is an array container, the declared attribute type
     is checked by the criteria from :func:`is_array_container_type`. This
     includes some support for type annotations:
 
     * a :class:`typing.Union` of array containers is considered an array container.
-    * other type annotations, e.g. :class:`typing.Optional`, are not considered
-      array containers, even if they wrap one.
+    * a :class:`typing.Optional` array container is considered an array
+      container. It is skipped in serialization if it is *None*, and the
+      operators of :func:`with_container_arithmetic` leave it as *None* if
+      it is *None* in the (container) operand that serves as the template.
+    * a fixed-length :class:`typing.Tuple` of array containers is considered
+      an array container. Its entries are serialized with the keys
+      ``f"{name}_{i}"``.
+    * other type annotations, e.g. variable-length tuples, are not
+      supported.
     """
 
+    if cls is None:
+        def wrap(cls: type) -> type:
+            return dataclass_array_container(cls, slots=slots)
+
+        return wrap
+
     assert is_dataclass(cls)
 
     def is_array_field(f: Field) -> bool:
@@ -71,14 +132,19 @@ def dataclass_array_container(cls: type) -> type:
         # unions of only array containers, e.g. `Union[np.ndarray, Array]`, as
         # they can work seamlessly with arithmetic and traversal.
         #
-        # `Optional[ArrayContainer]` is not allowed, since `None` is not
-        # handled by `with_container_arithmetic`, which is the common case
-        # for current container usage. Other type annotations, e.g.
-        # `Tuple[Container, Container]`, are also not allowed, as they do not
-        # work with `with_container_arithmetic`.
+        # `Optional[ArrayContainer]` and fixed-length tuples of array
+        # containers are unrolled in the generated code (see
+        # `inject_dataclass_serialization`). Other type annotations are not
+        # allowed, as they do not work with `with_container_arithmetic`.
         #
         # This is not set in stone, but mostly driven by current usage!
 
+        if _is_optional_array_type(f.type):
+            return True
+
+        if _get_array_tuple_length(f.type) is not None:
+            return True
+
         origin = get_origin(f.type)
         if origin is Union:
             if all(is_array_type(arg) for arg in get_args(f.type)):
@@ -122,13 +188,67 @@ def dataclass_array_container(cls: type) -> type:
         raise ValueError(f"'{cls}' must have fields with array container type "
                 "in order to use the 'dataclass_array_container' decorator")
 
-    return inject_dataclass_serialization(cls, array_fields, non_array_fields)
+    if slots:
+        cls = _make_slots_dataclass(cls)
+
+    return inject_dataclass_serialization(cls, array_fields, non_array_fields,
+            fast_constructor=slots)
+
+
+def _make_slots_dataclass(cls: type) -> type:
+    if "__slots__" in cls.__dict__:
+        raise TypeError(f"'{cls.__name__}' already specifies __slots__")
+
+    field_names = tuple(f.name for f in fields(cls))
+
+    cls_dict = dict(cls.__dict__)
+    for name in (*field_names, "__dict__", "__weakref__"):
+        # NOTE: removes class attributes with the defaults of the fields,
+        # which would conflict with the slots (`__init__` knows them anyway)
+        cls_dict.pop(name, None)
+
+    if any(hasattr(base, "__weakref__") for base in cls.__bases__):
+        cls_dict["__slots__"] = field_names
+    else:
+        # NOTE: weak references are used to cache the array context
+        cls_dict["__slots__"] = (*field_names, "__weakref__")
+
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    new_cls.__qualname__ = cls.__qualname__
+
+    if cls.__dataclass_params__.frozen:     # type: ignore[attr-defined]
+        # NOTE: the default pickling of slots would fail on `__setattr__`
+        def __getstate__(self: Any) -> Tuple[Any, ...]:
+            return tuple(getattr(self, name) for name in field_names)
+
+        def __setstate__(self: Any, state: Tuple[Any, ...]) -> None:
+            for name, value in zip(field_names, state):
+                object.__setattr__(self, name, value)
+
+        new_cls.__getstate__ = __getstate__     # type: ignore[attr-defined]
+        new_cls.__setstate__ = __setstate__     # type: ignore[attr-defined]
+
+    return new_cls
+
+
+def _get_field_setter(cls: type, name: str) -> Callable[[Any, Any], None]:
+    descr = cls.__dict__.get(name)
+    if descr is not None and hasattr(descr, "__set__"):
+        # NOTE: slots have descriptors that bypass `__setattr__` (i.e. also
+        # the one of frozen dataclasses)
+        return descr.__set__
+
+    def setter(self: Any, value: Any) -> None:
+        object.__setattr__(self, name, value)
+
+    return setter
 
 
 def inject_dataclass_serialization(
         cls: type,
         array_fields: Tuple[Field, ...],
-        non_array_fields: Tuple[Field, ...]) -> type:
+        non_array_fields: Tuple[Field, ...],
+        *, fast_constructor: bool = False) -> type:
     """Implements :func:`~arraycontext.serialize_container` and
     :func:`~arraycontext.deserialize_container` for the given dataclass *cls*.
 
@@ -136,29 +256,142 @@ def inject_dataclass_serialization(
     object with additional functionality.
 
     :arg array_fields: fields of the given dataclass *cls* which are considered
-        array containers and should be serialized.
+        array containers and should be serialized. These can also be
+        :class:`typing.Optional` array containers or fixed-length
+        tuples of array containers, as described in
+        :func:`dataclass_array_container`.
     :arg non_array_fields: remaining fields of the dataclass *cls* which are
         copied over from the template array in deserialization.
+    :arg fast_constructor: if *True*, add a private ``_construct_unchecked``
+        static method to *cls*, which creates instances from keyword
+        arguments for all the fields without calling ``__init__`` (and
+        ``__post_init__``). It is used in deserialization and by
+        :func:`with_container_arithmetic`.
     """
 
     assert is_dataclass(cls)
 
-    serialize_expr = ", ".join(
-            f"({f.name!r}, ary.{f.name})" for f in array_fields)
+    # {{{ unroll optional and tuple fields
+
+    optional_field_names = {
+            f.name for f in array_fields if _is_optional_array_type(f.type)}
+    tuple_field_lengths = {}
+    for f in array_fields:
+        length = _get_array_tuple_length(f.type)
+        if length is not None:
+            tuple_field_lengths[f.name] = length
+
+    def get_leaf_keys_and_exprs(f: Field, instance: str) -> List[Tuple[str, str]]:
+        if f.name in tuple_field_lengths:
+            return [(f"{f.name}_{i}", f"{instance}.{f.name}[{i}]")
+                    for i in range(tuple_field_lengths[f.name])]
+        else:
+            return [(f.name, f"{instance}.{f.name}")]
+
+    field_names = {f.name for f in (*array_fields, *non_array_fields)}
+    for f in array_fields:
+        for key, _ in get_leaf_keys_and_exprs(f, "ary"):
+            if key != f.name and key in field_names:
+                raise ValueError(f"key '{key}' of the entries of tuple field "
+                        f"'{f.name}' conflicts with the field of the same name")
+
+    # }}}
+
     template_kwargs = ", ".join(
             f"{f.name}=template.{f.name}" for f in non_array_fields)
 
     lower_cls_name = cls.__name__.lower()
 
-    serialize_init_code = ", ".join(f"{f.name!r}: f'{{instance_name}}.{f.name}'"
-            for f in array_fields)
+    serialize_init_code = ", ".join(
+            f"{key!r}: f'{expr}'"
+            for f in array_fields
+            for key, expr in get_leaf_keys_and_exprs(f, "{instance_name}"))
+
+    def get_deserialize_init_code(f: Field) -> str:
+        if f.name in tuple_field_lengths:
+            return f"{f.name}=(" + "".join(
+                    f"{{args[{key!r}]}}, "
+                    for key, _ in get_leaf_keys_and_exprs(f, "ary")) + ")"
+        elif f.name in optional_field_names:
+            return (f"{f.name}=(None "
+                    f"if {{template_instance_name}}.{f.name} is None "
+                    f"else {{args[{f.name!r}]}})")
+        else:
+            return f"{f.name}={{args[{f.name!r}]}}"
+
     deserialize_init_code = ", ".join([
-            f"{f.name}={{args[{f.name!r}]}}" for f in array_fields
+            get_deserialize_init_code(f) for f in array_fields
             ] + [
             f"{f.name}={{template_instance_name}}.{f.name}"
             for f in non_array_fields
             ])
 
+    all_fields = (*array_fields, *non_array_fields)
+    if fast_constructor:
+        constructor = "cls._construct_unchecked"
+        setters = "\n".join(
+                f"_set_{f.name} = _get_field_setter(cls, {f.name!r})"
+                for f in all_fields)
+        constructor_args = ", ".join(f.name for f in all_fields)
+        constructor_body = "\n".join(
+                f"    _set_{f.name}(self, {f.name})" for f in all_fields)
+        fast_constructor_code = (
+                f"{setters}\n\n"
+                f"def _construct_unchecked_{lower_cls_name}("
+                f"*, {constructor_args}):\n"
+                "    self = _new(cls)\n"
+                f"{constructor_body}\n"
+                "    return self\n\n"
+                "cls._construct_unchecked = staticmethod("
+                f"_construct_unchecked_{lower_cls_name})\n")
+    else:
+        constructor = "cls"
+        fast_constructor_code = ""
+
+    if not optional_field_names and not tuple_field_lengths:
+        serialize_expr = "({},)".format(", ".join(
+                f"({f.name!r}, ary.{f.name})" for f in array_fields))
+        deserialize_expr = f"{constructor}(**dict(iterable), {template_kwargs})"
+    else:
+        # NOTE: optional fields are skipped if they are None, so the entries
+        # of consecutive non-optional fields are concatenated in one go
+        serialize_parts = []
+        entries: List[str] = []
+        for f in array_fields:
+            if f.name in optional_field_names:
+                if entries:
+                    serialize_parts.append("({},)".format(", ".join(entries)))
+                    entries = []
+
+                serialize_parts.append(
+                        f"((({f.name!r}, ary.{f.name}),) "
+                        f"if ary.{f.name} is not None else ())")
+            else:
+                entries.extend(
+                        f"({key!r}, {expr})"
+                        for key, expr in get_leaf_keys_and_exprs(f, "ary"))
+
+        if entries:
+            serialize_parts.append("({},)".format(", ".join(entries)))
+
+        serialize_expr = " + ".join(serialize_parts)
+
+        def get_deserialize_expr(f: Field) -> str:
+            if f.name in tuple_field_lengths:
+                return "({})".format("".join(
+                        f"args[{key!r}], "
+                        for key, _ in get_leaf_keys_and_exprs(f, "ary")))
+            elif f.name in optional_field_names:
+                return f"args.get({f.name!r})"
+            else:
+                return f"args[{f.name!r}]"
+
+        deserialize_expr = "{}({})".format(constructor, ", ".join([
+                f"{f.name}={get_deserialize_expr(f)}" for f in array_fields
+                ] + [
+                f"{f.name}=template.{f.name}" for f in non_array_fields
+                ]))
+
     from pytools.codegen import remove_common_indentation
     serialize_code = remove_common_indentation(f"""
         from typing import Any, Iterable, Tuple
@@ -166,12 +399,13 @@ def inject_dataclass_serialization(
 
         @serialize_container.register(cls)
         def _serialize_{lower_cls_name}(ary: cls) -> Iterable[Tuple[Any, Any]]:
-            return ({serialize_expr},)
+            return {serialize_expr}
 
         @deserialize_container.register(cls)
         def _deserialize_{lower_cls_name}(
                 template: cls, iterable: Iterable[Tuple[Any, Any]]) -> cls:
-            return cls(**dict(iterable), {template_kwargs})
+            args = dict(iterable)
+            return {deserialize_expr}
 
         # support for with_container_arithmetic
 
@@ -190,7 +424,34 @@ def inject_dataclass_serialization(
             _deserialize_init_arrays_code_{lower_cls_name})
         """)
 
-    exec_dict = {"cls": cls, "_MODULE_SOURCE_CODE": serialize_code}
+    if optional_field_names:
+        # NOTE: the optional fields of the template decide the fields of the
+        # result, so the other operands must have the same ones
+        serialize_code += "\n" + remove_common_indentation(f"""
+            def _raise_optional_field_mismatch_{lower_cls_name}(cls, name):
+                raise ValueError(
+                    f"optional field '{{name}}' of '{{cls.__name__}}' "
+                    "must be None either in all or in none of the operands")
+
+            cls._raise_optional_field_mismatch = classmethod(
+                _raise_optional_field_mismatch_{lower_cls_name})
+
+            def _check_init_arrays_code_{lower_cls_name}(cls, instance_names):
+                first, *others = instance_names
+                return "(" + " and ".join(
+                    f"(({{first}}.{{name}} is None) is ({{other}}.{{name}} is None) "
+                    f"or cls._raise_optional_field_mismatch({{name!r}}))"
+                    for name in {tuple(sorted(optional_field_names))}
+                    for other in others) + ")"
+
+            cls._check_init_arrays_code = classmethod(
+                _check_init_arrays_code_{lower_cls_name})
+            """)
+
+    serialize_code = fast_constructor_code + serialize_code
+
+    exec_dict = {"cls": cls, "_MODULE_SOURCE_CODE": serialize_code,
+            "_get_field_setter": _get_field_setter, "_new": object.__new__}
     exec(compile(serialize_code, f"<container serialization for {cls.__name__}>",
         "exec"), exec_dict)
 
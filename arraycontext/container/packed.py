@@ -0,0 +1,294 @@
+# mypy: disallow-untyped-defs
+
+"""
+.. currentmodule:: arraycontext
+.. autofunction:: packed_array_container
+.. autofunction:: pack_array_container
+"""
+
+
+__copyright__ = """
+Copyright (C) 2020-1 University of Illinois Board of Trustees
+"""
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+from dataclasses import dataclass, is_dataclass, fields
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from arraycontext.context import ArrayContext
+from arraycontext.container import serialize_container, deserialize_container
+from arraycontext.container.dataclass import is_array_type
+
+
+PackedContainerT = TypeVar("PackedContainerT")
+
+
+# {{{ layout
+
+@dataclass(frozen=True)
+class _PackedLayout:
+    """Describes where the fields of a packed container are stored in its
+    buffer.
+
+    .. attribute:: entries
+
+        A :class:`tuple` of ``(name, start, stop, shape)`` for each array
+        field, where ``buffer[start:stop].reshape(shape)`` is the field.
+
+    .. attribute:: size
+
+        The size of the buffer.
+    """
+
+    entries: Tuple[Tuple[str, int, int, Tuple[int, ...]], ...]
+    size: int
+
+    @staticmethod
+    def from_arrays(arrays: Iterable[Tuple[str, Any]]) -> "_PackedLayout":
+        entries = []
+        offset = 0
+        for name, ary in arrays:
+            entries.append((name, offset, offset + ary.size, ary.shape))
+            offset += ary.size
+
+        return _PackedLayout(tuple(entries), offset)
+
+    def unpack(self, buffer: Any) -> Dict[str, Any]:
+        return {
+                name: buffer[start:stop].reshape(shape)
+                for name, start, stop, shape in self.entries}
+
+# }}}
+
+
+# {{{ packed containers
+
+def packed_array_container(cls: type) -> type:
+    """A class decorator that makes the :func:`~dataclasses.dataclass` *cls*
+    an :class:`ArrayContainer` whose array fields can be stored in a single
+    contiguous buffer.
+
+    Instances constructed in the usual way behave like containers created by
+    :func:`dataclass_array_container`. Once they are packed by
+    :func:`pack_array_container`, all their array fields are views into one
+    buffer, which is also the only entry returned by
+    :func:`serialize_container`. Therefore, traversals (and hence
+    :meth:`~ArrayContext.freeze`, :meth:`~ArrayContext.thaw`,
+    :func:`flatten`, :func:`to_numpy`, etc.) operate on the whole buffer at
+    once, and the results are packed containers with the same layout.
+
+    This decorator provides the hooks required by
+    :func:`with_container_arithmetic`, so it can be applied before it. If all
+    the container operands are packed with the same layout, the generated
+    operators work on the whole buffer, i.e. they launch a single kernel.
+    Note that this only supports broadcasting of scalars. Otherwise, they
+    operate on the fields and return an unpacked container. Similarly,
+    traversals over several containers, e.g. by
+    :func:`rec_multimap_array_container`, go through the fields unless all
+    the containers are packed with the same layout.
+
+    The array fields must be leaf arrays of the same :class:`~numpy.dtype`.
+    Other fields are copied over from the template in deserialization, as
+    in :func:`dataclass_array_container`.
+    """
+
+    assert is_dataclass(cls)
+
+    if hasattr(cls, "_construct_unchecked"):
+        raise TypeError(f"'{cls.__name__}' cannot be a packed array container, "
+                "since it is constructed without calling '__init__' "
+                "(e.g. by 'dataclass_array_container(slots=True)')")
+
+    from pytools import partition
+    array_fields, non_array_fields = partition(
+            lambda f: is_array_type(f.type), fields(cls))
+
+    if not array_fields:
+        raise ValueError(f"'{cls}' must have fields with array type "
+                "in order to use the 'packed_array_container' decorator")
+
+    array_field_names = tuple(f.name for f in array_fields)
+    non_array_field_names = tuple(f.name for f in non_array_fields)
+
+    orig_init = cls.__init__
+
+    def __init__(self: Any, *args: Any,
+            _packed_from: Optional[Tuple[Any, Any]] = None,
+            **kwargs: Any) -> None:
+        if _packed_from is None:
+            orig_init(self, *args, **kwargs)
+            return
+
+        assert not args and not kwargs
+        template, buffer = _packed_from
+
+        layout = template._packed_layout
+        if layout is None:
+            layout = _PackedLayout.from_arrays([
+                (name, getattr(template, name)) for name in array_field_names
+                ])
+
+        if getattr(buffer, "shape", None) != (layout.size,):
+            raise ValueError(
+                    f"packed buffer of '{cls.__name__}' must have shape "
+                    f"{(layout.size,)}, got '{getattr(buffer, 'shape', None)}'")
+
+        orig_init(self, **layout.unpack(buffer), **{
+            name: getattr(template, name) for name in non_array_field_names
+            })
+
+        object.__setattr__(self, "_packed_layout", layout)
+        object.__setattr__(self, "_packed_buffer", buffer)
+
+    cls.__init__ = __init__         # type: ignore[method-assign]
+    cls._packed_layout = None       # type: ignore[attr-defined]
+    cls._packed_buffer = None       # type: ignore[attr-defined]
+    cls._packed_array_fields = array_field_names  # type: ignore[attr-defined]
+
+    def _serialize_fields(ary: Any) -> Iterable[Tuple[Any, Any]]:
+        return tuple((name, getattr(ary, name)) for name in array_field_names)
+
+    @serialize_container.register(cls)
+    def _serialize_packed(ary: Any) -> Iterable[Tuple[Any, Any]]:
+        if ary._packed_layout is not None:
+            return (("_packed_buffer", ary._packed_buffer),)
+
+        return _serialize_fields(ary)
+
+    @deserialize_container.register(cls)
+    def _deserialize_packed(
+            template: Any, iterable: Iterable[Tuple[Any, Any]]) -> Any:
+        # NOTE: the keys decide whether the result is packed, since the fields
+        # of packed templates are also used when mixed with unpacked ones
+        iterable = list(iterable)
+        if len(iterable) == 1 and iterable[0][0] == "_packed_buffer":
+            (_, buffer), = iterable
+            return cls(_packed_from=(template, buffer))  # type: ignore[call-arg]
+
+        return cls(**dict(iterable), **{
+            name: getattr(template, name) for name in non_array_field_names
+            })
+
+    def _serialize_containers_alike(
+            cls: type, arys: List[Any]) -> List[Iterable[Tuple[Any, Any]]]:
+        layout = arys[0]._packed_layout
+        if layout is not None and all(
+                ary._packed_layout == layout for ary in arys[1:]):
+            return [_serialize_packed(ary) for ary in arys]
+        else:
+            return [_serialize_fields(ary) for ary in arys]
+
+    # NOTE: used by the traversal of several containers at once
+    cls._serialize_containers_alike = classmethod(  # type: ignore[attr-defined]
+            _serialize_containers_alike)
+
+    # {{{ support for with_container_arithmetic
+
+    def _serialize_init_arrays_code(
+            cls: type, instance_name: str) -> Dict[str, str]:
+        return {name: f"{instance_name}.{name}" for name in array_field_names}
+
+    def _deserialize_init_arrays_code(
+            cls: type, template_instance_name: str, args: Dict[str, str]) -> str:
+        return ", ".join([
+            f"{name}={args[name]}" for name in array_field_names
+            ] + [
+            f"{name}={template_instance_name}.{name}"
+            for name in non_array_field_names
+            ])
+
+    def _fast_init_arrays_condition_code(
+            cls: type, instance_names: Tuple[str, ...]) -> str:
+        first, *others = instance_names
+        return " and ".join([
+            f"{first}._packed_layout is not None"
+            ] + [
+            f"{name}._packed_layout == {first}._packed_layout"
+            for name in others
+            ])
+
+    def _fast_serialize_init_arrays_code(
+            cls: type, instance_name: str) -> Dict[str, str]:
+        return {"_packed_buffer": f"{instance_name}._packed_buffer"}
+
+    def _fast_deserialize_init_arrays_code(
+            cls: type, template_instance_name: str, args: Dict[str, str]) -> str:
+        return (f"_packed_from=({template_instance_name}, "
+                f"{args['_packed_buffer']})")
+
+    cls._serialize_init_arrays_code = classmethod(  # type: ignore[attr-defined]
+            _serialize_init_arrays_code)
+    cls._deserialize_init_arrays_code = classmethod(  # type: ignore[attr-defined]
+            _deserialize_init_arrays_code)
+    cls._fast_init_arrays_condition_code = classmethod(  # type: ignore[attr-defined]
+            _fast_init_arrays_condition_code)
+    cls._fast_serialize_init_arrays_code = classmethod(  # type: ignore[attr-defined]
+            _fast_serialize_init_arrays_code)
+    cls._fast_deserialize_init_arrays_code = (  # type: ignore[attr-defined]
+            classmethod(_fast_deserialize_init_arrays_code))
+
+    # }}}
+
+    return cls
+
+
+def pack_array_container(
+        ary: PackedContainerT, actx: ArrayContext) -> PackedContainerT:
+    """Copy the array fields of *ary* into a single contiguous buffer.
+
+    :arg ary: an instance of a class decorated with
+        :func:`packed_array_container`, whose array fields are all of a type
+        in :attr:`ArrayContext.array_types` and have the same dtype.
+    :returns: a new instance of the same class, where all the array fields
+        are views into the buffer. If *ary* is already packed, it is returned
+        as is.
+    """
+    array_field_names = getattr(type(ary), "_packed_array_fields", None)
+    if array_field_names is None:
+        raise TypeError(f"'{type(ary).__name__}' is not a packed array container")
+
+    if ary._packed_layout is not None:    # type: ignore[attr-defined]
+        return ary
+
+    arrays: List[Any] = [getattr(ary, name) for name in array_field_names]
+    for name, subary in zip(array_field_names, arrays):
+        if not isinstance(subary, actx.array_types):
+            raise TypeError(
+                    f"field '{name}' of '{type(ary).__name__}' has type "
+                    f"'{type(subary).__name__}', which is not supported by "
+                    f"'{type(actx).__name__}'")
+
+    dtypes = {np.dtype(subary.dtype) for subary in arrays}
+    if len(dtypes) != 1:
+        raise TypeError(
+                f"array fields of '{type(ary).__name__}' must have the same "
+                f"dtype to be packed, got {sorted(str(d) for d in dtypes)}")
+
+    buffer = actx.np.concatenate([actx.np.ravel(subary) for subary in arrays])
+    return type(ary)(_packed_from=(ary, buffer))  # type: ignore[call-arg]
+
+# }}}
+
+
+# vim: foldmethod=marker
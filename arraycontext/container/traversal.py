@@ -13,11 +13,22 @@
 .. autofunction:: rec_map_reduce_array_container
 .. autofunction:: rec_multimap_reduce_array_container
 
+Leaf iteration
+~~~~~~~~~~~~~~
+.. autofunction:: iter_leaves
+.. autofunction:: iter_leaves_multi
+
 Traversing decorators
 ~~~~~~~~~~~~~~~~~~~~~
 .. autofunction:: mapped_over_array_containers
 .. autofunction:: multimapped_over_array_containers
 
+Container structure
+~~~~~~~~~~~~~~~~~~~
+.. autoclass:: ContainerStructure
+.. autofunction:: get_container_structure
+.. autofunction:: rebuild
+
 Freezing and thawing
 ~~~~~~~~~~~~~~~~~~~~
 .. autofunction:: freeze
@@ -28,6 +39,7 @@ Flattening and unflattening
 .. autofunction:: flatten
 .. autofunction:: unflatten
 .. autofunction:: flat_size_and_dtype
+.. autoclass:: FlatLayout
 
 Numpy conversion
 ~~~~~~~~~~~~~~~~
@@ -65,7 +77,11 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
-from typing import Any, Callable, Iterable, List, Optional, Union, Tuple, cast
+from typing import (
+        Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union,
+        Tuple, cast)
+from abc import get_cache_token
+from dataclasses import dataclass, field, fields, is_dataclass
 from functools import update_wrapper, partial, singledispatch
 from warnings import warn
 
@@ -80,9 +96,458 @@ from arraycontext.container import (
         NotAnArrayContainerError,
         ArrayContainer,
         serialize_container, deserialize_container,
+        try_serialize_container,
+        _serialize_container, _deserialize_container,
         get_container_context_recursively_opt)
 
 
+# {{{ traversal plans
+
+class _TraversalPlanMismatchError(Exception):
+    """Raised when a container does not match the structure recorded in a
+    :class:`_TraversalPlan`.
+    """
+
+
+class _TraversalPlan:
+    """A flattened description of the structure of an array container.
+
+    The plan stores the nodes of the container tree in pre-order. Each node
+    records the exact type that was encountered and, for inner nodes, the
+    (already dispatched) serialization and deserialization functions and the
+    number of children. This allows traversing containers with the same
+    structure without going through :func:`~functools.singledispatch` at
+    every node and without raising :exc:`NotAnArrayContainerError` at
+    every leaf.
+
+    .. attribute:: types
+
+        A :class:`tuple` of the types of all the nodes in the tree.
+
+    .. attribute:: nchildren
+
+        A :class:`tuple` of the number of children of each node, or *None*
+        if the node is a leaf.
+
+    .. attribute:: nleaves
+    """
+
+    def __init__(self,
+            leaf_cls: Optional[type],
+            types: Tuple[type, ...],
+            serializers: Tuple[Optional[Callable[[Any], Any]], ...],
+            deserializers: Tuple[Optional[Callable[[Any, Any], Any]], ...],
+            nchildren: Tuple[Optional[int], ...],
+            nleaves: int,
+            dispatch_token: Tuple[int, int, object]) -> None:
+        self.leaf_cls = leaf_cls
+        self.types = types
+        self.serializers = serializers
+        self.deserializers = deserializers
+        self.nchildren = nchildren
+        self.nleaves = nleaves
+        self.dispatch_token = dispatch_token
+
+        # NOTE: numpy arrays are only leaves if they do not have dtype=object
+        self._steps: Tuple[Tuple[Any, ...], ...] = tuple(zip(
+            types, serializers, nchildren,
+            [n is None and cls is not leaf_cls and issubclass(cls, np.ndarray)
+                for cls, n in zip(types, nchildren)]))
+        self._rev_steps = tuple(zip(deserializers, nchildren))[::-1]
+
+    def gather(self, ary: Any, *,
+            check_leaves: bool = True) -> Tuple[List[Any], List[Any]]:
+        """
+        :arg check_leaves: if *False*, leaves are not checked against the
+            types recorded in the plan.
+        :returns: a tuple ``(leaves, nodes)``, where *leaves* is a list of
+            the leaf arrays in *ary* and *nodes* contains the serialized
+            inner nodes (in pre-order), as required by :meth:`rebuild`.
+        :raises _TraversalPlanMismatchError: if *ary* does not have the
+            structure described by the plan.
+        """
+        leaves: List[Any] = []
+        nodes: List[Any] = []
+        stack: List[Any] = [ary]
+
+        try:
+            for cls, serializer, nchildren, check_dtype in self._steps:
+                subary = stack.pop()
+
+                if nchildren is None:
+                    if check_leaves and (
+                            type(subary) is not cls
+                            or (check_dtype and subary.dtype.char == "O")):
+                        raise _TraversalPlanMismatchError
+
+                    leaves.append(subary)
+                else:
+                    if type(subary) is not cls:
+                        raise _TraversalPlanMismatchError
+
+                    assert serializer is not None
+                    iterable = list(serializer(subary))
+                    if len(iterable) != nchildren:
+                        raise _TraversalPlanMismatchError
+
+                    nodes.append((subary, iterable))
+                    stack.extend(child for _, child in reversed(iterable))
+        except (IndexError, NotAnArrayContainerError):
+            raise _TraversalPlanMismatchError
+
+        if stack:
+            raise _TraversalPlanMismatchError
+
+        return leaves, nodes
+
+    def rebuild(self, nodes: List[Any], leaves: List[Any]) -> Any:
+        """Rebuild a container from the *nodes* obtained from :meth:`gather`
+        and a new list of *leaves*.
+        """
+        results: List[Any] = []
+        ileaf = len(leaves)
+        inode = len(nodes)
+
+        for deserializer, nchildren in self._rev_steps:
+            if nchildren is None:
+                ileaf -= 1
+                results.append(leaves[ileaf])
+            else:
+                inode -= 1
+                template, iterable = nodes[inode]
+
+                assert deserializer is not None
+                results.append(deserializer(template, [
+                    (key, results.pop()) for key, _ in iterable
+                    ]))
+
+        return results[0]
+
+
+_TRAVERSAL_PLAN_CACHE: Dict[Tuple[type, Optional[type]], _TraversalPlan] = {}
+
+
+def _get_dispatch_token() -> Tuple[int, int, object]:
+    # NOTE: registering new types with the singledispatch functions (or
+    # virtual subclasses with ABCs) changes the resolution of the serialization
+    # functions, so cached plans are invalidated
+    return (
+            len(serialize_container.registry),
+            len(deserialize_container.registry),
+            get_cache_token())
+
+
+def _make_traversal_plan(
+        ary: Any, leaf_cls: Optional[type] = None
+        ) -> Tuple[_TraversalPlan, bool, List[Any], List[Any]]:
+    """Walk the container *ary* and record its structure.
+
+    :returns: a tuple ``(plan, cacheable, leaves, nodes)``, where *leaves*
+        and *nodes* are the same as returned by :meth:`_TraversalPlan.gather`.
+        If *cacheable* is *False*, the leaf status of some of the nodes depends
+        on more than their type and the plan should not be reused.
+    """
+    types: List[type] = []
+    serializers: List[Optional[Callable[[Any], Any]]] = []
+    deserializers: List[Optional[Callable[[Any, Any], Any]]] = []
+    nchildren: List[Optional[int]] = []
+    leaves: List[Any] = []
+    nodes: List[Any] = []
+    cacheable = True
+
+    stack: List[Any] = [ary]
+    while stack:
+        subary = stack.pop()
+        cls = type(subary)
+        types.append(cls)
+
+        if cls is not leaf_cls:
+            serializer = _serialize_container.lookup(cls)
+            iterable = try_serialize_container(subary)
+
+            if iterable is None:
+                # NOTE: numpy arrays are only containers with dtype=object,
+                # which is checked in _TraversalPlan.gather; for anything else
+                # we cannot tell from the type alone
+                if (serializer is not _serialize_container.default
+                        and not issubclass(cls, np.ndarray)):
+                    cacheable = False
+            else:
+                iterable = list(iterable)
+
+                serializers.append(serializer)
+                deserializers.append(_deserialize_container.lookup(cls))
+                nchildren.append(len(iterable))
+
+                nodes.append((subary, iterable))
+                stack.extend(child for _, child in reversed(iterable))
+                continue
+
+        serializers.append(None)
+        deserializers.append(None)
+        nchildren.append(None)
+        leaves.append(subary)
+
+    plan = _TraversalPlan(
+            leaf_cls, tuple(types),
+            tuple(serializers), tuple(deserializers), tuple(nchildren),
+            nleaves=len(leaves),
+            dispatch_token=_get_dispatch_token())
+
+    return plan, cacheable, leaves, nodes
+
+
+def _gather_with_traversal_plan(
+        ary: Any, leaf_cls: Optional[type] = None
+        ) -> Tuple[_TraversalPlan, List[Any], List[Any]]:
+    """Retrieve (or create) a :class:`_TraversalPlan` for *ary* and use it to
+    gather its leaves.
+
+    :returns: a tuple ``(plan, leaves, nodes)``.
+    """
+    key = (type(ary), leaf_cls)
+    plan = _TRAVERSAL_PLAN_CACHE.get(key)
+
+    if plan is not None and plan.dispatch_token == _get_dispatch_token():
+        try:
+            leaves, nodes = plan.gather(ary)
+        except _TraversalPlanMismatchError:
+            pass
+        else:
+            return plan, leaves, nodes
+
+    plan, cacheable, leaves, nodes = _make_traversal_plan(ary, leaf_cls)
+    if cacheable:
+        _TRAVERSAL_PLAN_CACHE[key] = plan
+
+    return plan, leaves, nodes
+
+# }}}
+
+
+# {{{ container structure
+
+@dataclass(frozen=True)
+class ContainerStructure:
+    """An immutable and hashable description of the structure of an array
+    container (a "treedef"), as returned by :func:`get_container_structure`.
+
+    Two containers have equal structures if they have the same types, keys
+    and non-array metadata at every node and leaves with the same shapes and
+    dtypes. Use :func:`rebuild` to construct a container with this structure
+    from a list of leaves.
+
+    .. attribute:: types
+
+        A :class:`tuple` of the types of all the nodes (including leaves) in
+        the container, in depth-first pre-order.
+
+    .. attribute:: keys
+
+        A :class:`tuple` containing, for each inner node in pre-order, a
+        :class:`tuple` of the keys of its children, as returned by
+        :func:`~arraycontext.serialize_container`.
+
+    .. attribute:: metadata
+
+        A :class:`tuple` containing, for each inner node in pre-order, the
+        non-array data attached to the container. For dataclasses, these are
+        the ``(name, value)`` pairs of the fields that are not serialized.
+        Otherwise, this is *None*. :class:`numpy.ndarray` values are stored
+        as ``(dtype, shape, bytes)`` tuples, so that they can be hashed and
+        compared. Other values that are not hashable are compared by
+        identity.
+
+    .. attribute:: leaf_keys
+
+        A :class:`tuple` containing the traversal path to each leaf, in the
+        same format as used by :func:`rec_keyed_map_array_container`.
+
+    .. attribute:: leaf_shapes
+    .. attribute:: leaf_dtypes
+
+        :class:`tuple`\\ s of the shape and dtype of each leaf (or *None*, if
+        the leaf does not have the attribute, e.g. for scalars).
+
+    .. attribute:: nleaves
+
+    .. note::
+
+        :func:`rebuild` requires templates for
+        :func:`~arraycontext.deserialize_container`. The structure stores
+        copies of the inner nodes of the container it was created from, in
+        which all the children are replaced by *None*, so that it does not
+        keep the leaf arrays alive. These templates do not take part in
+        comparisons.
+    """
+
+    types: Tuple[type, ...]
+    keys: Tuple[Tuple[Any, ...], ...]
+    metadata: Tuple[Any, ...]
+    leaf_keys: Tuple[Tuple[Any, ...], ...]
+    leaf_shapes: Tuple[Any, ...]
+    leaf_dtypes: Tuple[Any, ...]
+
+    _plan: _TraversalPlan = field(compare=False, repr=False)
+    _nodes: List[Any] = field(compare=False, repr=False)
+
+    @property
+    def nleaves(self) -> int:
+        return len(self.leaf_keys)
+
+
+class _IdentityKey:
+    """Wraps an unhashable value, so that it is hashed and compared by
+    identity.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is _IdentityKey and other.value is self.value
+
+    def __hash__(self) -> int:
+        return id(self.value)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.value!r})"
+
+
+def _normalize_metadata(value: Any) -> Any:
+    if isinstance(value, np.ndarray) and value.dtype.char != "O":
+        return (value.dtype, value.shape, value.tobytes())
+
+    try:
+        hash(value)
+    except TypeError:
+        return _IdentityKey(value)
+
+    return value
+
+
+def _get_node_metadata(template: Any, keys: Tuple[Any, ...]) -> Any:
+    if is_dataclass(template) and not isinstance(template, type):
+        keys_set = set(keys)
+        return tuple(
+                (f.name, _normalize_metadata(getattr(template, f.name)))
+                for f in fields(template)
+                if f.name not in keys_set)
+    else:
+        return None
+
+
+def _strip_node_template(
+        deserializer: Callable[[Any, Any], Any],
+        template: Any, keys: Tuple[Any, ...]) -> Any:
+    """
+    :returns: a version of *template* in which all the children are *None*
+        or, if it cannot be constructed that way (e.g. due to checks in its
+        constructor or in ``__post_init__``), *template* itself.
+    """
+    try:
+        return deserializer(template, [(key, None) for key in keys])
+    except Exception:
+        return template
+
+
+def _get_leaf_keys(
+        plan: _TraversalPlan,
+        keys: Sequence[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+    """
+    :arg keys: the keys of the children of each inner node, in pre-order.
+    :returns: the traversal path to each leaf, in the format used by
+        :func:`rec_keyed_map_array_container`.
+    """
+    leaf_keys = []
+    stack: List[Tuple[Any, ...]] = [()]
+    inode = 0
+    for nchildren in plan.nchildren:
+        path = stack.pop()
+        if nchildren is None:
+            leaf_keys.append(path)
+        else:
+            stack.extend(path + (key,) for key in reversed(keys[inode]))
+            inode += 1
+
+    return leaf_keys
+
+
+def _get_leaves_and_leaf_keys(
+        ary: ArrayOrContainer,
+        leaf_cls: Optional[type] = None
+        ) -> Tuple[List[Any], List[Tuple[Any, ...]]]:
+    """A cheaper version of :func:`_get_leaves_and_container_structure` for
+    when only the leaves and their paths are needed.
+    """
+    plan, leaves, nodes = _gather_with_traversal_plan(ary, leaf_cls)
+    return leaves, _get_leaf_keys(
+            plan, [tuple(key for key, _ in iterable) for _, iterable in nodes])
+
+
+def _get_leaves_and_container_structure(
+        ary: ArrayOrContainer,
+        leaf_cls: Optional[type] = None) -> Tuple[List[Any], ContainerStructure]:
+    plan, leaves, nodes = _gather_with_traversal_plan(ary, leaf_cls)
+    keys = tuple(tuple(key for key, _ in iterable) for _, iterable in nodes)
+    leaf_keys = _get_leaf_keys(plan, keys)
+
+    return leaves, ContainerStructure(
+            types=plan.types,
+            keys=keys,
+            metadata=tuple(
+                _get_node_metadata(template, node_keys)
+                for (template, _), node_keys in zip(nodes, keys)),
+            leaf_keys=tuple(leaf_keys),
+            leaf_shapes=tuple(getattr(leaf, "shape", None) for leaf in leaves),
+            leaf_dtypes=tuple(getattr(leaf, "dtype", None) for leaf in leaves),
+            _plan=plan,
+            _nodes=[
+                (_strip_node_template(deserializer, template, node_keys),
+                    [(key, None) for key in node_keys])
+                for deserializer, (template, _), node_keys in zip(
+                    [d for d in plan.deserializers if d is not None],
+                    nodes, keys)])
+
+
+def get_container_structure(
+        ary: ArrayOrContainer,
+        leaf_class: Optional[type] = None) -> ContainerStructure:
+    """
+    :param leaf_class: a container class on which to stop the traversal, as
+        in :func:`rec_map_array_container`.
+    :returns: a :class:`ContainerStructure` describing *ary*. If *ary* is not
+        an array container, the structure consists of a single leaf.
+    """
+    _, structure = _get_leaves_and_container_structure(ary, leaf_class)
+    return structure
+
+
+def rebuild(
+        structure: ContainerStructure,
+        leaves: Iterable[Any]) -> ArrayOrContainer:
+    """Construct an array container with the given *structure* from *leaves*.
+
+    This is the inverse of :func:`get_container_structure`, i.e. the leaves
+    are matched with the nodes in the same depth-first order that is used
+    by :func:`rec_map_array_container`.
+
+    :param leaves: an iterable of leaves of length
+        :attr:`ContainerStructure.nleaves`. The leaves do not need to have the
+        shapes and dtypes recorded in *structure*.
+    """
+    leaves = list(leaves)
+    if len(leaves) != structure.nleaves:
+        raise ValueError(
+                f"expected {structure.nleaves} leaves, got {len(leaves)}")
+
+    return cast(ArrayOrContainer, structure._plan.rebuild(structure._nodes, leaves))
+
+# }}}
+
+
 # {{{ array container traversal helpers
 
 def _map_array_container_impl(
@@ -97,16 +562,20 @@ def _map_array_container_impl(
         specific container classes. By default, the recursion is stopped when
         a non-:class:`ArrayContainer` class is encountered.
     """
+    if recursive:
+        plan, leaves, nodes = _gather_with_traversal_plan(ary, leaf_cls)
+        return cast(ArrayOrContainer,
+                plan.rebuild(nodes, [f(leaf) for leaf in leaves]))
+
     def rec(_ary: ArrayOrContainer) -> ArrayOrContainer:
         if type(_ary) is leaf_cls:  # type(ary) is never None
             return f(_ary)
 
-        try:
-            iterable = serialize_container(_ary)
-        except NotAnArrayContainerError:
+        iterable = try_serialize_container(_ary)
+        if iterable is None:
             return f(_ary)
         else:
-            return deserialize_container(_ary, [
+            return _deserialize_container(_ary, [
                 (key, frec(subary)) for key, subary in iterable
                 ])
 
@@ -136,24 +605,33 @@ def _multimap_array_container_impl(
         if type(template_ary) is leaf_cls:
             return f(*_args)
 
-        try:
-            iterable_template = serialize_container(template_ary)
-        except NotAnArrayContainerError:
+        iterable_template = try_serialize_container(template_ary)
+        if iterable_template is None:
             return f(*_args)
-        else:
-            pass
 
         assert all(
                 type(_args[i]) is type(template_ary) for i in container_indices[1:]
                 ), f"expected type '{type(template_ary).__name__}'"
+        # NOTE: object arrays are serialized with flat keys, so the shapes
+        # need to be compared separately
+        assert type(template_ary) is not np.ndarray or all(
+                _args[i].shape == template_ary.shape for i in container_indices[1:]
+                ), f"expected shape '{template_ary.shape}'"
+
+        # NOTE: some containers (e.g. packed_array_container) can be serialized
+        # in different ways and need to agree on one for all the arguments
+        serialize_alike = getattr(
+                type(template_ary), "_serialize_containers_alike", None)
+        if serialize_alike is not None:
+            iterables = serialize_alike([_args[i] for i in container_indices])
+        else:
+            iterables = [iterable_template, *[
+                _serialize_container(_args[i]) for i in container_indices[1:]]]
 
         result = []
         new_args = list(_args)
 
-        for subarys in zip(
-                iterable_template,
-                *[serialize_container(_args[i]) for i in container_indices[1:]]
-                ):
+        for subarys in zip(*iterables):
             key = None
             for i, (subkey, subary) in zip(container_indices, subarys):
                 if key is None:
@@ -177,13 +655,9 @@ def _multimap_array_container_impl(
         if type(arg) is leaf_cls:
             continue
 
-        try:
-            # FIXME: this will serialize again once `rec` is called, which is
-            # not great, but it doesn't seem like there's a good way to avoid it
-            _ = serialize_container(arg)
-        except NotAnArrayContainerError:
-            pass
-        else:
+        # FIXME: this will serialize again once `rec` is called, which is
+        # not great, but it doesn't seem like there's a good way to avoid it
+        if try_serialize_container(arg) is not None:
             container_indices.append(i)
 
     # }}}
@@ -213,9 +687,50 @@ def _multimap_array_container_impl(
 
     # }}}
 
+    # {{{ #containers > 1 => replay a traversal plan
+
+    if recursive and reduce_func is None:
+        plan, template_leaves, nodes = _gather_with_traversal_plan(
+                args[container_indices[0]], leaf_cls)
+
+        try:
+            other_leaves = []
+            for i in container_indices[1:]:
+                leaves, other_nodes = plan.gather(args[i], check_leaves=False)
+                if any(type(node) is np.ndarray and node.shape != other_node.shape
+                        for (node, _), (other_node, _) in zip(nodes, other_nodes)):
+                    raise _TraversalPlanMismatchError
+
+                if any(key != other_key
+                        for (_, iterable), (_, other_iterable)
+                        in zip(nodes, other_nodes)
+                        for (key, _), (other_key, _)
+                        in zip(iterable, other_iterable)):
+                    raise _TraversalPlanMismatchError
+
+                other_leaves.append(leaves)
+        except _TraversalPlanMismatchError:
+            # NOTE: fall back to the generic traversal below, which should
+            # raise a more helpful error
+            pass
+        else:
+            new_args = list(args)
+            result = []
+            for ileaf, leaf in enumerate(template_leaves):
+                new_args[container_indices[0]] = leaf
+                for i, leaves in zip(container_indices[1:], other_leaves):
+                    new_args[i] = leaves[ileaf]
+
+                result.append(f(*new_args))
+
+            return plan.rebuild(nodes, result)
+
+    # }}}
+
     # {{{ #containers > 1 => call `rec`
 
-    process_container = deserialize_container if reduce_func is None else reduce_func
+    process_container = (
+            _deserialize_container if reduce_func is None else reduce_func)
     frec = rec if recursive else f
 
     # }}}
@@ -240,12 +755,11 @@ def map_array_container(
     :param ary: a (potentially nested) structure of :class:`ArrayContainer`\ s,
         or an instance of a base array type.
     """
-    try:
-        iterable = serialize_container(ary)
-    except NotAnArrayContainerError:
+    iterable = try_serialize_container(ary)
+    if iterable is None:
         return f(ary)
     else:
-        return deserialize_container(ary, [
+        return _deserialize_container(ary, [
             (key, f(subary)) for key, subary in iterable
             ])
 
@@ -355,13 +869,12 @@ def keyed_map_array_container(
     :param ary: a (potentially nested) structure of :class:`ArrayContainer`\ s,
         or an instance of a base array type.
     """
-    try:
-        iterable = serialize_container(ary)
-    except NotAnArrayContainerError:
+    iterable = try_serialize_container(ary)
+    if iterable is None:
         raise ValueError(
                 f"Non-array container type has no key: {type(ary).__name__}")
     else:
-        return deserialize_container(ary, [
+        return _deserialize_container(ary, [
             (key, f(key, subary)) for key, subary in iterable
             ])
 
@@ -378,14 +891,13 @@ def rec_keyed_map_array_container(
 
     def rec(keys: Tuple[Union[str, int], ...],
             _ary: ArrayOrContainerT) -> ArrayOrContainerT:
-        try:
-            iterable = serialize_container(_ary)
-        except NotAnArrayContainerError:
+        iterable = try_serialize_container(_ary)
+        if iterable is None:
             return cast(ArrayOrContainerT, f(keys, cast(ArrayT, _ary)))
         else:
-            return deserialize_container(_ary, [
+            return cast(ArrayOrContainerT, _deserialize_container(_ary, [
                 (key, rec(keys + (key,), subary)) for key, subary in iterable
-                ])
+                ]))
 
     return rec((), ary)
 
@@ -407,9 +919,8 @@ def map_reduce_array_container(
         :class:`arraycontext.ArrayContext.array_types`. Returns an array of the
         same type or a scalar.
     """
-    try:
-        iterable = serialize_container(ary)
-    except NotAnArrayContainerError:
+    iterable = try_serialize_container(ary)
+    if iterable is None:
         return map_func(ary)
     else:
         return reduce_func([
@@ -488,9 +999,8 @@ def rec_map_reduce_array_container(
         if type(_ary) is leaf_class:
             return map_func(_ary)
         else:
-            try:
-                iterable = serialize_container(_ary)
-            except NotAnArrayContainerError:
+            iterable = try_serialize_container(_ary)
+            if iterable is None:
                 return map_func(_ary)
             else:
                 return reduce_func([
@@ -533,6 +1043,109 @@ def rec_multimap_reduce_array_container(
 # }}}
 
 
+# {{{ leaf iteration
+
+def _iter_container(ary: Any) -> Optional[Iterable[Tuple[Any, Any]]]:
+    # NOTE: object arrays are special-cased so that their entries are not
+    # gathered into a list by `serialize_container`
+    if type(ary) is np.ndarray and ary.dtype.char == "O":
+        # NOTE: same keys as `_serialize_ndarray_container`
+        return enumerate(ary.flat)
+
+    return try_serialize_container(ary)
+
+
+def _iter_leaves(
+        ary: ArrayOrContainer,
+        with_keys: bool,
+        leaf_class: Optional[type]) -> Iterator[Any]:
+    iterable: Optional[Iterable[Tuple[Any, Any]]] = None
+    if type(ary) is not leaf_class:
+        iterable = _iter_container(ary)
+
+    if iterable is None:
+        yield ((), ary) if with_keys else ary
+        return
+
+    stack: List[Tuple[Tuple[Any, ...], Iterator[Tuple[Any, Any]]]] = [
+            ((), iter(iterable))]
+    while stack:
+        prefix, it = stack[-1]
+
+        for key, subary in it:
+            keys = prefix + (key,) if with_keys else prefix
+
+            if type(subary) is not leaf_class:
+                iterable = _iter_container(subary)
+                if iterable is not None:
+                    # NOTE: descend into the container and pick up the
+                    # remaining entries of *it* once it has been exhausted
+                    stack.append((keys, iter(iterable)))
+                    break
+
+            yield (keys, subary) if with_keys else subary
+        else:
+            stack.pop()
+
+
+def iter_leaves(
+        ary: ArrayOrContainer, *,
+        with_keys: bool = False,
+        leaf_class: Optional[type] = None) -> Iterator[Any]:
+    """Iterate over the leaf arrays of a (potentially nested)
+    :class:`~arraycontext.ArrayContainer`.
+
+    The leaves are produced lazily, in the order given by
+    :func:`~arraycontext.serialize_container`, without building any
+    intermediate lists or rebuilding the container. This makes it a cheap
+    way to inspect the leaves, e.g. to count bytes or check for NaNs.
+
+    :param with_keys: if *True*, yield tuples ``(keys, leaf)``, where *keys*
+        is the traversal path to the leaf, as in
+        :func:`rec_keyed_map_array_container`.
+    :param leaf_class: an array container class that should be treated as a
+        leaf, as in :func:`rec_map_array_container`.
+    """
+    return _iter_leaves(ary, with_keys, leaf_class)
+
+
+def iter_leaves_multi(
+        *args: ArrayOrContainer,
+        with_keys: bool = False,
+        leaf_class: Optional[type] = None) -> Iterator[Any]:
+    r"""Iterate over the leaf arrays of multiple array containers at once.
+
+    All the arguments must have the same structure. Mismatches are detected
+    as the iteration reaches them, in which case a :exc:`ValueError` is
+    raised. The leaves are produced lazily, as in :func:`iter_leaves`.
+
+    :param with_keys: if *True*, yield tuples ``(keys, leaves)``, where
+        *keys* is the traversal path to the leaves. Otherwise, only the
+        :class:`tuple` of corresponding leaves of all *args* is yielded.
+    :param leaf_class: an array container class that should be treated as a
+        leaf, as in :func:`rec_map_array_container`.
+    """
+    from itertools import zip_longest
+
+    iterators = [_iter_leaves(ary, True, leaf_class) for ary in args]
+    sentinel = object()
+
+    for entries in zip_longest(*iterators, fillvalue=sentinel):
+        if any(entry is sentinel for entry in entries):
+            raise ValueError("array containers have a different number of leaves")
+
+        keys = entries[0][0]
+        if any(entry[0] != keys for entry in entries[1:]):
+            raise ValueError(
+                    "array containers have different keys: "
+                    f"{[entry[0] for entry in entries]}")
+
+        leaves = tuple(entry[1] for entry in entries)
+        yield (keys, leaves) if with_keys else leaves
+
+# }}}
+
+
 # {{{ freeze/thaw
 
 def freeze(
@@ -623,13 +1236,12 @@ def with_array_context(ary: ArrayOrContainerT,
     <https://github.com/inducer/arraycontext/issues/162>`__ for discussion of
     the future of this functionality.
     """
-    try:
-        iterable = serialize_container(ary)
-    except NotAnArrayContainerError:
+    iterable = try_serialize_container(ary)
+    if iterable is None:
         return ary
     else:
-        return deserialize_container(ary, [(key, with_array_context(subary, actx))
-                                           for key, subary in iterable])
+        return _deserialize_container(ary, [
+            (key, with_array_context(subary, actx)) for key, subary in iterable])
 
 # }}}
 
@@ -639,6 +1251,7 @@ def with_array_context(ary: ArrayOrContainerT,
 def flatten(
         ary: ArrayOrContainer, actx: ArrayContext, *,
         leaf_class: Optional[type] = None,
+        out: Optional[Any] = None,
         ) -> Any:
     """Convert all arrays in the :class:`~arraycontext.ArrayContainer`
     into single flat array of a type :attr:`arraycontext.ArrayContext.array_types`.
@@ -657,74 +1270,98 @@ def flatten(
         structure is left as is. By default, the recursion is stopped when
         a non-:class:`~arraycontext.ArrayContainer` is found, which results in
         the whole input container *ary* being flattened.
+    :arg out: a preallocated one-dimensional array of the size and dtype
+        given by :func:`flat_size_and_dtype`. If given, the leaf arrays are
+        copied directly into *out* (using the ``out`` argument of
+        ``concatenate``) and *out* is returned. This requires an array context
+        that :attr:`~arraycontext.ArrayContext.permits_inplace_modification`
+        and cannot be used together with *leaf_class*.
     """
-    common_dtype = None
+    def _ravel(subary: Array) -> Array:
+        try:
+            return actx.np.ravel(subary, order="C")
+        except ValueError as exc:
+            # NOTE: we can't do much if the array context fails to ravel,
+            # since it is the one responsible for the actual memory layout
+            if hasattr(subary, "strides"):
+                # Mypy has a point: nobody promised a strides attr.
+                strides_msg = f" and strides {subary.strides}"  # type: ignore[attr-defined]  # noqa: E501
+            else:
+                strides_msg = ""
 
-    def _flatten(subary: ArrayOrContainer) -> List[Array]:
-        nonlocal common_dtype
+            raise NotImplementedError(
+                    f"'{type(actx).__name__}.np.ravel' failed to reshape "
+                    f"an array with shape {subary.shape}{strides_msg}. "
+                    "This functionality needs to be implemented by the "
+                    "array context.") from exc
 
-        try:
-            iterable = serialize_container(subary)
-        except NotAnArrayContainerError:
-            subary_c = cast(Array, subary)
+    def _flatten_without_leaf_class(
+            subary: ArrayOrContainer, out: Optional[Any] = None) -> Any:
+        _, leaves, _ = _gather_with_traversal_plan(subary)
+
+        common_dtype = None
+        for leaf in leaves:
+            leaf_c = cast(Array, leaf)
 
             if common_dtype is None:
-                common_dtype = subary_c.dtype
+                common_dtype = leaf_c.dtype
 
-            if subary_c.dtype != common_dtype:
+            if leaf_c.dtype != common_dtype:
                 raise ValueError("arrays in container have different dtypes: "
-                        f"got {subary_c.dtype}, expected {common_dtype}")
+                        f"got {leaf_c.dtype}, expected {common_dtype}")
 
-            try:
-                flat_subary = actx.np.ravel(subary_c, order="C")
-            except ValueError as exc:
-                # NOTE: we can't do much if the array context fails to ravel,
-                # since it is the one responsible for the actual memory layout
-                if hasattr(subary_c, "strides"):
-                    # Mypy has a point: nobody promised a strides attr.
-                    strides_msg = f" and strides {subary_c.strides}"  # type: ignore[attr-defined]  # noqa: E501
-                else:
-                    strides_msg = ""
+        result = [_ravel(leaf) for leaf in leaves]
 
-                raise NotImplementedError(
-                        f"'{type(actx).__name__}.np.ravel' failed to reshape "
-                        f"an array with shape {subary_c.shape}{strides_msg}. "
-                        "This functionality needs to be implemented by the "
-                        "array context.") from exc
+        if out is None:
+            if len(result) == 1:
+                return result[0]
+            else:
+                return actx.np.concatenate(result)
 
-            result = [flat_subary]
-        else:
-            result = []
-            for _, isubary in iterable:
-                result.extend(_flatten(isubary))
+        # {{{ validate out
 
-        return result
+        if not actx.permits_inplace_modification:
+            raise ValueError(
+                    f"'{type(actx).__name__}' does not permit in-place "
+                    "modification: 'out' cannot be used")
 
-    def _flatten_without_leaf_class(subary: ArrayOrContainer) -> Any:
-        result = _flatten(subary)
+        if not isinstance(out, actx.array_types):
+            raise TypeError("'out' does not have a type supported by the provided "
+                    f"array context: got '{type(out).__name__}', expected one of "
+                    f"{actx.array_types}")
 
-        if len(result) == 1:
-            return result[0]
-        else:
-            return actx.np.concatenate(result)
+        size = sum(leaf.size for leaf in result)
+        if out.shape != (size,):
+            raise ValueError(
+                    f"'out' has shape {out.shape}, expected {(size,)}")
+
+        if common_dtype is not None and out.dtype != common_dtype:
+            raise ValueError(
+                    f"'out' has dtype {out.dtype}, expected {common_dtype}")
+
+        # }}}
+
+        return actx.np.concatenate(result, out=out)
 
     def _flatten_with_leaf_class(subary: ArrayOrContainer) -> Any:
         if type(subary) is leaf_class:
             return _flatten_without_leaf_class(subary)
 
-        try:
-            iterable = serialize_container(subary)
-        except NotAnArrayContainerError:
+        iterable = try_serialize_container(subary)
+        if iterable is None:
             return subary
         else:
-            return deserialize_container(subary, [
+            return _deserialize_container(subary, [
                 (key, _flatten_with_leaf_class(isubary))
                 for key, isubary in iterable
                 ])
 
     if leaf_class is None:
-        return _flatten_without_leaf_class(ary)
+        return _flatten_without_leaf_class(ary, out=out)
     else:
+        if out is not None:
+            raise ValueError("'out' cannot be used together with 'leaf_class'")
+
         return _flatten_with_leaf_class(ary)
 
 
@@ -751,9 +1388,8 @@ def unflatten(
     def _unflatten(template_subary: ArrayOrContainer) -> ArrayOrContainer:
         nonlocal offset, common_dtype
 
-        try:
-            iterable = serialize_container(template_subary)
-        except NotAnArrayContainerError:
+        iterable = try_serialize_container(template_subary)
+        if iterable is None:
             template_subary_c = cast(Array, template_subary)
 
             # {{{ validate subary
@@ -815,7 +1451,7 @@ def unflatten(
             offset += template_subary_c.size
             return subary
         else:
-            return deserialize_container(template_subary, [
+            return _deserialize_container(template_subary, [
                         (key, _unflatten(isubary)) for key, isubary in iterable
                         ])
 
@@ -844,29 +1480,234 @@ def flat_size_and_dtype(
         :class:`numpy.dtype` of the one-dimensional array returned by
         :func:`flatten`.
     """
+    _, leaves, _ = _gather_with_traversal_plan(ary)
+
+    size = 0
     common_dtype = None
+    for leaf in leaves:
+        leaf_c = cast(Array, leaf)
 
-    def _flat_size(subary: ArrayOrContainer) -> int:
-        nonlocal common_dtype
+        if common_dtype is None:
+            common_dtype = leaf_c.dtype
 
-        try:
-            iterable = serialize_container(subary)
-        except NotAnArrayContainerError:
-            subary_c = cast(Array, subary)
+        if leaf_c.dtype != common_dtype:
+            raise ValueError("arrays in container have different dtypes: "
+                    f"got {leaf_c.dtype}, expected {common_dtype}")
 
-            if common_dtype is None:
-                common_dtype = subary_c.dtype
+        size += leaf_c.size
 
-            if subary_c.dtype != common_dtype:
-                raise ValueError("arrays in container have different dtypes: "
-                        f"got {subary_c.dtype}, expected {common_dtype}")
+    return size, common_dtype
 
-            return subary_c.size
+
+class FlatLayout:
+    """Describes how the leaves of an array container are laid out in the
+    flat array produced by :func:`flatten`.
+
+    The layout is computed (and validated) once from a template container
+    and can then be used to flatten and unflatten containers with the same
+    structure. Unlike :func:`unflatten`, :meth:`unflatten` does not perform
+    any checks on its input and only creates views into the flat array.
+
+    By default, all the leaves must have the same dtype, as for
+    :func:`flatten`. If the layout is *packed*, the leaves can have different
+    dtypes and are stored in a flat byte buffer (of dtype :class:`numpy.uint8`)
+    instead. In the buffer, leaves with the same dtype are stored contiguously
+    in a segment and each segment starts at an offset that is a multiple of
+    *alignment*. Packed layouts require an array context that
+    :attr:`~arraycontext.ArrayContext.permits_inplace_modification` and
+    arrays that support reinterpreting their data with ``view(dtype)``.
+
+    .. attribute:: structure
+
+        The :class:`ContainerStructure` of the template.
+
+    .. attribute:: offsets
+
+        A :class:`tuple` of the offsets of each leaf in the flat array. The
+        last entry is the total size of the flat array. For packed layouts,
+        these are byte offsets and are not necessarily increasing.
+
+    .. attribute:: shapes
+    .. attribute:: dtypes
+    .. attribute:: strides
+
+        :class:`tuple`\\ s of the shapes, dtypes and strides of the leaves in
+        the template. The strides are *None* if the arrays do not have them.
+
+    .. attribute:: segments
+
+        For packed layouts, a :class:`tuple` of ``(dtype, start, stop,
+        indices)``, where *start* and *stop* are the byte offsets of the
+        segment containing all the leaves with the given *dtype* and
+        *indices* are their indices in the :attr:`offsets`, etc. For
+        non-packed layouts, this is *None*.
+
+    .. attribute:: size
+    .. attribute:: dtype
+
+        The size and :class:`numpy.dtype` of the flat array.
+
+    .. automethod:: __init__
+    .. automethod:: flatten
+    .. automethod:: unflatten
+    """
+
+    def __init__(self,
+            template: ArrayOrContainer, actx: ArrayContext, *,
+            strict: bool = True,
+            packed: bool = False,
+            alignment: int = 64) -> None:
+        """
+        :arg strict: if *True*, the strides of the leaves of *template* are
+            checked against the strides of the arrays obtained by reshaping
+            a flat array, as in :func:`unflatten`.
+        :arg packed: if *True*, the layout is packed into a byte buffer.
+        :arg alignment: the alignment (in bytes) of the segments in a packed
+            layout. This must be a multiple of the itemsizes of all the leaves,
+            so that their views into the buffer are aligned.
+        """
+        leaves, structure = _get_leaves_and_container_structure(template)
+
+        self.actx = actx
+        self.structure = structure
+        self.shapes = tuple(leaf.shape for leaf in leaves)
+        self.dtypes = tuple(np.dtype(leaf.dtype) for leaf in leaves)
+        self.strides = tuple(getattr(leaf, "strides", None) for leaf in leaves)
+
+        if packed:
+            if not actx.permits_inplace_modification:
+                raise NotImplementedError(
+                        f"'{type(actx).__name__}' does not permit in-place "
+                        "modification: packed layouts are not supported")
+
+            if alignment <= 0:
+                raise ValueError(
+                        f"'alignment' must be positive: got {alignment}")
+
+            for dtype in set(self.dtypes):
+                if alignment % dtype.itemsize:
+                    raise ValueError(
+                            f"'alignment' must be a multiple of the itemsize "
+                            f"of all leaves: got {alignment} for dtype "
+                            f"'{dtype}' with itemsize {dtype.itemsize}")
+
+            dtype_to_indices: Dict[np.dtype[Any], List[int]] = {}
+            for i, dtype in enumerate(self.dtypes):
+                dtype_to_indices.setdefault(dtype, []).append(i)
+
+            offsets = [0] * len(leaves)
+            segments = []
+            nbytes = 0
+            for dtype, indices in dtype_to_indices.items():
+                nbytes = -(-nbytes // alignment) * alignment
+                start = nbytes
+
+                for i in indices:
+                    offsets[i] = nbytes
+                    nbytes += leaves[i].size * dtype.itemsize
+
+                segments.append((dtype, start, nbytes, tuple(indices)))
+
+            self.offsets = tuple(offsets) + (nbytes,)
+            self.segments: Optional[Tuple[Any, ...]] = tuple(segments)
+
+            self.size = nbytes
+            self.dtype: Optional[np.dtype[Any]] = np.dtype(np.uint8)
         else:
-            return sum(_flat_size(isubary) for _, isubary in iterable)
+            common_dtype = None
+            for dtype in self.dtypes:
+                if common_dtype is None:
+                    common_dtype = dtype
 
-    size = _flat_size(ary)
-    return size, common_dtype
+                if dtype != common_dtype:
+                    raise ValueError("arrays in 'template' have different dtypes: "
+                            f"got {dtype}, expected {common_dtype}")
+
+            offsets = [0]
+            for leaf in leaves:
+                offsets.append(offsets[-1] + leaf.size)
+
+            self.offsets = tuple(offsets)
+            self.segments = None
+
+            self.size = offsets[-1]
+            self.dtype = common_dtype
+
+        if strict:
+            for shape, dtype, strides in zip(self.shapes, self.dtypes, self.strides):
+                if strides is None or np.prod(shape) == 0:
+                    continue
+
+                # NOTE: these are the strides of a C-contiguous array
+                expected_strides = tuple(
+                        dtype.itemsize * int(np.prod(shape[i + 1:]))
+                        for i in range(len(shape)))
+
+                if strides != expected_strides:
+                    raise ValueError(
+                            f"strides do not match template: got {strides}, "
+                            f"expected {expected_strides}")
+
+    @property
+    def packed(self) -> bool:
+        return self.segments is not None
+
+    def flatten(self, ary: ArrayOrContainer, out: Optional[Any] = None) -> Any:
+        """Flatten *ary*, which is assumed to have the same structure as the
+        template. This works like :func:`flatten`, but does not check that the
+        leaves have a common dtype.
+
+        :arg out: see :func:`flatten`.
+        """
+        actx = self.actx
+        _, leaves, _ = _gather_with_traversal_plan(ary)
+
+        result = [actx.np.ravel(leaf, order="C") for leaf in leaves]
+        if self.segments is not None:
+            # NOTE: all the leaves are copied into the buffer, so only the
+            # padding between the segments is left uninitialized
+            buf: Any = out
+            if buf is None:
+                buf = actx.empty(self.size, np.dtype(np.uint8))
+
+            for dtype, start, stop, indices in self.segments:
+                if start != stop:
+                    actx.np.concatenate(
+                            [result[i] for i in indices],
+                            out=buf[start:stop].view(dtype))
+
+            return buf
+
+        if out is None and len(result) == 1:
+            return result[0]
+        elif out is None:
+            return actx.np.concatenate(result)
+        else:
+            return actx.np.concatenate(result, out=out)
+
+    def unflatten(self, ary: Any) -> ArrayOrContainer:
+        """Unflatten the one-dimensional array *ary* into a container with
+        the same structure as the template. The leaves are views into *ary*
+        and no checks are performed on its size or dtype.
+        """
+        actx = self.actx
+        offsets = self.offsets
+
+        if self.segments is not None:
+            leaves = [
+                actx.np.reshape(
+                    ary[offsets[i]:offsets[i] + int(np.prod(shape)) * dtype.itemsize]
+                    .view(dtype),
+                    shape, order="C")
+                for i, (shape, dtype) in enumerate(zip(self.shapes, self.dtypes))
+                ]
+        else:
+            leaves = [
+                actx.np.reshape(ary[offsets[i]:offsets[i + 1]], shape, order="C")
+                for i, shape in enumerate(self.shapes)
+                ]
+
+        return rebuild(self.structure, leaves)
 
 # }}}
 
@@ -880,15 +1721,17 @@ def from_numpy(
     to the base array type of :class:`~arraycontext.ArrayContext`.
 
     The conversion is done using :meth:`arraycontext.ArrayContext.from_numpy`.
+    All the arrays in the container are transferred together, so that array
+    contexts can batch the copies (e.g. :class:`~arraycontext.PyOpenCLArrayContext`
+    packs them into a single buffer that is transferred at once).
     """
-    def _from_numpy_with_check(subary: Union[np.ndarray, ScalarLike]) \
-            -> ArrayOrContainerOrScalar:
-        if isinstance(subary, np.ndarray) or np.isscalar(subary):
-            return actx.from_numpy(subary)
-        else:
+    plan, leaves, nodes = _gather_with_traversal_plan(ary)
+
+    for subary in leaves:
+        if not (isinstance(subary, np.ndarray) or np.isscalar(subary)):
             raise TypeError(f"array is not an ndarray: '{type(subary).__name__}'")
 
-    return rec_map_array_container(_from_numpy_with_check, ary)
+    return plan.rebuild(nodes, actx._bulk_from_numpy(leaves))
 
 
 def to_numpy(ary: ArrayOrContainer, actx: ArrayContext) -> Any:
@@ -896,28 +1739,136 @@ def to_numpy(ary: ArrayOrContainer, actx: ArrayContext) -> Any:
     :mod:`numpy` using the provided :class:`~arraycontext.ArrayContext` *actx*.
 
     The conversion is done using :meth:`arraycontext.ArrayContext.to_numpy`.
+    All the arrays in the container are transferred together, so that array
+    contexts can batch the copies (e.g. :class:`~arraycontext.PyOpenCLArrayContext`
+    only waits once for all of them to complete).
     """
-    def _to_numpy_with_check(subary: Any) -> Any:
+    # do a freeze first, if 'actx' supports container-wide freezes
+    plan, leaves, nodes = _gather_with_traversal_plan(actx.thaw(actx.freeze(ary)))
+
+    for subary in leaves:
         if isinstance(subary, actx.array_types) or np.isscalar(subary):
             # NOTE: these are allowed by np.isscalar, but not here
             assert not isinstance(subary, (str, bytes))
-
-            return actx.to_numpy(subary)
         else:
             raise TypeError(
                     f"array of type '{type(subary).__name__}' not in "
                     f"supported types {actx.array_types}")
 
-    return rec_map_array_container(_to_numpy_with_check,
-                                   # do a freeze first, if 'actx' supports
-                                   # container-wide freezes
-                                   actx.thaw(actx.freeze(ary)))
+    return plan.rebuild(nodes, actx._bulk_to_numpy(leaves))
 
 # }}}
 
 
 # {{{ algebraic operations
 
+def _outer_object_arrays_batched(
+        a: np.ndarray, b: np.ndarray) -> Optional[np.ndarray]:
+    """Compute :func:`numpy.outer` of the object arrays *a* and *b* by
+    grouping the products of their leaves.
+
+    This requires that all the entries of *a* and *b* have the same container
+    structure (including the leaf shapes) and that they have an array context
+    that supports broadcasting. Then, the product of two entries is computed
+    leaf by leaf, and the leaves at all the positions in the structure that
+    have the same shape and dtypes are multiplied for all the pairs of entries
+    at once, by a single broadcasted product.
+
+    :returns: *None* if the requirements are not met.
+    """
+    a = a.ravel()
+    b = b.ravel()
+    if a.size == 0 or b.size == 0:
+        return None
+
+    actx = get_container_context_recursively_opt(a)
+    if actx is None:
+        actx = get_container_context_recursively_opt(b)
+
+    # NOTE: without broadcasting, this would need an einsum, which (in eager
+    # contexts) relies on metadata for `transform_loopy_program` that is not
+    # available here
+    if actx is None or not actx.supports_nonscalar_broadcasting:
+        return None
+
+    # NOTE: the traversal plans suffice to compare the structures, so this
+    # does not need the metadata of get_container_structure
+    def gather(entry: Any) -> Tuple[_TraversalPlan, List[Any], List[Any], Any]:
+        plan, leaves, nodes = _gather_with_traversal_plan(entry)
+        keys = tuple(
+                tuple(key for key, _ in iterable) for _, iterable in nodes)
+        return plan, leaves, nodes, keys
+
+    a_entries = [gather(entry) for entry in a]
+    b_entries = [gather(entry) for entry in b]
+
+    # {{{ check structure
+
+    ref_plan, ref_leaves, _, ref_keys = a_entries[0]
+    ref_shapes = [getattr(leaf, "shape", None) for leaf in ref_leaves]
+
+    def has_ref_structure(
+            plan: _TraversalPlan, leaves: List[Any], keys: Any) -> bool:
+        return (
+            plan.types == ref_plan.types
+            and keys == ref_keys
+            and all(isinstance(leaf, actx.array_types) for leaf in leaves)
+            and [leaf.shape for leaf in leaves] == ref_shapes)
+
+    if not all(
+            has_ref_structure(plan, leaves, keys)
+            for plan, leaves, _, keys in a_entries + b_entries):
+        return None
+
+    # NOTE: the dtypes only need to match across the entries of each argument
+    a_dtypes = [leaf.dtype for leaf in ref_leaves]
+    b_dtypes = [leaf.dtype for leaf in b_entries[0][1]]
+    if (any([leaf.dtype for leaf in leaves] != a_dtypes
+                for _, leaves, _, _ in a_entries)
+            or any([leaf.dtype for leaf in leaves] != b_dtypes
+                for _, leaves, _, _ in b_entries)):
+        return None
+
+    # }}}
+
+    # {{{ group leaf positions
+
+    groups: Dict[Tuple[Any, ...], List[int]] = {}
+    for k, (shape, a_dtype, b_dtype) in enumerate(zip(
+            ref_shapes, a_dtypes, b_dtypes)):
+        groups.setdefault((shape, a_dtype, b_dtype), []).append(k)
+
+    # }}}
+
+    n, m, nleaves = a.size, b.size, len(ref_leaves)
+    result_leaves: List[List[List[Any]]] = [
+            [[None] * nleaves for _ in range(m)] for _ in range(n)]
+
+    for (shape, _, _), positions in groups.items():
+        npositions = len(positions)
+        a_group = actx.np.stack([
+            a_entries[i][1][k] for i in range(n) for k in positions
+            ]).reshape((n, 1, npositions) + shape)
+        b_group = actx.np.stack([
+            b_entries[j][1][k] for j in range(m) for k in positions
+            ]).reshape((1, m, npositions) + shape)
+
+        ab_group = a_group * b_group
+
+        for i in range(n):
+            for j in range(m):
+                for ik, k in enumerate(positions):
+                    result_leaves[i][j][k] = ab_group[i, j, ik]
+
+    result = np.empty((n, m), dtype=object)
+    for i in range(n):
+        for j in range(m):
+            plan, _, nodes, _ = a_entries[i]
+            result[i, j] = plan.rebuild(nodes, result_leaves[i][j])
+
+    return result
+
+
 def outer(a: Any, b: Any) -> Any:
     """
     Compute the outer product of *a* and *b* while allowing either of them
@@ -932,12 +1883,15 @@ def outer(a: Any, b: Any) -> Any:
     If *a* and *b* are both array containers, the result will have the same type
     as *a*. If both are array containers and neither is an object array, they must
     have the same type.
+
+    If *a* and *b* are both object arrays, whose entries all have the same
+    structure and an array context that supports broadcasting, the products
+    of their leaves are grouped by shape and dtype, and each group is
+    computed by a single broadcasted product.
     """
 
     def treat_as_scalar(x: Any) -> bool:
-        try:
-            serialize_container(x)
-        except NotAnArrayContainerError:
+        if try_serialize_container(x) is None:
             return True
         else:
             return (
@@ -949,7 +1903,11 @@ def outer(a: Any, b: Any) -> Any:
         return a*b
     # After this point, "isinstance(o, ndarray)" means o is an object array.
     elif isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
-        return np.outer(a, b)
+        result = _outer_object_arrays_batched(a, b)
+        if result is None:
+            result = np.outer(a, b)
+
+        return result
     elif isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
         return map_array_container(lambda x: outer(x, b), a)
     else:
@@ -160,8 +160,8 @@ THE SOFTWARE.
 
 from abc import ABC, abstractmethod
 from typing import (
-        Any, Callable, Dict, Optional, Tuple, Union, Mapping,
-        TYPE_CHECKING, TypeVar)
+        Any, Callable, Dict, List, Optional, Sequence, Tuple, Union, Mapping,
+        TYPE_CHECKING, TypeVar, cast)
 
 import numpy as np
 from pytools import memoize_method
@@ -170,6 +170,7 @@ from pytools.tag import ToTagSetConvertible
 if TYPE_CHECKING:
     import loopy
     from arraycontext.container import ArrayContainer
+    from arraycontext.einsum import _EinsumContraction
 
 
 # {{{ typing
@@ -226,6 +227,15 @@ ArrayOrContainerOrScalarT = TypeVar(
 
 # {{{ ArrayContext
 
+class _FunctionResolvingDict(Dict[str, Any]):
+    def __init__(self, np_namespace: Any, args: Mapping[str, Any]) -> None:
+        super().__init__(args)
+        self.np_namespace = np_namespace
+
+    def __missing__(self, name: str) -> Any:
+        return getattr(self.np_namespace, name)
+
+
 class ArrayContext(ABC):
     r"""
     :canonical: arraycontext.ArrayContext
@@ -244,6 +254,7 @@ class ArrayContext(ABC):
     .. automethod:: to_numpy
     .. automethod:: call_loopy
     .. automethod:: einsum
+    .. automethod:: einsum_batched
     .. attribute:: np
 
          Provides access to a namespace that serves as a work-alike to
@@ -324,6 +335,59 @@ class ArrayContext(ABC):
         """
         pass
 
+    def _bulk_to_numpy(self,
+                       arrays: Sequence[Union[Array, ScalarLike]]
+                       ) -> List[Union["np.ndarray[Any, Any]", ScalarLike]]:
+        """Convert a sequence of arrays using :meth:`to_numpy`.
+
+        Array contexts can override this to batch the transfers of many
+        arrays, e.g. to avoid waiting for each of them separately. It is used
+        by :func:`~arraycontext.to_numpy`.
+        """
+        return [self.to_numpy(ary) for ary in arrays]
+
+    def _bulk_from_numpy(self,
+                         arrays: Sequence[Union["np.ndarray[Any, Any]", ScalarLike]]
+                         ) -> List[Union[Array, ScalarLike]]:
+        """Convert a sequence of arrays using :meth:`from_numpy`.
+
+        Array contexts can override this to batch the transfers of many
+        arrays, e.g. by packing them into a single buffer. It is used by
+        :func:`~arraycontext.from_numpy`.
+        """
+        return [self.from_numpy(ary) for ary in arrays]
+
+    def _fused_elementwise(self,
+                           expr: Any,
+                           args: Dict[str, Union[Array, ScalarLike]]
+                           ) -> Union[Array, ScalarLike]:
+        """Evaluate the :mod:`pymbolic` expression *expr*, whose variables
+        are given by *args*, elementwise. Any other variables refer to
+        functions in :attr:`np` (by their :mod:`numpy` names), e.g.
+        ``sin(x)``.
+
+        Array contexts can override this to evaluate the whole expression in
+        a single kernel, instead of one kernel (and one temporary) for each
+        operation. It is used by the deferred arithmetic of
+        :func:`~arraycontext.with_container_arithmetic`.
+        """
+        from pymbolic import evaluate
+        return evaluate(expr, _FunctionResolvingDict(self.np, args))
+
+    def _batched_fused_elementwise(self,
+                                   expr: Any,
+                                   args_list: Sequence[
+                                       Dict[str, Union[Array, ScalarLike]]]
+                                   ) -> List[Union[Array, ScalarLike]]:
+        """Like :meth:`_fused_elementwise`, but evaluate *expr* for each of the
+        argument dictionaries in *args_list*.
+
+        Array contexts can override this to process several (e.g. all the
+        same-shape leaves of a container) in a single kernel, for
+        containers of many small arrays where kernel launches dominate.
+        """
+        return [self._fused_elementwise(expr, args) for args in args_list]
+
     @abstractmethod
     def call_loopy(self,
                    program: "loopy.TranslationUnit",
@@ -410,6 +474,13 @@ class ArrayContext(ABC):
         .. versionadded:: 2021.2
         """
 
+    @memoize_method
+    def _get_einsum_contraction_path(
+            self, spec: str, shapes: Tuple[Tuple[Any, ...], ...],
+            ) -> Optional[Tuple["_EinsumContraction", ...]]:
+        from arraycontext.einsum import _get_einsum_contraction_path
+        return _get_einsum_contraction_path(spec, shapes)
+
     @memoize_method
     def _get_einsum_prg(self,
                         spec: str, arg_names: Tuple[str, ...],
@@ -460,16 +531,90 @@ class ArrayContext(ABC):
             objects specifying the tags to be applied to the operation.
 
         :return: the output of the einsum :mod:`loopy` program
+
+        For three or more operands and no *tagged*, the einsum is evaluated
+        as a sequence of pairwise contractions if that is cheaper than a
+        single loop nest over all the indices. The contraction order is cached
+        in the array context for each *spec* and shapes of *args*.
         """
         if arg_names is None:
             arg_names = tuple([f"arg{i}" for i in range(len(args))])
 
+        # NOTE: the tags may be needed to transform the kernels (e.g. by
+        # PyOpenCLArrayContext.transform_loopy_program), but need not apply
+        # to the intermediate results, so tagged einsums use a single kernel
+        path = None
+        if not tagged:
+            path = self._get_einsum_contraction_path(
+                    spec, tuple(arg.shape for arg in args))
+
+        if path is not None:
+            from arraycontext.einsum import _contract_einsum_path
+
+            def contract(k: int, step_spec: str,
+                    a: Tuple[str, Array],
+                    b: Tuple[str, Array]) -> Tuple[str, Array]:
+                return f"einsum_tmp{k}", self.einsum(step_spec, a[1], b[1],
+                        arg_names=(a[0], b[0]))
+
+            _, out_ary = _contract_einsum_path(
+                    path, list(zip(arg_names, args)), contract)
+            return out_ary
+
         prg = self._get_einsum_prg(spec, arg_names, tagged)
         out_ary = self.call_loopy(
             prg, **{arg_names[i]: arg for i, arg in enumerate(args)}
         )["out"]
         return self.tag(tagged, out_ary)
 
+    def _batched_einsum(self,
+                        spec: str, op: Array, args: Sequence[Array],
+                        arg_names: Optional[Tuple[str, ...]] = None,
+                        tagged: ToTagSetConvertible = ()) -> List[Array]:
+        """Compute ``einsum(spec, op, arg)`` for each of the *args*.
+
+        Array contexts can override this to evaluate several (e.g. all the
+        same-shape leaves of a container) in a single kernel.
+        """
+        return [self.einsum(spec, op, arg, arg_names=arg_names, tagged=tagged)
+                for arg in args]
+
+    def einsum_batched(self,
+                       spec: str, op: Array, container: ArrayOrContainerT,
+                       arg_names: Optional[Tuple[str, ...]] = None,
+                       tagged: ToTagSetConvertible = ()) -> ArrayOrContainerT:
+        """Computes :meth:`einsum` with the operands *op* and each leaf array
+        of *container*, e.g. to apply the same operator matrix to all the
+        fields in a container.
+
+        This is equivalent to mapping ``einsum(spec, op, leaf, ...)`` over
+        *container*, but array contexts may evaluate the leaves in fewer
+        kernels, e.g. :class:`PyOpenCLArrayContext` evaluates the leaves of
+        the same shape and dtype in a single kernel.
+
+        :arg spec: an :meth:`einsum` spec with two operands, the first of
+            which is *op*.
+        :arg arg_names: an optional tuple of the names of *op* and of the
+            leaves of *container*.
+        :arg tagged: as in :meth:`einsum`, applied to each result.
+
+        :return: a container of the same structure as *container* with the
+            results.
+        """
+        from arraycontext.container.traversal import (
+                rec_map_array_container, rec_map_reduce_array_container)
+
+        leaves: Any = rec_map_reduce_array_container(
+                lambda partials: [leaf for p in partials for leaf in p],
+                lambda leaf: [leaf],
+                container)
+
+        results = iter(self._batched_einsum(
+                spec, op, leaves, arg_names=arg_names, tagged=tagged))
+
+        return cast(ArrayOrContainerT,
+                rec_map_array_container(lambda leaf: next(results), container))
+
     @abstractmethod
     def clone(self: SelfType) -> SelfType:
         """If possible, return a version of *self* that is semantically
@@ -0,0 +1,251 @@
+# mypy: disallow-untyped-defs
+
+"""Contraction-order optimization for :meth:`ArrayContext.einsum`.
+
+Evaluating an :func:`numpy.einsum` with three or more operands as a single
+loop nest costs the product of the sizes of *all* its indices, which can be
+orders of magnitude more than contracting the operands pairwise in a good
+order. :func:`_get_einsum_contraction_path` finds such an order, in the
+spirit of `opt_einsum <https://github.com/dgasmith/opt_einsum>`__, by
+exhaustive search for a small number of operands and by a greedy heuristic
+otherwise.
+"""
+
+__copyright__ = """
+Copyright (C) 2023 University of Illinois Board of Trustees
+"""
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# NOTE: the number of contraction orders grows like (n!)^2 / 2^n, so the
+# exhaustive search is only used for a few operands
+_EINSUM_OPTIMAL_MAX_OPERANDS = 5
+
+
+@dataclass(frozen=True)
+class _EinsumContraction:
+    """A pairwise contraction in an einsum contraction path.
+
+    .. attribute:: operands
+
+        A tuple ``(i, j)`` with ``i < j`` of the positions of the operands in
+        the current list of operands. Both are removed from the list and the
+        result of the contraction is appended to it.
+
+    .. attribute:: spec
+
+        The :func:`numpy.einsum` spec of the pairwise contraction.
+    """
+
+    operands: Tuple[int, int]
+    spec: str
+
+
+# {{{ path search
+
+_PathT = List[Tuple[int, int, str]]
+
+
+def _get_size(indices: str, sizes: Dict[str, int]) -> int:
+    result = 1
+    for idx in indices:
+        result *= sizes[idx]
+
+    return result
+
+
+def _get_contraction(
+        operands: Sequence[str], i: int, j: int,
+        output: str, sizes: Dict[str, int]) -> Tuple[List[str], str, int]:
+    """
+    :returns: a tuple ``(remaining, spec, cost)`` of the operands remaining
+        after contracting the operands *i* and *j*, the spec of the
+        contraction and its cost.
+    """
+    remaining = [op for k, op in enumerate(operands) if k != i and k != j]
+    a, b = operands[i], operands[j]
+
+    if remaining:
+        # NOTE: keep only the indices that are still needed afterwards
+        keep = set(output).union(*remaining)
+        result = "".join(idx for idx in dict.fromkeys(a + b) if idx in keep)
+    else:
+        result = output
+
+    cost = _get_size("".join(set(a + b)), sizes)
+    return [*remaining, result], f"{a},{b}->{result}", cost
+
+
+def _get_optimal_path(
+        inputs: Sequence[str], output: str,
+        sizes: Dict[str, int]) -> Tuple[_PathT, float]:
+    best_path: _PathT = []
+    best_cost = float("inf")
+
+    def rec(operands: List[str], path: _PathT, cost: int) -> None:
+        nonlocal best_path, best_cost
+        if cost >= best_cost:
+            return
+
+        if len(operands) == 1:
+            best_path, best_cost = path, cost
+            return
+
+        for i in range(len(operands)):
+            for j in range(i + 1, len(operands)):
+                remaining, spec, step_cost = _get_contraction(
+                        operands, i, j, output, sizes)
+                rec(remaining, [*path, (i, j, spec)], cost + step_cost)
+
+    rec(list(inputs), [], 0)
+    return best_path, best_cost
+
+
+def _get_greedy_path(
+        inputs: Sequence[str], output: str,
+        sizes: Dict[str, int]) -> Tuple[_PathT, float]:
+    path: _PathT = []
+    total_cost = 0
+
+    operands = list(inputs)
+    while len(operands) > 1:
+        # NOTE: outer products are only considered if no operands share
+        # indices, since they never reduce the size of the operands
+        pairs = [(i, j)
+                for i in range(len(operands))
+                for j in range(i + 1, len(operands))
+                if set(operands[i]) & set(operands[j])]
+        if not pairs:
+            pairs = [(i, j)
+                    for i in range(len(operands))
+                    for j in range(i + 1, len(operands))]
+
+        best = None
+        for i, j in pairs:
+            remaining, spec, cost = _get_contraction(
+                    operands, i, j, output, sizes)
+
+            # NOTE: prefer contractions that shrink the operands the most
+            size_change = (
+                    _get_size(remaining[-1], sizes)
+                    - _get_size(operands[i], sizes)
+                    - _get_size(operands[j], sizes))
+            key = (size_change, cost)
+            if best is None or key < best[0]:
+                best = (key, i, j, remaining, spec, cost)
+
+        assert best is not None
+        _, i, j, operands, spec, cost = best
+        path.append((i, j, spec))
+        total_cost += cost
+
+    return path, total_cost
+
+
+def _get_einsum_contraction_path(
+        spec: str, shapes: Tuple[Tuple[Any, ...], ...],
+        strategy: str = "auto") -> Optional[Tuple[_EinsumContraction, ...]]:
+    """
+    :arg shapes: the shapes of the operands of the einsum.
+    :arg strategy: one of ``"optimal"``, ``"greedy"`` or ``"auto"``, which
+        uses the optimal search for up to ``_EINSUM_OPTIMAL_MAX_OPERANDS``
+        operands.
+    :returns: a sequence of pairwise contractions that evaluate the einsum
+        *spec*, or *None* if it should be evaluated in one go. This is the
+        case if *spec* has fewer than three operands, if the pairwise
+        contractions are not cheaper, and for specs that are not supported
+        by the path search (e.g. repeated indices in an operand, ellipses or
+        symbolic shapes).
+    """
+    if strategy not in ("optimal", "greedy", "auto"):
+        raise ValueError(f"unknown einsum contraction strategy: '{strategy}'")
+
+    spec = spec.replace(" ", "")
+    if "->" not in spec:
+        return None
+
+    in_spec, output = spec.split("->")
+    inputs = in_spec.split(",")
+    if len(inputs) < 3 or len(inputs) != len(shapes):
+        return None
+
+    sizes: Dict[str, int] = {}
+    for indices, shape in zip(inputs, shapes):
+        if (not indices.isalpha()
+                or len(set(indices)) != len(indices)
+                or len(indices) != len(shape)):
+            return None
+
+        for idx, n in zip(indices, shape):
+            if not isinstance(n, (int, np.integer)):
+                return None
+
+            # NOTE: broadcasting of unit axes is left to the single kernel
+            if sizes.setdefault(idx, int(n)) != n:
+                return None
+
+    if ((output and not output.isalpha())
+            or len(set(output)) != len(output)
+            or not set(output) <= set(sizes)):
+        return None
+
+    if strategy == "optimal" or (
+            strategy == "auto" and len(inputs) <= _EINSUM_OPTIMAL_MAX_OPERANDS):
+        path, cost = _get_optimal_path(inputs, output, sizes)
+    else:
+        path, cost = _get_greedy_path(inputs, output, sizes)
+
+    if cost >= _get_size("".join(sizes), sizes):
+        return None
+
+    return tuple(_EinsumContraction((i, j), step_spec)
+            for i, j, step_spec in path)
+
+
+def _contract_einsum_path(
+        path: Sequence[_EinsumContraction],
+        args: Sequence[Any],
+        contract: Callable[[int, str, Any, Any], Any]) -> Any:
+    """Evaluate an einsum by the pairwise contractions in *path*.
+
+    :arg contract: a callable ``contract(k, spec, a, b)`` that evaluates
+        the *k*-th pairwise contraction *spec* on the operands *a* and *b*.
+    """
+    operands = list(args)
+    for k, step in enumerate(path):
+        i, j = step.operands
+        b = operands.pop(j)
+        a = operands.pop(i)
+        operands.append(contract(k, step.spec, a, b))
+
+    result, = operands
+    return result
+
+# }}}
+
+
+# vim: foldmethod=marker
@@ -24,7 +24,7 @@ THE SOFTWARE.
 
 
 import numpy as np
-from arraycontext.container import NotAnArrayContainerError, serialize_container
+from arraycontext.container import try_serialize_container
 from arraycontext.container.traversal import rec_map_array_container
 
 
@@ -170,11 +170,8 @@ class BaseFakeNumpyLinalgNamespace:
 
                 return flat_norm(ary, ord=ord)
 
-        try:
-            iterable = serialize_container(ary)
-        except NotAnArrayContainerError:
-            pass
-        else:
+        iterable = try_serialize_container(ary)
+        if iterable is not None:
             return _reduce_norm(actx, [
                 self.norm(subary, ord=ord) for _, subary in iterable
                 ], ord=ord)
@@ -79,6 +79,16 @@ class EagerJAXArrayContext(ArrayContext):
         # jax.device_get can take scalars as well.
         return jax.device_get(array)
 
+    def _bulk_from_numpy(self, arrays):
+        import jax
+        # NOTE: jax.device_put starts all the transfers before waiting for them
+        return jax.device_put(list(arrays))
+
+    def _bulk_to_numpy(self, arrays):
+        import jax
+        # NOTE: jax.device_get starts all the transfers before waiting for them
+        return jax.device_get(list(arrays))
+
     def call_loopy(self, t_unit, **kwargs):
         raise NotImplementedError("calling loopy on JAX arrays"
                                   " not supported. Maybe rewrite"
@@ -30,7 +30,7 @@ from arraycontext.container.traversal import (
         rec_multimap_array_container, rec_map_array_container,
         rec_map_reduce_array_container,
         )
-from arraycontext.container import NotAnArrayContainerError, serialize_container
+from arraycontext.container import try_serialize_container
 import numpy
 import jax.numpy as jnp
 
@@ -136,9 +136,9 @@ class EagerJAXFakeNumpyNamespace(BaseFakeNumpyNamespace):
             if type(x) != type(y):
                 return false
 
-            try:
-                iterable = zip(serialize_container(x), serialize_container(y))
-            except NotAnArrayContainerError:
+            x_iterable = try_serialize_container(x)
+            y_iterable = try_serialize_container(y)
+            if x_iterable is None or y_iterable is None:
                 if x.shape != y.shape:
                     return false
                 else:
@@ -146,7 +146,8 @@ class EagerJAXFakeNumpyNamespace(BaseFakeNumpyNamespace):
             else:
                 return reduce(
                         jnp.logical_and,
-                        [rec_equal(ix, iy) for (_, ix), (_, iy) in iterable],
+                        [rec_equal(ix, iy)
+                         for (_, ix), (_, iy) in zip(x_iterable, y_iterable)],
                         true)
 
         return rec_equal(a, b)
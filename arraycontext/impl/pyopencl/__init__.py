@@ -45,6 +45,126 @@ if TYPE_CHECKING:
     import loopy as lp
 
 
+# NOTE: limit on the number of array arguments of the batched fused kernels,
+# which keeps their total size (pointers and offsets) at half the minimum
+# CL_DEVICE_MAX_PARAMETER_SIZE of 1024 bytes
+_MAX_BATCHED_KERNEL_ARRAYS = 32
+
+
+# {{{ bulk transfers
+
+# NOTE: alignment (in bytes) of the arrays in the staging buffers
+_BULK_TRANSFER_ALIGNMENT = 64
+
+
+def _get_staging_offsets(arrays, is_batched):
+    offsets = []
+    nbytes = 0
+    for ary in arrays:
+        if is_batched(ary):
+            alignment = _BULK_TRANSFER_ALIGNMENT
+            nbytes = -(-nbytes // alignment) * alignment
+            offsets.append(nbytes)
+            nbytes += ary.nbytes
+        else:
+            offsets.append(None)
+
+    return offsets, nbytes
+
+
+def _bulk_get(queue: "pyopencl.CommandQueue", arrays):
+    r"""Transfer a list of :class:`pyopencl.array.Array`\ s to the host.
+
+    All the C-contiguous arrays are copied (without blocking) into a single
+    host staging buffer and the result only waits once for all the copies
+    to complete. The returned :class:`numpy.ndarray`\ s are views into the
+    staging buffer. Scalars are returned as is and any other arrays are
+    transferred separately.
+    """
+    import pyopencl as cl
+    import pyopencl.array as cl_array
+
+    def is_batched(ary):
+        return isinstance(ary, cl_array.Array) and ary.flags.c_contiguous
+
+    offsets, nbytes = _get_staging_offsets(arrays, is_batched)
+    host_buffer = np.empty(nbytes, dtype=np.uint8)
+
+    events = []
+    for ary, offset in zip(arrays, offsets):
+        if offset is not None and ary.nbytes:
+            events.append(cl.enqueue_copy(queue,
+                    host_buffer[offset:offset + ary.nbytes], ary.base_data,
+                    src_offset=ary.offset,
+                    wait_for=ary.events,
+                    is_blocking=False))
+
+    # NOTE: the other arrays are transferred while the copies are in flight
+    result = [
+        ary if offset is not None or np.isscalar(ary) else ary.get(queue=queue)
+        for ary, offset in zip(arrays, offsets)]
+
+    if events:
+        cl.wait_for_events(events)
+
+    return [
+        host_buffer[offset:offset + ary.nbytes]
+        .view(ary.dtype).reshape(ary.shape)
+        if offset is not None else ary
+        for ary, offset in zip(result, offsets)]
+
+
+def _bulk_put(queue: "pyopencl.CommandQueue", arrays,
+        allocator=None, array_cls=None):
+    r"""Transfer a list of :class:`numpy.ndarray`\ s to the device.
+
+    All the arrays are packed into a single host staging buffer, which is
+    transferred to the device at once. The returned arrays (of type
+    *array_cls*, by default :class:`pyopencl.array.Array`) are C-contiguous
+    views into the device buffer. Any entries that are not
+    :class:`numpy.ndarray`\ s (e.g. scalars) are returned as is.
+    """
+    import pyopencl.array as cl_array
+    if array_cls is None:
+        array_cls = cl_array.Array
+
+    def is_batched(ary):
+        return isinstance(ary, np.ndarray)
+
+    offsets, nbytes = _get_staging_offsets(arrays, is_batched)
+
+    host_buffer = np.empty(nbytes, dtype=np.uint8)
+    host_arrays = []
+    for ary, offset in zip(arrays, offsets):
+        if offset is not None:
+            host_ary = host_buffer[offset:offset + ary.nbytes] \
+                .view(ary.dtype).reshape(ary.shape)
+            host_ary[...] = ary
+        else:
+            host_ary = None
+
+        host_arrays.append(host_ary)
+
+    device_buffer = cl_array.to_device(queue, host_buffer, allocator=allocator)
+
+    # NOTE: the views are constructed directly (instead of by slicing), since
+    # the overhead of creating the intermediate arrays adds up quickly
+    return [
+        array_cls(None, host_ary.shape, host_ary.dtype,
+            allocator=allocator,
+            data=device_buffer.base_data,
+            offset=device_buffer.offset + offset,
+            strides=host_ary.strides,
+            _context=queue.context,
+            _queue=queue,
+            _size=host_ary.size,
+            _fast=True)
+        if offset is not None else ary
+        for ary, offset, host_ary in zip(arrays, offsets, host_arrays)]
+
+# }}}
+
+
 # {{{ PyOpenCLArrayContext
 
 class PyOpenCLArrayContext(ArrayContext):
@@ -182,6 +302,153 @@ class PyOpenCLArrayContext(ArrayContext):
 
         return array.get(queue=self.queue)
 
+    def _bulk_from_numpy(self, arrays):
+        from arraycontext.impl.pyopencl.taggable_cl_array import TaggableCLArray
+        return [
+            self.from_numpy(ary) if np.isscalar(ary) else ary
+            for ary in _bulk_put(self.queue, arrays,
+                allocator=self.allocator, array_cls=TaggableCLArray)]
+
+    def _bulk_to_numpy(self, arrays):
+        return _bulk_get(self.queue, arrays)
+
+    def _split_fused_elementwise_args(self, args):
+        """
+        :returns: a tuple ``(arrays, scalars, first)`` of the array and scalar
+            entries of *args* and one of the arrays, or *None* if the
+            expression cannot be evaluated by the fused kernels.
+        """
+        arrays = {name: ary for name, ary in args.items()
+                  if isinstance(ary, self.array_types)}
+        scalars = {name: value for name, value in args.items()
+                   if name not in arrays}
+
+        # NOTE: only handle the simple (and common) case of real arrays of the
+        # same shape and dtype, where the result has the same dtype as well
+        first = next(iter(arrays.values()), None)
+        if (first is None
+                or first.ndim == 0
+                or first.dtype.kind != "f"
+                or not all(np.isscalar(value) for value in scalars.values())
+                or not all(
+                    ary.shape == first.shape and ary.dtype == first.dtype
+                    for ary in arrays.values())
+                or np.result_type(first.dtype, *scalars.values()) != first.dtype):
+            return None
+
+        scalar_type = first.dtype.type
+        return arrays, {
+            name: scalar_type(value) for name, value in scalars.items()
+            }, first
+
+    def _fused_elementwise(self, expr, args):
+        split_args = self._split_fused_elementwise_args(args)
+        if split_args is None:
+            return super()._fused_elementwise(expr, args)
+
+        arrays, scalars, first = split_args
+
+        from arraycontext.loopy import _get_fused_elementwise_loopy_program
+        prg = _get_fused_elementwise_loopy_program(
+                self, expr, tuple(sorted(arrays)), first.ndim)
+
+        return self.call_loopy(prg, **arrays, **scalars)["out"]
+
+    def _batched_fused_elementwise(self, expr, args_list):
+        # NOTE: group the sets of arguments that can go into the same kernel,
+        # i.e. ones with the same shapes, dtypes and scalars
+        results = [None] * len(args_list)
+        groups = {}
+        for i, args in enumerate(args_list):
+            split_args = self._split_fused_elementwise_args(args)
+            if split_args is None:
+                results[i] = super()._fused_elementwise(expr, args)
+                continue
+
+            arrays, scalars, first = split_args
+            key = (tuple(sorted(arrays)), first.shape, first.dtype,
+                   tuple(sorted(scalars.items())))
+            groups.setdefault(key, []).append((i, arrays, scalars))
+
+        from arraycontext.loopy import (
+                _get_fused_elementwise_loopy_program,
+                _get_batched_fused_elementwise_loopy_program)
+
+        for (array_names, shape, _, _), group in groups.items():
+            # NOTE: keep the number of kernel arguments reasonable
+            max_nbatch = max(1, _MAX_BATCHED_KERNEL_ARRAYS // (len(array_names) + 1))
+
+            for ibatch in range(0, len(group), max_nbatch):
+                batch = group[ibatch:ibatch + max_nbatch]
+                _, _, scalars = batch[0]
+
+                if len(batch) == 1:
+                    (i, arrays, _), = batch
+                    prg = _get_fused_elementwise_loopy_program(
+                            self, expr, array_names, len(shape))
+                    results[i] = self.call_loopy(prg, **arrays, **scalars)["out"]
+                    continue
+
+                prg = _get_batched_fused_elementwise_loopy_program(
+                        self, expr, array_names, len(shape), len(batch))
+                result = self.call_loopy(prg, **{
+                    f"{name}_{k}": ary
+                    for k, (_, arrays, _) in enumerate(batch)
+                    for name, ary in arrays.items()
+                    }, **scalars)
+
+                for k, (i, _, _) in enumerate(batch):
+                    results[i] = result[f"out_{k}"]
+
+        return results
+
+    def _batched_einsum(self, spec, op, args, arg_names=None, tagged=()):
+        if ("->" not in spec
+                or len(spec.split("->")[0].split(",")) != 2
+                or not isinstance(op, self.array_types)):
+            return super()._batched_einsum(
+                    spec, op, args, arg_names=arg_names, tagged=tagged)
+
+        if arg_names is None:
+            arg_names = ("arg0", "arg1")
+        arg_names = tuple(arg_names)
+
+        # NOTE: group the leaves that can go into the same kernel
+        results = [None] * len(args)
+        groups = {}
+        for i, arg in enumerate(args):
+            if isinstance(arg, self.array_types):
+                groups.setdefault((arg.shape, arg.dtype), []).append(i)
+            else:
+                results[i] = self.einsum(
+                        spec, op, arg, arg_names=arg_names, tagged=tagged)
+
+        from arraycontext.loopy import _get_batched_einsum_loopy_program
+
+        # NOTE: keep the number of kernel arguments reasonable
+        max_nbatch = (_MAX_BATCHED_KERNEL_ARRAYS - 1) // 2
+
+        for group in groups.values():
+            for ibatch in range(0, len(group), max_nbatch):
+                batch = group[ibatch:ibatch + max_nbatch]
+
+                if len(batch) == 1:
+                    i, = batch
+                    results[i] = self.einsum(
+                            spec, op, args[i], arg_names=arg_names, tagged=tagged)
+                    continue
+
+                prg = _get_batched_einsum_loopy_program(
+                        self, spec, arg_names, len(batch), tagged)
+                result = self.call_loopy(prg, **{arg_names[0]: op}, **{
+                    f"{arg_names[1]}_{k}": args[i] for k, i in enumerate(batch)
+                    })
+
+                for k, i in enumerate(batch):
+                    results[i] = self.tag(tagged, result[f"out_{k}"])
+
+        return results
+
     def call_loopy(self, t_unit, **kwargs):
         try:
             t_unit = self._loopy_transform_cache[t_unit]
@@ -275,12 +542,20 @@ class PyOpenCLArrayContext(ArrayContext):
         # import with underscore to avoid DeprecationWarning
         from arraycontext.metadata import _FirstAxisIsElementsTag
 
-        if (len(default_entrypoint.instructions) == 1
-                and isinstance(default_entrypoint.instructions[0], lp.Assignment)
-                and any(isinstance(tag, _FirstAxisIsElementsTag)
+        # NOTE: kernels with several statements, e.g. from
+        # ArrayContext.einsum_batched, are handled if they all write to
+        # arrays indexed by the same inames
+        import pymbolic.primitives as prim
+        stmts = default_entrypoint.instructions
+        if (any(isinstance(tag, _FirstAxisIsElementsTag)
                     # FIXME: Firedrake branch lacks kernel tags
-                    for tag in getattr(default_entrypoint, "tags", ()))):
-            stmt, = default_entrypoint.instructions
+                    for tag in getattr(default_entrypoint, "tags", ()))
+                and stmts
+                and all(isinstance(stmt, lp.Assignment)
+                    and isinstance(stmt.assignee, prim.Subscript)
+                    for stmt in stmts)
+                and len({stmt.assignee.index_tuple for stmt in stmts}) == 1):
+            stmt = stmts[0]
 
             out_inames = [v.name for v in stmt.assignee.index_tuple]
             assert out_inames
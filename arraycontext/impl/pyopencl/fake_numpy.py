@@ -37,11 +37,10 @@ from arraycontext.fake_numpy import (
 from arraycontext.loopy import (
         LoopyBasedFakeNumpyNamespace
         )
-from arraycontext.container import NotAnArrayContainerError, serialize_container
+from arraycontext.container import try_serialize_container
 from arraycontext.container.traversal import (
         rec_map_array_container,
         rec_multimap_array_container,
-        rec_map_reduce_array_container,
         rec_multimap_reduce_array_container,
         )
 
@@ -61,6 +60,46 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
     # NOTE: the order of these follows the order in numpy docs
     # NOTE: when adding a function here, also add it to `array_context.rst` docs!
 
+    # {{{ reductions
+
+    def _rec_map_reduce_on_device(self, reduce_func, map_func, *args,
+            initial=None):
+        """Like :func:`~arraycontext.rec_multimap_reduce_array_container`,
+        but the per-leaf results of *map_func* (i.e. device scalars) are
+        gathered into a single device array, which is then reduced by
+        *reduce_func* in one go. This avoids launching a kernel for each pair
+        of leaves and, since the reduction kernels combine values pairwise,
+        it also keeps round-off under control for large containers.
+
+        :arg initial: the result for containers without any leaves. If not
+            given, reducing an empty container raises a :exc:`TypeError`.
+        """
+        def _gather(partials):
+            return [p for subpartials in partials for p in subpartials]
+
+        partials = rec_multimap_reduce_array_container(
+                _gather, lambda *subarys: [map_func(*subarys)], *args)
+
+        if not partials:
+            if initial is None:
+                raise TypeError("reduction of an empty array container "
+                        "with no initial value")
+            return initial
+
+        if len(partials) == 1:
+            return partials[0]
+
+        actx = self._array_context
+        dtype = np.result_type(*[p.dtype for p in partials])
+        partials = [
+                (p if p.dtype == dtype else p.astype(dtype, queue=actx.queue))
+                .reshape(1)
+                for p in partials]
+
+        return reduce_func(self.concatenate(partials))
+
+    # }}}
+
     # {{{ array creation routines
 
     def ones_like(self, ary):
@@ -111,12 +150,53 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
 
         return rec_map_array_container(_rec_ravel, a)
 
-    def concatenate(self, arrays, axis=0):
-        return cl_array.concatenate(
-            arrays, axis,
-            self._array_context.queue,
-            self._array_context.allocator
-        )
+    def concatenate(self, arrays, axis=0, out=None):
+        actx = self._array_context
+        arrays = list(arrays)
+
+        # NOTE: if all the arrays are contiguous and are concatenated along
+        # the first axis, they end up in contiguous chunks of the result, so
+        # they can be copied over without launching any kernels
+        if (axis == 0
+                and arrays
+                and all(
+                    ary.dtype == arrays[0].dtype
+                    and ary.shape[1:] == arrays[0].shape[1:]
+                    and ary.flags.c_contiguous
+                    for ary in arrays)):
+            shape = (sum(ary.shape[0] for ary in arrays),) + arrays[0].shape[1:]
+            dtype = arrays[0].dtype
+
+            if out is None:
+                out = arrays[0].__class__(
+                        actx.queue, shape, dtype, allocator=actx.allocator)
+
+            if (out.shape == shape
+                    and out.dtype == dtype
+                    and out.flags.c_contiguous):
+                wait_for = list(out.events)
+                offset = out.offset
+
+                for ary in arrays:
+                    if ary.nbytes:
+                        out.add_event(
+                            cl.enqueue_copy(actx.queue,
+                                out.base_data, ary.base_data,
+                                byte_count=ary.nbytes,
+                                src_offset=ary.offset,
+                                dst_offset=offset,
+                                wait_for=wait_for + ary.events))
+
+                    offset += ary.nbytes
+
+                return out
+
+        result = cl_array.concatenate(arrays, axis, actx.queue, actx.allocator)
+        if out is None:
+            return result
+
+        out.setitem(..., result, queue=actx.queue)
+        return out
 
     def stack(self, arrays, axis=0):
         return rec_multimap_array_container(
@@ -129,10 +209,11 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
     # {{{ linear algebra
 
     def vdot(self, x, y, dtype=None):
-        result = rec_multimap_reduce_array_container(
-                sum,
-                partial(cl_array.vdot, dtype=dtype, queue=self._array_context.queue),
-                x, y)
+        queue = self._array_context.queue
+        result = self._rec_map_reduce_on_device(
+                partial(cl_array.sum, queue=queue),
+                partial(cl_array.vdot, dtype=dtype, queue=queue),
+                x, y, initial=0)
 
         if not self._array_context._force_device_scalars:
             result = result.get()[()]
@@ -144,8 +225,8 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
 
     def all(self, a):
         queue = self._array_context.queue
-        result = rec_map_reduce_array_container(
-                partial(reduce, partial(cl_array.minimum, queue=queue)),
+        result = self._rec_map_reduce_on_device(
+                partial(cl_array.min, queue=queue),
                 lambda subary: subary.all(queue=queue),
                 a)
 
@@ -155,8 +236,8 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
 
     def any(self, a):
         queue = self._array_context.queue
-        result = rec_map_reduce_array_container(
-                partial(reduce, partial(cl_array.maximum, queue=queue)),
+        result = self._rec_map_reduce_on_device(
+                partial(cl_array.max, queue=queue),
                 lambda subary: subary.any(queue=queue),
                 a)
 
@@ -176,9 +257,9 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
             if type(x) != type(y):
                 return false
 
-            try:
-                iterable = zip(serialize_container(x), serialize_container(y))
-            except NotAnArrayContainerError:
+            x_iterable = try_serialize_container(x)
+            y_iterable = try_serialize_container(y)
+            if x_iterable is None or y_iterable is None:
                 if x.shape != y.shape:
                     return false
                 else:
@@ -186,7 +267,8 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
             else:
                 return reduce(
                         partial(cl_array.minimum, queue=queue),
-                        [rec_equal(ix, iy)for (_, ix), (_, iy) in iterable],
+                        [rec_equal(ix, iy)
+                         for (_, ix), (_, iy) in zip(x_iterable, y_iterable)],
                         true)
 
         result = rec_equal(a, b)
@@ -225,6 +307,8 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
     # {{{ mathematical functions
 
     def sum(self, a, axis=None, dtype=None):
+        queue = self._array_context.queue
+
         if isinstance(axis, int):
             axis = axis,
 
@@ -232,9 +316,12 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
             if axis not in [None, tuple(range(ary.ndim))]:
                 raise NotImplementedError(f"Sum over '{axis}' axes not supported.")
 
-            return cl_array.sum(ary, dtype=dtype, queue=self._array_context.queue)
+            return cl_array.sum(ary, dtype=dtype, queue=queue)
 
-        result = rec_map_reduce_array_container(sum, _rec_sum, a)
+        result = self._rec_map_reduce_on_device(
+                partial(cl_array.sum, queue=queue),
+                _rec_sum,
+                a, initial=0)
 
         if not self._array_context._force_device_scalars:
             result = result.get()[()]
@@ -256,8 +343,8 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
                 raise NotImplementedError(f"Max. over '{axis}' axes not supported.")
             return cl_array.max(ary, queue=queue)
 
-        result = rec_map_reduce_array_container(
-                partial(reduce, partial(cl_array.maximum, queue=queue)),
+        result = self._rec_map_reduce_on_device(
+                partial(cl_array.max, queue=queue),
                 _rec_max,
                 a)
 
@@ -283,8 +370,8 @@ class PyOpenCLFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
                 raise NotImplementedError(f"Min. over '{axis}' axes not supported.")
             return cl_array.min(ary, queue=queue)
 
-        result = rec_map_reduce_array_container(
-                partial(reduce, partial(cl_array.minimum, queue=queue)),
+        result = self._rec_map_reduce_on_device(
+                partial(cl_array.min, queue=queue),
                 _rec_min,
                 a)
 
@@ -250,6 +250,37 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
         cl_array = self.freeze(array)
         return cl_array.get(queue=self.queue)
 
+    def _bulk_from_numpy(self, arrays):
+        import pytato as pt
+        import pyopencl.array as cla
+        from arraycontext.impl.pyopencl import _bulk_put
+
+        # NOTE: the views into the staging buffer are copied (device-to-device,
+        # without launching any kernels) so that the data wrappers do not
+        # have any offsets
+        return [
+            pt.make_data_wrapper(ary.copy(queue=self.queue))
+            if isinstance(ary, cla.Array) else self.from_numpy(ary)
+            for ary in _bulk_put(self.queue, arrays)]
+
+    def _bulk_to_numpy(self, arrays):
+        from pytools.obj_array import make_obj_array
+        from arraycontext.impl.pyopencl import _bulk_get
+
+        # NOTE: freeze all the arrays at once, so that they are evaluated
+        # by a single program
+        indices = [i for i, ary in enumerate(arrays) if not np.isscalar(ary)]
+        if not indices:
+            return list(arrays)
+
+        frozen = self.freeze(make_obj_array([arrays[i] for i in indices]))
+
+        result = list(arrays)
+        for i, ary in zip(indices, frozen):
+            result[i] = ary
+
+        return _bulk_get(self.queue, result)
+
     @property
     def frozen_array_types(self) -> Tuple[Type, ...]:
         import pyopencl.array as cla
@@ -488,10 +519,20 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
 
             return ary
 
-        return pt.einsum(spec, *[
-            preprocess_arg(name, arg)
-            for name, arg in zip(arg_names, args)
-            ]).tagged(_preprocess_array_tags(tagged))
+        args = [preprocess_arg(name, arg) for name, arg in zip(arg_names, args)]
+
+        from arraycontext.einsum import _contract_einsum_path
+        path = self._get_einsum_contraction_path(
+                spec, tuple(arg.shape for arg in args))
+
+        if path is not None:
+            # NOTE: the user's tags only apply to the result
+            result = _contract_einsum_path(path, args,
+                    lambda k, step_spec, a, b: pt.einsum(step_spec, a, b))
+        else:
+            result = pt.einsum(spec, *args)
+
+        return result.tagged(_preprocess_array_tags(tagged))
 
 # }}}
 
@@ -536,6 +577,31 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
         import jax
         return jax.device_get(self.freeze(array))
 
+    def _bulk_from_numpy(self, arrays):
+        import jax
+        import pytato as pt
+
+        # NOTE: jax.device_put starts all the transfers before waiting for them
+        return [pt.make_data_wrapper(ary) for ary in jax.device_put(list(arrays))]
+
+    def _bulk_to_numpy(self, arrays):
+        import jax
+        from pytools.obj_array import make_obj_array
+
+        # NOTE: freeze all the arrays at once, so that they are evaluated
+        # by a single program, and let jax.device_get batch the transfers
+        indices = [i for i, ary in enumerate(arrays) if not np.isscalar(ary)]
+        if not indices:
+            return list(arrays)
+
+        frozen = self.freeze(make_obj_array([arrays[i] for i in indices]))
+
+        result = list(arrays)
+        for i, ary in zip(indices, frozen):
+            result[i] = ary
+
+        return jax.device_get(result)
+
     @property
     def frozen_array_types(self) -> Tuple[Type, ...]:
         from jax.numpy import DeviceArray
@@ -672,10 +738,20 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
 
             return ary
 
-        return pt.einsum(spec, *[
-            preprocess_arg(name, arg)
-            for name, arg in zip(arg_names, args)
-            ]).tagged(_preprocess_array_tags(tagged))
+        args = [preprocess_arg(name, arg) for name, arg in zip(arg_names, args)]
+
+        from arraycontext.einsum import _contract_einsum_path
+        path = self._get_einsum_contraction_path(
+                spec, tuple(arg.shape for arg in args))
+
+        if path is not None:
+            # NOTE: the user's tags only apply to the result
+            result = _contract_einsum_path(path, args,
+                    lambda k, step_spec, a, b: pt.einsum(step_spec, a, b))
+        else:
+            result = pt.einsum(spec, *args)
+
+        return result.tagged(_preprocess_array_tags(tagged))
 
 # }}}
 
@@ -30,11 +30,13 @@ THE SOFTWARE.
 """
 
 from arraycontext.context import ArrayT
-from arraycontext.container import ArrayContainer, is_array_container_type
+from arraycontext.container import (
+        ArrayContainer, is_array_container_type, classify_types)
 from arraycontext.impl.pytato import (_BasePytatoArrayContext,
                                       PytatoJAXArrayContext,
                                       PytatoPyOpenCLArrayContext)
-from arraycontext.container.traversal import rec_keyed_map_array_container
+from arraycontext.container.traversal import (rec_keyed_map_array_container,
+                                              _get_leaves_and_leaf_keys)
 
 import abc
 import numpy as np
@@ -144,21 +146,21 @@ def _get_arg_id_to_arg_and_arg_id_to_descr(args: Tuple[Any, ...],
     arg_id_to_arg: Dict[Tuple[Any, ...], Any] = {}
     arg_id_to_descr: Dict[Tuple[Any, ...], AbstractInputDescriptor] = {}
 
-    for kw, arg in itertools.chain(enumerate(args),
-                                   kwargs.items()):
+    kw_and_args = list(itertools.chain(enumerate(args), kwargs.items()))
+    is_container = classify_types([arg.__class__ for _, arg in kw_and_args])
+
+    for (kw, arg), is_arg_container in zip(kw_and_args, is_container):
         if np.isscalar(arg):
             arg_id = (kw,)
             arg_id_to_arg[arg_id] = arg
             arg_id_to_descr[arg_id] = ScalarInputDescriptor(np.dtype(type(arg)))
-        elif is_array_container_type(arg.__class__):
-            def id_collector(keys, ary):
-                arg_id = (kw,) + keys
-                arg_id_to_arg[arg_id] = ary
-                arg_id_to_descr[arg_id] = LeafArrayDescriptor(np.dtype(ary.dtype),
-                                                              ary.shape)
-                return ary
-
-            rec_keyed_map_array_container(id_collector, arg)
+        elif is_arg_container:
+            leaves, leaf_keys = _get_leaves_and_leaf_keys(arg)
+            for keys, ary in zip(leaf_keys, leaves):
+                leaf_arg_id = (kw,) + keys
+                arg_id_to_arg[leaf_arg_id] = ary
+                arg_id_to_descr[leaf_arg_id] = LeafArrayDescriptor(
+                        np.dtype(ary.dtype), ary.shape)
         elif isinstance(arg, pt.Array):
             arg_id = (kw,)
             arg_id_to_arg[arg_id] = arg
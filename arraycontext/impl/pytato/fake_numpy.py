@@ -31,7 +31,7 @@ from arraycontext.fake_numpy import (
 from arraycontext.loopy import (
         LoopyBasedFakeNumpyNamespace
         )
-from arraycontext.container import NotAnArrayContainerError, serialize_container
+from arraycontext.container import try_serialize_container
 from arraycontext.container.traversal import (
         rec_map_array_container,
         rec_multimap_array_container,
@@ -155,9 +155,9 @@ class PytatoFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
             if type(x) != type(y):
                 return false
 
-            try:
-                iterable = zip(serialize_container(x), serialize_container(y))
-            except NotAnArrayContainerError:
+            x_iterable = try_serialize_container(x)
+            y_iterable = try_serialize_container(y)
+            if x_iterable is None or y_iterable is None:
                 if x.shape != y.shape:
                     return false
                 else:
@@ -165,7 +165,8 @@ class PytatoFakeNumpyNamespace(LoopyBasedFakeNumpyNamespace):
             else:
                 return reduce(
                         pt.logical_and,
-                        [rec_equal(ix, iy) for (_, ix), (_, iy) in iterable],
+                        [rec_equal(ix, iy)
+                         for (_, ix), (_, iy) in zip(x_iterable, y_iterable)],
                         true)
 
         return rec_equal(a, b)
@@ -105,6 +105,113 @@ def _get_scalar_func_loopy_program(actx, c_name, nargs, naxes):
     return get(c_name, nargs, naxes)
 
 
+def _get_c_function_substitutions():
+    from pymbolic import var
+    return {
+            numpy_name: var(c_name)
+            for numpy_name, c_name in (
+                LoopyBasedFakeNumpyNamespace._numpy_to_c_arc_functions.items())}
+
+
+def _get_fused_elementwise_loopy_program(actx, expr, array_names, naxes):
+    """
+    :arg expr: a :mod:`pymbolic` expression, in which the variables in
+        *array_names* refer to arrays with *naxes* axes and all the other
+        variables are scalars or (:mod:`numpy`) names of math functions.
+    """
+    return _get_batched_fused_elementwise_loopy_program(
+            actx, expr, array_names, naxes, 1)
+
+
+def _get_batched_fused_elementwise_loopy_program(
+        actx, expr, array_names, naxes, nbatch):
+    """Like :func:`_get_fused_elementwise_loopy_program`, but evaluates *expr*
+    for *nbatch* sets of arrays of the same shape in one kernel. The arrays
+    for the *k*-th set are named ``{name}_{k}`` and the result ``out_{k}``,
+    unless *nbatch* is 1, in which case the names are kept as they are and
+    the result is named ``out``.
+    """
+    @memoize_in(actx, _get_batched_fused_elementwise_loopy_program)
+    def get(expr, array_names, naxes, nbatch):
+        from pymbolic import var, substitute
+
+        var_names = ["i%d" % i for i in range(naxes)]
+        size_names = ["n%d" % i for i in range(naxes)]
+        subscript = tuple(var(vname) for vname in var_names)
+        from islpy import make_zero_and_vars
+        v = make_zero_and_vars(var_names, params=size_names)
+        domain = v[0].domain()
+        for vname, sname in zip(var_names, size_names):
+            domain = domain & v[0].le_set(v[vname]) & v[vname].lt_set(v[sname])
+
+        domain_bset, = domain.get_basic_sets()
+
+        def batched_name(name, k):
+            return name if nbatch == 1 else f"{name}_{k}"
+
+        import loopy as lp
+        from arraycontext.transform_metadata import ElementwiseMapKernelTag
+        return make_loopy_program(
+                [domain_bset],
+                [
+                    lp.Assignment(
+                        var(batched_name("out", k))[subscript],
+                        substitute(expr, {
+                            **_get_c_function_substitutions(),
+                            **{name: var(batched_name(name, k))[subscript]
+                               for name in array_names}
+                            }))
+                    for k in range(nbatch)
+                    ],
+                name=("actx_fused_elementwise" if nbatch == 1
+                      else "actx_fused_elementwise_batched"),
+                tags=(ElementwiseMapKernelTag(),))
+
+    return get(expr, array_names, naxes, nbatch)
+
+
+def _get_batched_einsum_loopy_program(actx, spec, arg_names, nbatch, tagged):
+    """Like :func:`loopy.make_einsum` for a *spec* with two operands, but
+    evaluates the einsum for *nbatch* second operands in one kernel. The
+    first operand is shared, the second operands are named
+    ``{arg_names[1]}_{k}`` and the results ``out_{k}``.
+    """
+    @memoize_in(actx, _get_batched_einsum_loopy_program)
+    def get(spec, arg_names, nbatch, tagged):
+        from pymbolic import var
+
+        arg_spec, out_spec = spec.replace(" ", "").split("->")
+        op_spec, ary_spec = arg_spec.split(",")
+        op_name, ary_name = arg_names
+
+        all_indices = sorted(set(op_spec) | set(ary_spec) | set(out_spec))
+        sum_indices = tuple(var(idx) for idx in all_indices if idx not in out_spec)
+
+        def subscript(indices):
+            return tuple(var(idx) for idx in indices)
+
+        statements = []
+        for k in range(nbatch):
+            rhs = (var(op_name)[subscript(op_spec)]
+                   * var(f"{ary_name}_{k}")[subscript(ary_spec)])
+            if sum_indices:
+                rhs = lp.Reduction("sum", sum_indices, rhs)
+
+            statements.append(
+                    lp.Assignment(var(f"out_{k}")[subscript(out_spec)], rhs))
+
+        domain = "{[%s]: %s}" % (
+                ",".join(all_indices),
+                " and ".join(f"0 <= {idx} < N{idx}" for idx in all_indices))
+
+        return make_loopy_program(
+                [domain], statements,
+                name="actx_einsum_batched",
+                tags=tagged)
+
+    return get(spec, arg_names, nbatch, tagged)
+
+
 class LoopyBasedFakeNumpyNamespace(BaseFakeNumpyNamespace):
     _numpy_to_c_arc_functions = {
             "arcsin": "asin",
@@ -0,0 +1,102 @@
+"""Micro-benchmarks for the per-call overhead of array container traversal.
+
+The leaves are small :mod:`numpy` arrays, so that the timings are dominated
+by the cost of walking the container structure.
+"""
+
+from dataclasses import dataclass
+from timeit import repeat
+
+import numpy as np
+
+from pytools.obj_array import make_obj_array
+
+from arraycontext import (
+        dataclass_array_container,
+        serialize_container, deserialize_container,
+        rec_map_array_container, rec_multimap_array_container)
+from arraycontext.container.traversal import _TRAVERSAL_PLAN_CACHE
+
+
+@dataclass_array_container
+@dataclass(frozen=True)
+class State:
+    mass: np.ndarray
+    momentum: np.ndarray
+    energy: np.ndarray
+
+
+def make_state(nleaves: int, ambient_dim: int = 3, nelements: int = 4) -> np.ndarray:
+    leaves_per_state = ambient_dim + 2
+    nstates = nleaves // leaves_per_state
+
+    def leaf() -> np.ndarray:
+        return np.zeros(nelements)
+
+    return make_obj_array([
+        State(mass=leaf(),
+            momentum=make_obj_array([leaf() for _ in range(ambient_dim)]),
+            energy=leaf())
+        for _ in range(nstates)])
+
+
+def time_per_call(stmt, number: int = 20) -> float:
+    return min(repeat(stmt, number=number, repeat=5)) / number
+
+
+def main(nleaves: int = 1000) -> None:
+    ary = make_state(nleaves)
+
+    def f(x):
+        return x
+
+    def g(x, y):
+        return x
+
+    def rec_map():
+        rec_map_array_container(f, ary)
+
+    def rec_multimap():
+        rec_multimap_array_container(g, ary, ary)
+
+    def cold(func):
+        def wrapper():
+            _TRAVERSAL_PLAN_CACHE.clear()
+            func()
+
+        return wrapper
+
+    for name, func in [
+            ("rec_map_array_container", rec_map),
+            ("rec_multimap_array_container", rec_multimap)]:
+        t_cold = time_per_call(cold(func))
+        t_warm = time_per_call(func)
+
+        print(f"{name} ({nleaves} leaves): "
+                f"cold {t_cold * 1.0e6:.1f}us / call, "
+                f"cached {t_warm * 1.0e6:.1f}us / call "
+                f"(speedup {t_cold / t_warm:.2f}x)")
+
+    # {{{ object array serialization
+
+    nentries = 10 * nleaves
+    for shape in [(nentries,), (nentries // 100, 100), (nentries // 100, 10, 10)]:
+        obj_ary = np.empty(nentries, dtype=object)
+        for i in range(nentries):
+            obj_ary[i] = np.zeros(1)
+        obj_ary = obj_ary.reshape(shape)
+        iterable = serialize_container(obj_ary)
+
+        t_serialize = time_per_call(lambda: serialize_container(obj_ary))
+        t_deserialize = time_per_call(
+                lambda: deserialize_container(obj_ary, iterable))
+
+        print(f"object array {shape}: "
+                f"serialize {t_serialize * 1.0e6:.1f}us / call, "
+                f"deserialize {t_deserialize * 1.0e6:.1f}us / call")
+
+    # }}}
+
+
+if __name__ == "__main__":
+    main()
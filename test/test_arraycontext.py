@@ -560,6 +560,35 @@ def test_reductions_same_as_numpy(actx_factory, op):
     assert np.allclose(np_red, actx_red)
 
 
+def test_reductions_on_containers(actx_factory):
+    actx = actx_factory()
+
+    rng = np.random.default_rng()
+    leaves = (
+            [rng.standard_normal(rng.integers(1, 100)) for _ in range(40)]
+            + [rng.standard_normal(17).astype(np.float32)])
+    from arraycontext import from_numpy
+    actx_ary = from_numpy(make_obj_array(leaves), actx)
+
+    flat_ary = np.concatenate(leaves)
+
+    def to_host(result):
+        return actx.to_numpy(result) if not np.isscalar(result) else result
+
+    assert np.allclose(to_host(actx.np.sum(actx_ary)), np.sum(flat_ary))
+    assert np.allclose(to_host(actx.np.amax(actx_ary)), np.amax(flat_ary))
+    assert np.allclose(to_host(actx.np.amin(actx_ary)), np.amin(flat_ary))
+    assert np.allclose(
+            to_host(actx.np.vdot(actx_ary, actx_ary)),
+            np.vdot(flat_ary, flat_ary))
+
+    if hasattr(actx.np, "all"):
+        assert to_host(actx.np.all(actx.np.greater(actx_ary, -10)))
+        assert not to_host(actx.np.all(actx.np.greater(actx_ary, 0)))
+        assert to_host(actx.np.any(actx.np.greater(actx_ary, 0)))
+        assert not to_host(actx.np.any(actx.np.greater(actx_ary, 10)))
+
+
 @pytest.mark.parametrize("sym_name", ["any", "all"])
 def test_any_all_same_as_numpy(actx_factory, sym_name):
     actx = actx_factory()
@@ -666,6 +695,111 @@ def test_array_context_einsum_array_tripleprod(actx_factory, spec):
                     actx.to_numpy(vec))
     assert np.allclose(res, ans)
 
+
+@pytest.mark.parametrize("strategy", ["greedy", "optimal"])
+def test_array_context_einsum_contraction_path(actx_factory, strategy):
+    from arraycontext.einsum import _get_einsum_contraction_path
+
+    actx = actx_factory()
+
+    spec = "ij,jk,kl,l->i"
+    arys = [np.random.randn(*shape)
+            for shape in [(30, 4), (4, 30), (30, 4), (4,)]]
+
+    path = _get_einsum_contraction_path(
+            spec, tuple(ary.shape for ary in arys), strategy)
+    assert path is not None
+    assert len(path) == len(arys) - 1
+    assert path[-1].spec.endswith("->i")
+
+    # NOTE: no need for a path for two operands
+    assert _get_einsum_contraction_path("ij,jk->ik", ((4, 5), (5, 6))) is None
+
+    ans = np.einsum(spec, *arys)
+    dev_arys = [actx.from_numpy(ary) for ary in arys]
+
+    res = actx.einsum(spec, *dev_arys)
+    assert np.allclose(actx.to_numpy(res), ans)
+
+    res = actx.einsum(spec, *dev_arys, tagged=(FirstAxisIsElementsTag(),))
+    assert FirstAxisIsElementsTag() in res.tags
+    assert np.allclose(actx.to_numpy(res), ans)
+
+
+@pytest.mark.parametrize(("spec", "shapes"), [
+    ("ei,ij,jk,ek->ei", [(50, 4), (4, 4), (4, 4), (50, 4)]),
+    ("ij,jk,kl,l->i", [(30, 4), (4, 30), (30, 4), (4,)]),
+    ])
+def test_pyopencl_actx_einsum_tagged(actx_factory, spec, shapes):
+    actx = actx_factory()
+    if not isinstance(actx, PyOpenCLArrayContext):
+        pytest.skip(f"not applicable to '{type(actx).__name__}'")
+
+    # NOTE: uses the default transform_loopy_program, which needs the tags
+    actx = PyOpenCLArrayContext(actx.queue, force_device_scalars=True)
+
+    arys = [np.random.randn(*shape) for shape in shapes]
+    res = actx.einsum(spec, *[actx.from_numpy(ary) for ary in arys],
+            tagged=(FirstAxisIsElementsTag(),))
+
+    ans = np.einsum(spec, *arys)
+    assert np.allclose(actx.to_numpy(res), ans)
+
+
+def test_array_context_einsum_batched(actx_factory):
+    from arraycontext import rec_multimap_array_container
+
+    actx = actx_factory()
+
+    ndofs = 6
+    op = np.random.randn(ndofs, ndofs)
+
+    # NOTE: the enthalpy has a different shape, so it goes into another batch
+    ary = MyContainer(
+            name="container",
+            mass=actx.from_numpy(np.random.randn(20, ndofs)),
+            momentum=make_obj_array([
+                actx.from_numpy(np.random.randn(20, ndofs)) for _ in range(3)
+                ]),
+            enthalpy=actx.from_numpy(np.random.randn(12, ndofs)))
+
+    result = actx.einsum_batched("ij,ej->ei", actx.from_numpy(op), ary,
+            arg_names=("diff_mat", "u"),
+            tagged=(FirstAxisIsElementsTag(),))
+    assert result.name == "container"
+
+    def check(res, leaf):
+        assert FirstAxisIsElementsTag() in res.tags
+        ans = np.einsum("ij,ej->ei", op, actx.to_numpy(leaf))
+        assert np.allclose(actx.to_numpy(res), ans)
+
+    rec_multimap_array_container(check, result, ary)
+
+
+def test_pyopencl_actx_transform_scalar_output(actx_factory):
+    actx = actx_factory()
+    if not isinstance(actx, PyOpenCLArrayContext):
+        pytest.skip(f"not applicable to '{type(actx).__name__}'")
+
+    # NOTE: uses the default transform_loopy_program
+    actx = PyOpenCLArrayContext(actx.queue, force_device_scalars=True)
+
+    import loopy as lp
+    from arraycontext import make_loopy_program
+
+    x = actx.from_numpy(np.array([1.0, 2.0]))
+    for tags in [(), (FirstAxisIsElementsTag(),)]:
+        prg = make_loopy_program("{ : }", "out = x[0] + x[1]", [
+                lp.GlobalArg("x", np.float64, shape=(2,)),
+                lp.GlobalArg("out", np.float64, shape=())
+                ], name="actx_scalar_sum", tags=tags)
+
+        result = actx.call_loopy(prg, x=x)["out"]
+        assert actx.to_numpy(result) == 3.0
+
+    with pytest.raises(RuntimeError):
+        actx.einsum("i,i->", x, x)
+
 # }}}
 
 
@@ -884,6 +1018,402 @@ def test_container_multimap(actx_factory):
     with pytest.raises(AssertionError):
         rec_multimap_array_container(func_multiple_scalar, 2, ary_dof, 2, dc_of_dofs)
 
+    # object arrays with the same size, but different shapes
+    from arraycontext import multimap_array_container
+    mat_23 = np.empty((2, 3), dtype=object)
+    mat_32 = np.empty((3, 2), dtype=object)
+    for i in range(6):
+        mat_23.flat[i] = mat_32.flat[i] = ary_dof
+
+    for multimap in [multimap_array_container, rec_multimap_array_container]:
+        with pytest.raises(AssertionError):
+            multimap(func_all_scalar, mat_23, mat_32)
+
+    # }}}
+
+
+def test_container_traversal_plan(actx_factory):
+    actx = actx_factory()
+    ary_dof, ary_of_dofs, mat_of_dofs, dc_of_dofs, _ = \
+            _get_test_containers(actx, shapes=(5,))
+
+    from arraycontext import (
+            rec_map_array_container, rec_multimap_array_container,
+            flatten)
+    from arraycontext.container.traversal import _TRAVERSAL_PLAN_CACHE
+
+    def _check_equal(x, y):
+        x = actx.to_numpy(flatten(x, actx))
+        y = actx.to_numpy(flatten(y, actx))
+        assert np.array_equal(x, y)
+
+    # {{{ replaying a cached plan
+
+    for ary in [ary_dof, ary_of_dofs, mat_of_dofs, dc_of_dofs]:
+        result = rec_map_array_container(lambda x: 2 * x, ary)
+        plan = _TRAVERSAL_PLAN_CACHE[type(ary), None]
+
+        for _ in range(2):
+            result = rec_map_array_container(lambda x: 2 * x, ary)
+            assert _TRAVERSAL_PLAN_CACHE[type(ary), None] is plan
+            _check_equal(result, 2 * ary)
+
+            result = rec_multimap_array_container(
+                    lambda a, x, y: a * x + y, 2, ary, ary)
+            _check_equal(result, 3 * ary)
+
+    # }}}
+
+    # {{{ changing the structure of a container with the same type
+
+    for ambient_dim in [2, 3, 2]:
+        ary_dof, ary_of_dofs, mat_of_dofs, dc_of_dofs, _ = _get_test_containers(
+                actx, ambient_dim=ambient_dim, shapes=(5,))
+
+        for ary in [ary_of_dofs, mat_of_dofs, dc_of_dofs]:
+            result = rec_map_array_container(lambda x: x + 1, ary)
+            _check_equal(result, ary + 1)
+
+    ary = make_obj_array([ary_dof, make_obj_array([ary_dof, ary_dof])])
+    result = rec_map_array_container(lambda x: x + 1, ary)
+    assert result[1].shape == (2,)
+    _check_equal(result, make_obj_array([ary_dof + 1, ary_of_dofs + 1]))
+
+    ary = make_obj_array([ary_dof, actx.to_numpy(ary_dof[0])])
+    result = rec_map_array_container(type, ary)
+    assert result[1] is np.ndarray
+
+    with pytest.raises(AssertionError):
+        rec_multimap_array_container(
+                lambda x, y: x + y,
+                make_obj_array([ary_dof, ary_dof]),
+                make_obj_array([ary_dof, ary_of_dofs]))
+
+    # }}}
+
+
+def test_container_structure(actx_factory):
+    actx = actx_factory()
+
+    from arraycontext import get_container_structure, rebuild, flatten, iter_leaves
+    from arraycontext.container.traversal import rec_keyed_map_array_container
+
+    def _get_dataclass_of_dofs(shapes, name="container"):
+        _, _, _, dc_of_dofs, _ = _get_test_containers(actx, shapes=shapes)
+        return dc_of_dofs.__class__(
+                name=name,
+                mass=dc_of_dofs.mass,
+                momentum=dc_of_dofs.momentum,
+                enthalpy=dc_of_dofs.enthalpy)
+
+    shapes = [(5,), (7, 3)]
+    ary = _get_dataclass_of_dofs(shapes)
+    structure = get_container_structure(ary)
+
+    # {{{ equality
+
+    other_structure = get_container_structure(_get_dataclass_of_dofs(shapes))
+    assert structure == other_structure
+    assert hash(structure) == hash(other_structure)
+
+    assert structure != get_container_structure(
+            _get_dataclass_of_dofs([(5,), (7, 4)]))
+    assert structure != get_container_structure(
+            _get_dataclass_of_dofs(shapes, name="other"))
+    assert structure != get_container_structure(ary.momentum)
+
+    # }}}
+
+    # {{{ leaves
+
+    leaf_keys = []
+
+    def _collect_keys(keys, subary):
+        leaf_keys.append(keys)
+        return subary
+
+    rec_keyed_map_array_container(_collect_keys, ary)
+    assert structure.leaf_keys == tuple(leaf_keys)
+    assert structure.nleaves == 2 * 4
+    assert structure.leaf_shapes == 4 * tuple(shapes)
+
+    assert get_container_structure(ary, leaf_class=DOFArray).nleaves == 4
+
+    # }}}
+
+    # {{{ rebuild
+
+    leaves = []
+
+    def _collect_leaves(subary):
+        leaves.append(subary)
+        return subary
+
+    from arraycontext import rec_map_array_container
+    rec_map_array_container(_collect_leaves, ary)
+
+    result = rebuild(structure, [2 * leaf for leaf in leaves])
+    assert type(result) is type(ary)
+    assert result.name == ary.name
+    assert np.array_equal(
+            actx.to_numpy(flatten(result, actx)),
+            actx.to_numpy(flatten(2 * ary, actx)))
+
+    with pytest.raises(ValueError):
+        rebuild(structure, leaves[1:])
+
+    # }}}
+
+    # {{{ metadata and references
+
+    import gc
+    import weakref
+
+    @dataclass_array_container
+    @dataclass(frozen=True)
+    class ContainerWithMetadata:
+        u: np.ndarray
+        weights: object
+        name: str
+
+    leaf = np.ones(3)
+    leaf_ref = weakref.ref(leaf)
+    ary = ContainerWithMetadata(leaf, np.arange(3), "metadata")
+    structure = get_container_structure(ary)
+
+    # NOTE: numpy arrays in the metadata are compared by value
+    other_structure = get_container_structure(
+            ContainerWithMetadata(np.zeros(3), np.arange(3), "metadata"))
+    assert structure == other_structure
+    assert hash(structure) == hash(other_structure)
+    assert structure != get_container_structure(
+            ContainerWithMetadata(np.zeros(3), np.arange(4), "metadata"))
+
+    # NOTE: the structure does not keep the leaves alive
+    del ary, leaf
+    gc.collect()
+    assert leaf_ref() is None
+
+    result = rebuild(structure, [np.zeros(3)])
+    assert np.array_equal(result.weights, np.arange(3))
+
+    # NOTE: unhashable metadata is compared by identity
+    weights = [1, 2]
+    structure = get_container_structure(
+            ContainerWithMetadata(np.zeros(3), weights, "metadata"))
+    assert structure == get_container_structure(
+            ContainerWithMetadata(np.ones(3), weights, "metadata"))
+    assert structure != get_container_structure(
+            ContainerWithMetadata(np.ones(3), [1, 2], "metadata"))
+    assert hash(structure) is not None
+
+    # }}}
+
+    # {{{ constructors that need the children
+
+    @dataclass_array_container
+    @dataclass(frozen=True)
+    class CheckedPair:
+        u: np.ndarray
+        v: np.ndarray
+
+        def __post_init__(self):
+            assert self.u.shape == self.v.shape
+
+    from arraycontext import FlatLayout
+
+    ary = CheckedPair(actx.from_numpy(np.ones(3)), actx.from_numpy(np.zeros(3)))
+    structure = get_container_structure(ary)
+    result = rebuild(structure, [2 * leaf for leaf in iter_leaves(ary)])
+    assert np.array_equal(actx.to_numpy(result.u), 2 * np.ones(3))
+
+    layout = FlatLayout(ary, actx)
+    result = layout.unflatten(layout.flatten(ary))
+    assert np.array_equal(actx.to_numpy(result.v), np.zeros(3))
+
+    # }}}
+
+
+def test_container_iter_leaves(actx_factory):
+    actx = actx_factory()
+
+    from arraycontext import iter_leaves, iter_leaves_multi
+    from arraycontext.container.traversal import rec_keyed_map_array_container
+
+    ary_dof, ary_of_dofs, mat_of_dofs, dc_of_dofs, _ = \
+            _get_test_containers(actx, shapes=[(5,), (7, 3)])
+
+    for ary in [ary_dof, ary_of_dofs, mat_of_dofs, dc_of_dofs]:
+        keyed_leaves = []
+
+        def _collect(keys, subary):
+            keyed_leaves.append((keys, subary))
+            return subary
+
+        rec_keyed_map_array_container(_collect, ary)
+
+        result = list(iter_leaves(ary, with_keys=True))
+        assert [keys for keys, _ in result] == [keys for keys, _ in keyed_leaves]
+        assert all(
+                leaf is ref_leaf
+                for (_, leaf), (_, ref_leaf) in zip(result, keyed_leaves))
+
+        assert all(
+                leaf is ref_leaf
+                for leaf, (_, ref_leaf) in zip(iter_leaves(ary), keyed_leaves))
+
+    # {{{ leaf_class and leaves
+
+    assert len(list(iter_leaves(dc_of_dofs, leaf_class=DOFArray))) == 4
+    assert list(iter_leaves(ary_dof[0], with_keys=True)) == [((), ary_dof[0])]
+
+    # }}}
+
+    # {{{ multiple containers
+
+    leaves = list(iter_leaves_multi(dc_of_dofs, 2 * dc_of_dofs))
+    assert len(leaves) == 2 * 4
+    for leaf, twice_leaf in leaves:
+        assert np.allclose(actx.to_numpy(2 * leaf), actx.to_numpy(twice_leaf))
+
+    keys = [keys for keys, _ in iter_leaves_multi(
+        ary_of_dofs, ary_of_dofs, with_keys=True)]
+    assert keys == [keys for keys, _ in iter_leaves(ary_of_dofs, with_keys=True)]
+
+    with pytest.raises(ValueError):
+        list(iter_leaves_multi(ary_of_dofs, mat_of_dofs))
+
+    with pytest.raises(ValueError):
+        list(iter_leaves_multi(ary_of_dofs, ary_of_dofs[:1]))
+
+    # }}}
+
+
+def test_try_serialize_container(actx_factory):
+    actx = actx_factory()
+
+    from arraycontext import (
+            serialize_container, deserialize_container, try_serialize_container)
+
+    ary_dof, ary_of_dofs, _, dc_of_dofs, _ = _get_test_containers(actx)
+
+    # {{{ leaves
+
+    assert try_serialize_container(ary_dof[0]) is None
+    assert try_serialize_container(np.zeros(5)) is None
+    assert try_serialize_container(42) is None
+
+    # }}}
+
+    # {{{ containers
+
+    for ary in [ary_dof, ary_of_dofs, dc_of_dofs]:
+        assert (
+                [key for key, _ in try_serialize_container(ary)]
+                == [key for key, _ in serialize_container(ary)])
+
+    # }}}
+
+    # {{{ registering new types invalidates the cache
+
+    class Wrapper:
+        def __init__(self, value):
+            self.value = value
+
+    assert try_serialize_container(Wrapper(ary_dof)) is None
+
+    @serialize_container.register(Wrapper)
+    def _serialize_wrapper(ary: Wrapper):
+        return [("value", ary.value)]
+
+    @deserialize_container.register(Wrapper)
+    def _deserialize_wrapper(template: Wrapper, iterable):
+        return Wrapper(**dict(iterable))
+
+    wrapper = Wrapper(ary_dof)
+    assert try_serialize_container(wrapper) == [("value", ary_dof)]
+
+    from arraycontext import rec_map_array_container
+    result = rec_map_array_container(lambda x: 2 * x, wrapper)
+    assert isinstance(result, Wrapper)
+
+    # }}}
+
+
+def test_container_context_slots(actx_factory):
+    actx = actx_factory()
+
+    from arraycontext import get_container_context_recursively_opt
+    from arraycontext.container import _CONTEXT_SLOTS
+
+    @dataclass_array_container
+    @dataclass(frozen=True)
+    class Pair:
+        x: DOFArray
+        y: DOFArray
+
+    def make_dof_array(actx):
+        return DOFArray(actx, (actx.from_numpy(np.zeros(5)),))
+
+    pair = Pair(make_dof_array(actx), make_dof_array(actx))
+    assert _CONTEXT_SLOTS.get(pair) is None
+    assert get_container_context_recursively_opt(pair) is actx
+    assert _CONTEXT_SLOTS.get(pair) is actx
+    assert get_container_context_recursively_opt(pair, validate=True) is actx
+
+    # {{{ object arrays are not cached
+
+    ary = make_obj_array([make_dof_array(actx), make_dof_array(actx)])
+    assert get_container_context_recursively_opt(ary) is actx
+    assert _CONTEXT_SLOTS.get(ary) is None
+
+    # }}}
+
+    # {{{ only immutable types are cached
+
+    class MutablePair:
+        def __init__(self, x, y):
+            self.x = x
+            self.y = y
+
+    class ImmutablePair(MutablePair):
+        _array_container_is_immutable = True
+
+    for cls in (MutablePair, ImmutablePair):
+        @serialize_container.register(cls)
+        def _serialize_pair(ary):
+            return [("x", ary.x), ("y", ary.y)]
+
+    mutable_pair = MutablePair(make_dof_array(actx), make_dof_array(actx))
+    assert get_container_context_recursively_opt(mutable_pair) is actx
+    assert _CONTEXT_SLOTS.get(mutable_pair) is None
+
+    immutable_pair = ImmutablePair(make_dof_array(actx), make_dof_array(actx))
+    assert get_container_context_recursively_opt(immutable_pair) is actx
+    assert _CONTEXT_SLOTS.get(immutable_pair) is actx
+
+    # }}}
+
+    # {{{ cache hits are only checked when validating
+
+    pair = Pair(make_dof_array(actx), make_dof_array(actx))
+    stale_actx = actx_factory()
+    _CONTEXT_SLOTS.set(pair, stale_actx)
+    assert get_container_context_recursively_opt(pair) is stale_actx
+
+    with pytest.raises(ValueError):
+        get_container_context_recursively_opt(pair, validate=True)
+
+    # }}}
+
+    # {{{ validation
+
+    other_actx = actx_factory()
+    mixed_pair = Pair(make_dof_array(actx), make_dof_array(other_actx))
+
+    with pytest.raises(ValueError):
+        get_container_context_recursively_opt(mixed_pair, validate=True)
+
     # }}}
 
 
@@ -942,6 +1472,330 @@ def test_container_arithmetic(actx_factory):
     # }}}
 
 
+def test_container_arithmetic_deferred(actx_factory):
+    actx = actx_factory()
+
+    from arraycontext.container.arithmetic import _DEFERRED_RESULTS
+
+    @with_container_arithmetic(
+            bcast_obj_array=True, rel_comparison=True,
+            _cls_has_array_context_attr=True,
+            deferred=True)
+    @dataclass_array_container
+    @dataclass(frozen=True)
+    class State:
+        u: DOFArray
+        v: DOFArray
+
+        @property
+        def array_context(self):
+            return self.u.array_context
+
+    rng = np.random.default_rng(seed=42)
+
+    def make_state():
+        return State(*[
+            DOFArray(actx, (
+                actx.from_numpy(rng.random(10)),
+                actx.from_numpy(rng.random((5, 3)))))
+            for _ in range(2)])
+
+    def to_numpy(state):
+        return [actx.to_numpy(ary) for ary in (*state.u, *state.v)]
+
+    a, b, c = make_state(), make_state(), make_state()
+    a_np, b_np, c_np = to_numpy(a), to_numpy(b), to_numpy(c)
+
+    # {{{ expressions are evaluated on first use
+
+    result = 2 * a + b / 4 - (-c) ** 2 + a * b
+    assert type(result) is State
+    assert _DEFERRED_RESULTS.get(result) is not None
+
+    for ary, ref in zip(
+            to_numpy(result),
+            [2 * x + y / 4 - z ** 2 + x * y for x, y, z in zip(a_np, b_np, c_np)]):
+        np.testing.assert_allclose(ary, ref)
+
+    assert _DEFERRED_RESULTS.get(result) is None
+    assert result.array_context is actx
+
+    # }}}
+
+    # {{{ deferred results mixed with eager ones
+
+    from copy import copy
+    from dataclasses import replace
+    from arraycontext import rec_multimap_array_container
+
+    def check(result, ref):
+        for ary, ref_ary in zip(to_numpy(result), ref):
+            np.testing.assert_allclose(ary, ref_ary)
+
+    d_np = [x + 2 * y for x, y in zip(a_np, b_np)]
+
+    check(rec_multimap_array_container(lambda x, y: x - y, a + 2 * b, a),
+          [x - y for x, y in zip(d_np, a_np)])
+    check(rec_multimap_array_container(lambda x, y: x - y, a, a + 2 * b),
+          [x - y for x, y in zip(a_np, d_np)])
+    check(actx.np.maximum(a + 2 * b, a),
+          [np.maximum(x, y) for x, y in zip(d_np, a_np)])
+    check(actx.np.minimum(a, a + 2 * b),
+          [np.minimum(x, y) for x, y in zip(a_np, d_np)])
+
+    vdot = actx.to_numpy(actx.np.vdot(a + 2 * b, a))
+    np.testing.assert_allclose(
+            vdot, sum(np.vdot(x, y) for x, y in zip(d_np, a_np)))
+
+    check(replace(a + 2 * b, v=a.v), d_np[:2] + a_np[2:])
+    check(copy(a + 2 * b), d_np)
+
+    # }}}
+
+    # {{{ operations that are not deferred
+
+    for ary, ref in zip(
+            to_numpy(abs(a - b)),
+            [abs(x - y) for x, y in zip(a_np, b_np)]):
+        np.testing.assert_allclose(ary, ref)
+
+    obj_result = make_obj_array([1, 2]) * (a + b)
+    assert obj_result.shape == (2,)
+    for ary, ref in zip(
+            to_numpy(obj_result[1]),
+            [2 * (x + y) for x, y in zip(a_np, b_np)]):
+        np.testing.assert_allclose(ary, ref)
+
+    # }}}
+
+    # {{{ long expressions
+
+    result = a
+    for _ in range(40):
+        result = result + a
+
+    for ary, ref in zip(to_numpy(result), a_np):
+        np.testing.assert_allclose(ary, 41 * ref)
+
+    # }}}
+
+    # {{{ many leaves of the same shape (evaluated in batches)
+
+    def make_many_leaves_state():
+        return State(*[
+            DOFArray(actx, tuple(
+                actx.from_numpy(rng.random(7)) for _ in range(25)))
+            for _ in range(2)])
+
+    a, b = make_many_leaves_state(), make_many_leaves_state()
+    a_np, b_np = to_numpy(a), to_numpy(b)
+
+    for ary, x, y in zip(to_numpy(3 * a - b), a_np, b_np):
+        np.testing.assert_allclose(ary, 3 * x - y)
+
+    # }}}
+
+
+def test_container_arithmetic_obj_array_bcast(actx_factory):
+    actx = actx_factory()
+
+    rng = np.random.default_rng(seed=42)
+
+    def make_dof_array():
+        return DOFArray(actx, (
+            actx.from_numpy(rng.random(10)),
+            actx.from_numpy(rng.random((5, 3)))))
+
+    def to_numpy(ary):
+        return [actx.to_numpy(subary) for subary in ary.data]
+
+    a = make_dof_array()
+    b = make_dof_array()
+
+    # NOTE: mix numbers, containers of the same type and other object arrays,
+    # in Fortran order
+    obj_ary = np.empty((2, 3), dtype=object, order="F")
+    obj_ary[0, 0] = 2
+    obj_ary[0, 1] = b
+    obj_ary[0, 2] = 3.5
+    obj_ary[1, 0] = b
+    obj_ary[1, 1] = np.float64(0.5)
+    obj_ary[1, 2] = make_obj_array([1, b])
+
+    for result, reverse in [(a * obj_ary, False), (obj_ary * a, True)]:
+        assert result.shape == obj_ary.shape
+
+        for i in np.ndindex(obj_ary.shape):
+            ref = obj_ary[i] * a if reverse else a * obj_ary[i]
+            if isinstance(ref, np.ndarray):
+                for subresult, subref in zip(result[i], ref):
+                    for x, y in zip(to_numpy(subresult), to_numpy(subref)):
+                        np.testing.assert_allclose(x, y)
+            else:
+                for x, y in zip(to_numpy(result[i]), to_numpy(ref)):
+                    np.testing.assert_allclose(x, y)
+
+
+def test_container_numpy_protocols(actx_factory):
+    actx = actx_factory()
+
+    @with_container_arithmetic(
+            bcast_obj_array=True, rel_comparison=True,
+            _cls_has_array_context_attr=True,
+            numpy_protocols=True)
+    @dataclass_array_container
+    @dataclass(frozen=True)
+    class State:
+        u: DOFArray
+        v: DOFArray
+
+        @property
+        def array_context(self):
+            return self.u.array_context
+
+    rng = np.random.default_rng(seed=42)
+
+    def make_state():
+        return State(*[
+            DOFArray(actx, (
+                actx.from_numpy(rng.random(10)),
+                actx.from_numpy(rng.random((5, 3)))))
+            for _ in range(2)])
+
+    def to_numpy(state):
+        return [actx.to_numpy(ary) for ary in (*state.u, *state.v)]
+
+    def assert_allclose(result, ref):
+        assert isinstance(result, State)
+        for x, y in zip(to_numpy(result), ref):
+            np.testing.assert_allclose(x, y)
+
+    a, b = make_state(), make_state()
+    a_np, b_np = to_numpy(a), to_numpy(b)
+
+    # {{{ ufuncs
+
+    assert_allclose(np.sin(a), [np.sin(x) for x in a_np])
+    assert_allclose(np.arctan2(a, 2.0), [np.arctan2(x, 2.0) for x in a_np])
+    assert_allclose(np.maximum(a, b), [np.maximum(x, y) for x, y in zip(a_np, b_np)])
+    assert_allclose(np.abs(-a), a_np)
+    assert_allclose(np.multiply(2, a), [2 * x for x in a_np])
+    assert_allclose(np.float64(2) - a, [2 - x for x in a_np])
+
+    obj_result = make_obj_array([1, 2]) * a
+    assert obj_result.shape == (2,)
+    assert_allclose(obj_result[1], [2 * x for x in a_np])
+
+    # }}}
+
+    # {{{ array functions
+
+    assert np.isclose(
+            actx.to_numpy(np.sum(a)), sum(np.sum(x) for x in a_np))
+    assert np.isclose(
+            actx.to_numpy(np.linalg.norm(np.ravel(a), np.inf)),
+            max(np.max(np.abs(x)) for x in a_np))
+
+    # }}}
+
+
+def test_container_arithmetic_inplace(actx_factory):
+    actx = actx_factory()
+
+    @with_container_arithmetic(
+            bcast_obj_array=True, rel_comparison=True,
+            _cls_has_array_context_attr=True,
+            inplace=True)
+    @dataclass_array_container
+    @dataclass(frozen=True)
+    class State:
+        u: DOFArray
+        v: DOFArray
+
+        @property
+        def array_context(self):
+            return self.u.array_context
+
+    rng = np.random.default_rng(seed=42)
+
+    def make_state(dtype=np.float64):
+        return State(*[
+            DOFArray(actx, (
+                actx.from_numpy(rng.random(10).astype(dtype)),
+                actx.from_numpy(rng.random((5, 3)).astype(dtype))))
+            for _ in range(2)])
+
+    def to_numpy(state):
+        return [actx.to_numpy(ary) for ary in (*state.u, *state.v)]
+
+    def leaves(state):
+        return [*state.u, *state.v]
+
+    a, b = make_state(), make_state()
+    a_np, b_np = to_numpy(a), to_numpy(b)
+
+    c = a
+    c += 2 * b
+    c *= 3
+    c -= 1
+
+    for ary, x, y in zip(to_numpy(c), a_np, b_np):
+        np.testing.assert_allclose(ary, 3 * (x + 2 * y) - 1)
+
+    if actx.permits_inplace_modification:
+        assert all(x is y for x, y in zip(leaves(c), leaves(a)))
+    else:
+        for ary, x in zip(to_numpy(a), a_np):
+            np.testing.assert_allclose(ary, x)
+
+    # {{{ operations that change the dtype are not done in place
+
+    d = make_state(np.float32)
+    d_leaves = leaves(d)
+
+    d += b
+    assert all(ary.dtype == np.float64 for ary in leaves(d))
+    assert all(x is not y for x, y in zip(leaves(d), d_leaves))
+
+    # }}}
+
+    # {{{ object array fields are updated entry by entry
+
+    @with_container_arithmetic(
+            bcast_obj_array=False, rel_comparison=True,
+            _cls_has_array_context_attr=False,
+            inplace=True)
+    @dataclass_array_container
+    @dataclass(frozen=True)
+    class Momentum:
+        mass: DOFArray
+        mom: np.ndarray
+
+    state = make_state()
+    e = Momentum(mass=make_state().u, mom=make_obj_array([state.u, state.v]))
+    e_np = [actx.to_numpy(ary) for ary in (*e.mass, *e.mom[0], *e.mom[1])]
+    mom = e.mom
+    mom_entries = list(mom)
+
+    e += 2
+    e_leaves = [*e.mass, *e.mom[0], *e.mom[1]]
+    for ary, x in zip(e_leaves, e_np):
+        np.testing.assert_allclose(actx.to_numpy(ary), x + 2)
+
+    # NOTE: the object array of the operand is left alone
+    assert all(x is y for x, y in zip(mom, mom_entries))
+    if actx.permits_inplace_modification:
+        assert all(x is y for x, y in zip(
+            e_leaves[2:], [*mom_entries[0], *mom_entries[1]]))
+
+    # }}}
+
+    with pytest.raises(TypeError):
+        with_container_arithmetic(
+                bcast_obj_array=True, rel_comparison=True,
+                deferred=True, inplace=True)
+
+
 def test_container_freeze_thaw(actx_factory):
     actx = actx_factory()
     ary_dof, ary_of_dofs, mat_of_dofs, dc_of_dofs, bcast_dc_of_dofs = \
@@ -985,6 +1839,119 @@ def test_container_freeze_thaw(actx_factory):
     # }}}
 
 
+def test_packed_array_container(actx_factory):
+    actx = actx_factory()
+
+    from arraycontext import (
+            Array, flatten, iter_leaves,
+            packed_array_container, pack_array_container,
+            rec_map_array_container, to_numpy)
+
+    @with_container_arithmetic(
+            bcast_obj_array=True, rel_comparison=True,
+            _cls_has_array_context_attr=False)
+    @packed_array_container
+    @dataclass(frozen=True)
+    class State:
+        name: str
+        mass: Array
+        momentum: Array
+
+    rng = np.random.default_rng(seed=42)
+    mass = rng.random(10)
+    momentum = rng.random((3, 10))
+
+    state = State(name="state",
+            mass=actx.from_numpy(mass),
+            momentum=actx.from_numpy(momentum))
+
+    # {{{ unpacked containers are traversed field by field
+
+    assert len(list(iter_leaves(state))) == 2
+    result = rec_map_array_container(lambda x: 2 * x, state)
+    assert result._packed_layout is None
+    np.testing.assert_allclose(actx.to_numpy(result.momentum), 2 * momentum)
+
+    # }}}
+
+    # {{{ packed containers
+
+    packed = pack_array_container(state, actx)
+    assert pack_array_container(packed, actx) is packed
+    assert packed.name == "state"
+    assert packed._packed_buffer.shape == (mass.size + momentum.size,)
+    assert [leaf is packed._packed_buffer for leaf in iter_leaves(packed)] == [True]
+
+    np.testing.assert_allclose(actx.to_numpy(packed.mass), mass)
+    np.testing.assert_allclose(actx.to_numpy(packed.momentum), momentum)
+
+    # }}}
+
+    # {{{ arithmetic and traversal
+
+    result = 2 * packed + packed - 1
+    assert result._packed_layout is packed._packed_layout
+    assert result.name == "state"
+    np.testing.assert_allclose(actx.to_numpy(result.mass), 3 * mass - 1)
+    np.testing.assert_allclose(actx.to_numpy(result.momentum), 3 * momentum - 1)
+
+    thawed = actx.thaw(actx.freeze(packed))
+    assert thawed._packed_layout is packed._packed_layout
+    np.testing.assert_allclose(actx.to_numpy(thawed.momentum), momentum)
+
+    host_packed = to_numpy(packed, actx)
+    np.testing.assert_allclose(host_packed.momentum, momentum)
+
+    np.testing.assert_allclose(
+            actx.to_numpy(flatten(packed, actx)),
+            np.concatenate([mass, momentum.ravel()]))
+
+    # }}}
+
+    # {{{ unpacked and mixed operands
+
+    result = 2 * state
+    assert result._packed_layout is None
+    np.testing.assert_allclose(actx.to_numpy(result.momentum), 2 * momentum)
+
+    result = state + state
+    assert result._packed_layout is None
+    np.testing.assert_allclose(actx.to_numpy(result.mass), 2 * mass)
+
+    for result in [packed + state, state + packed]:
+        assert result._packed_layout is None
+        assert result.name == "state"
+        np.testing.assert_allclose(actx.to_numpy(result.mass), 2 * mass)
+        np.testing.assert_allclose(actx.to_numpy(result.momentum), 2 * momentum)
+
+    from arraycontext import rec_multimap_array_container
+    result = rec_multimap_array_container(
+            lambda x, y: x - y, packed, 2 * state)
+    assert result._packed_layout is None
+    np.testing.assert_allclose(actx.to_numpy(result.momentum), -momentum)
+
+    result = rec_multimap_array_container(
+            lambda x, y: x - y, packed, 2 * packed)
+    assert result._packed_layout is packed._packed_layout
+    np.testing.assert_allclose(actx.to_numpy(result.momentum), -momentum)
+
+    # }}}
+
+    # {{{ failures
+
+    with pytest.raises(ValueError):
+        rec_map_array_container(lambda x: x[:3], packed)
+
+    with pytest.raises(TypeError):
+        pack_array_container(
+                State(name="state",
+                    mass=actx.from_numpy(mass.astype(np.float32)),
+                    momentum=actx.from_numpy(momentum)),
+                actx)
+
+    # }}}
+
+
 @pytest.mark.parametrize("ord", [2, np.inf])
 def test_container_norm(actx_factory, ord):
     actx = actx_factory()
@@ -1107,6 +2074,128 @@ def test_flatten_with_leaf_class(actx_factory):
     assert flat.enthalpy.shape == (arys[3].enthalpy.size,)
     assert all(isinstance(entry, actx.array_types) for entry in flat.momentum)
 
+
+@pytest.mark.parametrize("shapes", [
+    0,
+    [(127, 67), (18, 0)],
+    [(64, 7), (154, 12)]
+    ])
+def test_flatten_with_out(actx_factory, shapes):
+    actx = actx_factory()
+
+    from arraycontext import flatten, flat_size_and_dtype
+    arys = _get_test_containers(actx, shapes=shapes)
+
+    for ary in arys:
+        size, dtype = flat_size_and_dtype(ary)
+        out = actx.zeros(size + 10, dtype)[5:-5]
+
+        if not actx.permits_inplace_modification:
+            with pytest.raises(ValueError):
+                flatten(ary, actx, out=out)
+
+            continue
+
+        flat = flatten(ary, actx, out=out)
+        assert flat is out
+        assert np.array_equal(
+                actx.to_numpy(flat), actx.to_numpy(flatten(ary, actx)))
+
+    if not actx.permits_inplace_modification:
+        return
+
+    ary = arys[0]
+    size, dtype = flat_size_and_dtype(ary)
+
+    with pytest.raises(ValueError):
+        flatten(ary, actx, out=actx.zeros(size + 1, dtype))
+
+    with pytest.raises(ValueError):
+        flatten(ary, actx, out=actx.zeros(size, np.float32))
+
+    with pytest.raises(ValueError):
+        flatten(ary, actx, out=actx.zeros(size, dtype), leaf_class=DOFArray)
+
+
+@pytest.mark.parametrize("shapes", [
+    0,
+    [(127, 67), (18, 0)],
+    [(64, 7), (154, 12)]
+    ])
+def test_flat_layout(actx_factory, shapes):
+    actx = actx_factory()
+
+    from arraycontext import (
+            FlatLayout, flatten, unflatten, flat_size_and_dtype,
+            get_container_structure)
+    arys = _get_test_containers(actx, shapes=shapes)
+
+    for ary in arys:
+        layout = FlatLayout(ary, actx)
+        assert (layout.size, layout.dtype) == flat_size_and_dtype(ary)
+        assert layout.structure == get_container_structure(ary)
+
+        flat = layout.flatten(ary)
+        assert np.array_equal(
+                actx.to_numpy(flat), actx.to_numpy(flatten(ary, actx)))
+
+        ary_roundtrip = layout.unflatten(flat)
+        assert get_container_structure(ary_roundtrip) == layout.structure
+        assert np.array_equal(
+                actx.to_numpy(flatten(ary_roundtrip, actx)),
+                actx.to_numpy(flatten(unflatten(ary, flat, actx), actx)))
+
+    with pytest.raises(ValueError):
+        FlatLayout(
+                make_obj_array([
+                    actx.zeros(5, np.float64), actx.zeros(5, np.float32)]),
+                actx)
+
+
+def test_flat_layout_packed(actx_factory):
+    actx = actx_factory()
+
+    from arraycontext import FlatLayout, to_numpy
+    from arraycontext.container.traversal import _get_leaves_and_container_structure
+
+    ary = make_obj_array([
+        actx.from_numpy(randn((12, 3), np.float64)),
+        actx.from_numpy(randn(7, np.int32)),
+        actx.from_numpy(randn((0,), np.float32)),
+        actx.from_numpy(randn((5, 2), np.complex128)),
+        actx.from_numpy(randn((3,), np.float32)),
+        actx.from_numpy(randn(5, np.float64)),
+        ])
+
+    if not actx.permits_inplace_modification:
+        with pytest.raises(NotImplementedError):
+            FlatLayout(ary, actx, packed=True)
+
+        return
+
+    with pytest.raises(ValueError):
+        # NOTE: the complex128 leaf would be misaligned
+        FlatLayout(ary, actx, packed=True, alignment=8)
+
+    layout = FlatLayout(ary, actx, packed=True, alignment=32)
+    assert layout.packed
+    assert layout.dtype == np.uint8
+    assert len(layout.segments) == 4
+    assert all(start % 32 == 0 for _, start, _, _ in layout.segments)
+
+    buf = layout.flatten(ary)
+    assert buf.shape == (layout.size,)
+    assert buf.dtype == np.uint8
+
+    ary_roundtrip = layout.unflatten(buf)
+    leaves, _ = _get_leaves_and_container_structure(to_numpy(ary, actx))
+    leaves_roundtrip, _ = _get_leaves_and_container_structure(
+            to_numpy(ary_roundtrip, actx))
+
+    for leaf, leaf_roundtrip in zip(leaves, leaves_roundtrip):
+        assert leaf.dtype == leaf_roundtrip.dtype
+        assert np.array_equal(leaf, leaf_roundtrip)
+
 # }}}
 
 
@@ -1130,6 +2219,48 @@ def test_numpy_conversion(actx_factory):
     assert np.allclose(ac.mass, ac_roundtrip.mass)
     assert np.allclose(ac.momentum[0], ac_roundtrip.momentum[0])
 
+    # {{{ leaves with different dtypes and layouts
+
+    leaves = [
+        np.arange(12, dtype=np.int32).reshape(3, 4),
+        np.zeros((0, 3)),
+        np.random.rand(5, 6).astype(np.float32),
+        np.array(np.random.rand()),
+        np.random.rand(7) + 1j * np.random.rand(7),
+        ]
+    ary = from_numpy(make_obj_array(leaves), actx)
+    ary[2] = ary[2].T
+
+    ary_roundtrip = to_numpy(ary, actx)
+    for i, leaf in enumerate(leaves):
+        if i == 2:
+            leaf = leaf.T
+
+        assert ary_roundtrip[i].dtype == leaf.dtype
+        assert ary_roundtrip[i].shape == leaf.shape
+        assert np.array_equal(ary_roundtrip[i], leaf)
+
+    # non-contiguous host arrays
+    leaves = [np.random.rand(6, 5).T, np.random.rand(10)[::2], np.random.rand(4)]
+    ary = from_numpy(make_obj_array(leaves), actx)
+
+    # operations on a leaf should not affect its neighbors
+    ary[1] = 2 * ary[1] + 1
+    ary_roundtrip = to_numpy(ary, actx)
+
+    assert np.array_equal(ary_roundtrip[0], leaves[0])
+    assert np.allclose(ary_roundtrip[1], 2 * leaves[1] + 1)
+    assert np.array_equal(ary_roundtrip[2], leaves[2])
+
+    # only empty arrays
+    ary_roundtrip = to_numpy(
+            from_numpy(make_obj_array([np.zeros(0), np.zeros((0, 3))]), actx),
+            actx)
+    assert ary_roundtrip[0].shape == (0,)
+    assert ary_roundtrip[1].shape == (0, 3)
+
+    # }}}
+
     from dataclasses import replace
     ac_with_cl = replace(ac, enthalpy=ac_actx.mass)
     with pytest.raises(TypeError):
@@ -1407,6 +2538,68 @@ def test_outer(actx_factory):
         outer(a_bcast_dc_of_dofs, ary_of_floats),
         a_bcast_dc_of_dofs*ary_of_floats)
 
+
+def test_outer_batched(actx_factory):
+    actx = actx_factory()
+
+    def make_dof_array(dtype, shapes=((5,), (7, 3), 0)):
+        return DOFArray(actx, tuple([
+            actx.from_numpy(randn(shape, dtype)) for shape in shapes
+            ]))
+
+    a = make_obj_array([make_dof_array(np.float64) for _ in range(3)])
+    b = make_obj_array([make_dof_array(np.float32) for _ in range(2)])
+
+    from arraycontext import outer
+    from arraycontext.container.traversal import _outer_object_arrays_batched
+    if actx.supports_nonscalar_broadcasting:
+        assert _outer_object_arrays_batched(a, b) is not None
+
+    result = outer(a, b)
+    assert result.shape == (3, 2)
+
+    for i in range(3):
+        for j in range(2):
+            for ab_ij, ab_ref_ij in zip(result[i, j], a[i] * b[j]):
+                assert ab_ij.dtype == ab_ref_ij.dtype
+                assert np.array_equal(
+                        actx.to_numpy(ab_ij), actx.to_numpy(ab_ref_ij))
+
+    # entries with different structures fall back to np.outer
+    c = make_obj_array([
+        make_dof_array(np.float64),
+        make_dof_array(np.float64, shapes=((5,), (7, 3), (1,)))])
+    assert _outer_object_arrays_batched(a, c) is None
+    assert outer(a, c).shape == (3, 2)
+
+    # entries with unhashable fields and constructors that check the fields
+    @with_container_arithmetic(
+            bcast_obj_array=False, rel_comparison=True,
+            _cls_has_array_context_attr=False)
+    @dataclass_array_container
+    @dataclass(frozen=True)
+    class CheckedPair:
+        u: DOFArray
+        v: DOFArray
+        opts: dict
+
+        def __post_init__(self):
+            assert len(self.u) == len(self.v)
+
+    opts = {"name": "pair"}
+    a = make_obj_array([
+        CheckedPair(make_dof_array(np.float64), make_dof_array(np.float64), opts)
+        for _ in range(2)])
+
+    if actx.supports_nonscalar_broadcasting:
+        assert _outer_object_arrays_batched(a, a) is not None
+
+    result = outer(a, a)
+    assert result.shape == (2, 2)
+    assert result[0, 1].opts is opts
+    for ab_ij, ab_ref_ij in zip(result[0, 1].v, a[0].v * a[1].v):
+        assert np.array_equal(actx.to_numpy(ab_ij), actx.to_numpy(ab_ref_ij))
+
 # }}}
 
 
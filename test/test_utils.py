@@ -71,9 +71,16 @@ def test_dataclass_array_container():
         x: np.ndarray
         y: Optional[np.ndarray]
 
+    dataclass_array_container(ArrayContainerWithOptional)
+
+    @dataclass
+    class ArrayContainerWithWrongOptional:
+        x: np.ndarray
+        y: Optional[float]
+
     with pytest.raises(TypeError):
-        # NOTE: cannot have wrapped annotations (here by `Optional`)
-        dataclass_array_container(ArrayContainerWithOptional)
+        # NOTE: float is not an ArrayContainer, so y should fail
+        dataclass_array_container(ArrayContainerWithWrongOptional)
 
     # }}}
 
@@ -106,6 +113,65 @@ def test_dataclass_array_container():
 # }}}
 
 
+# {{{ test_dataclass_array_container_slots
+
+def test_dataclass_array_container_slots():
+    import copy
+    import weakref
+    from dataclasses import dataclass, FrozenInstanceError
+    from arraycontext import (
+            dataclass_array_container, with_container_arithmetic,
+            serialize_container, deserialize_container)
+
+    post_init_calls = []
+
+    @with_container_arithmetic(
+            bcast_obj_array=False, rel_comparison=True,
+            _cls_has_array_context_attr=False)
+    @dataclass_array_container(slots=True)
+    @dataclass(frozen=True)
+    class SlotsContainer:
+        x: np.ndarray
+        y: np.ndarray
+        name: str = "slots"
+
+        def __post_init__(self):
+            post_init_calls.append(self)
+
+        def norm(self):
+            return np.sqrt(np.sum(self.x**2) + np.sum(self.y**2))
+
+    ary = SlotsContainer(np.ones(3), np.zeros(3))
+    assert len(post_init_calls) == 1
+
+    assert not hasattr(ary, "__dict__")
+    assert weakref.ref(ary)() is ary
+    assert ary.norm() == np.sqrt(3)
+
+    with pytest.raises(FrozenInstanceError):
+        ary.x = np.zeros(3)
+
+    # {{{ containers are rebuilt without calling __post_init__
+
+    result = deserialize_container(ary, serialize_container(ary))
+    assert type(result) is SlotsContainer
+    assert result.x is ary.x and result.y is ary.y and result.name == "slots"
+
+    result = 2 * ary + ary
+    assert type(result) is SlotsContainer
+    assert np.array_equal(result.x, 3 * ary.x)
+    assert result.name == "slots"
+
+    assert len(post_init_calls) == 1
+
+    # }}}
+
+    result = copy.deepcopy(ary)
+    assert np.array_equal(result.x, ary.x) and result.name == "slots"
+
+# }}}
+
+
 # {{{ test_dataclass_container_unions
 
 def test_dataclass_container_unions():
@@ -142,6 +208,199 @@ def test_dataclass_container_unions():
 # }}}
 
 
+# {{{ test_dataclass_container_optional_and_tuple_fields
+
+def test_dataclass_container_optional_and_tuple_fields():
+    from typing import Optional, Tuple
+    from dataclasses import dataclass
+    from arraycontext import (
+            dataclass_array_container, with_container_arithmetic,
+            serialize_container, deserialize_container)
+
+    @with_container_arithmetic(
+            bcast_obj_array=False, rel_comparison=True,
+            _cls_has_array_context_attr=False)
+    @dataclass_array_container
+    @dataclass(frozen=True)
+    class ContainerWithTuple:
+        x: np.ndarray
+        t: Tuple[np.ndarray, np.ndarray]
+        y: Optional[np.ndarray]
+        name: str = "tuple"
+
+    ary = ContainerWithTuple(
+            np.ones(3), (np.zeros(3), np.arange(3.0)), None)
+    assert [key for key, _ in serialize_container(ary)] == ["x", "t_0", "t_1"]
+
+    result = deserialize_container(ary, serialize_container(ary))
+    assert result.x is ary.x and result.y is None
+    assert result.t[0] is ary.t[0] and result.t[1] is ary.t[1]
+
+    # {{{ optional fields are skipped if they are None
+
+    result = 2 * ary + ary
+    assert result.y is None and result.name == "tuple"
+    assert np.array_equal(result.x, 3 * ary.x)
+    assert np.array_equal(result.t[1], 3 * ary.t[1])
+
+    ary = ContainerWithTuple(ary.x, ary.t, np.full(3, 2.0))
+    assert [key for key, _ in serialize_container(ary)] == [
+            "x", "t_0", "t_1", "y"]
+
+    result = ary * ary
+    assert np.array_equal(result.y, np.full(3, 4.0))
+    assert np.array_equal(result.t[1], ary.t[1]**2)
+
+    # }}}
+
+    # {{{ optional fields must be present in all or none of the operands
+
+    ary_without_y = ContainerWithTuple(ary.x, ary.t, None)
+
+    with pytest.raises(ValueError, match="optional field 'y'"):
+        ary_without_y + ary
+
+    with pytest.raises(ValueError, match="optional field 'y'"):
+        ary + ary_without_y
+
+    # }}}
+
+    # {{{ unsupported tuples
+
+    @dataclass
+    class ContainerWithVariableTuple:
+        x: np.ndarray
+        t: Tuple[np.ndarray, ...]
+
+    with pytest.raises(TypeError):
+        dataclass_array_container(ContainerWithVariableTuple)
+
+    @dataclass
+    class ContainerWithConflictingTuple:
+        t: Tuple[np.ndarray, np.ndarray]
+        t_0: np.ndarray
+
+    with pytest.raises(ValueError):
+        dataclass_array_container(ContainerWithConflictingTuple)
+
+    # }}}
+
+# }}}
+
+
+# {{{ test_is_array_container_type
+
+def test_is_array_container_type():
+    from arraycontext import (
+            ArrayContainer, Array,
+            serialize_container, deserialize_container,
+            is_array_container_type, classify_types)
+
+    assert is_array_container_type(ArrayContainer)
+    assert is_array_container_type(np.ndarray)
+    assert not is_array_container_type(float)
+    assert not is_array_container_type(Array)
+
+    class Wrapper:
+        pass
+
+    class WrapperSubclass(Wrapper):
+        pass
+
+    # NOTE: these are cached, so they must see the registration below
+    assert not is_array_container_type(Wrapper)
+    assert not is_array_container_type(WrapperSubclass)
+
+    @serialize_container.register(Wrapper)
+    def _serialize_wrapper(ary: Wrapper):
+        return []
+
+    @deserialize_container.register(Wrapper)
+    def _deserialize_wrapper(template: Wrapper, iterable):
+        return template
+
+    assert is_array_container_type(Wrapper)
+    assert is_array_container_type(WrapperSubclass)
+
+    # {{{ virtual subclasses of registered ABCs
+
+    import abc
+
+    class AbstractContainer(abc.ABC):
+        pass
+
+    @serialize_container.register(AbstractContainer)
+    def _serialize_abstract(ary: AbstractContainer):
+        return []
+
+    class Virtual:
+        pass
+
+    assert not is_array_container_type(Virtual)
+
+    # NOTE: this does not go through `register`, but must invalidate the cache
+    AbstractContainer.register(Virtual)
+    assert is_array_container_type(Virtual)
+
+    # }}}
+
+    assert classify_types([]) == ()
+    assert classify_types(
+            [float, np.ndarray, Wrapper, WrapperSubclass, ArrayContainer, int]
+            ) == (False, True, True, True, True, False)
+
+# }}}
+
+
+# {{{ test_object_array_serialization
+
+@pytest.mark.parametrize("shape", [(), (6,), (2, 3), (2, 3, 4)])
+def test_object_array_serialization(shape):
+    from arraycontext import serialize_container, deserialize_container
+
+    ary = np.empty(shape, dtype=object)
+    for i in np.ndindex(shape):
+        ary[i] = np.full(3, np.ravel_multi_index(i, shape) if shape else 0)
+
+    iterable = serialize_container(ary)
+    assert [key for key, _ in iterable] == list(range(ary.size))
+
+    def assert_same(result):
+        assert result.shape == ary.shape
+        for i in np.ndindex(shape):
+            assert result[i] is ary[i]
+
+    assert_same(deserialize_container(ary, iterable))
+    assert_same(deserialize_container(ary, list(reversed(iterable))))
+
+    # NOTE: multi-dimensional indices are also accepted as keys
+    assert_same(deserialize_container(ary, list(np.ndenumerate(ary))))
+
+# }}}
+
+
+# {{{ test_container_arithmetic_code_cache
+
+def test_container_arithmetic_code_cache(monkeypatch):
+    from arraycontext.container.arithmetic import _compile_generated_code
+
+    source = "def f(x):\n    return 2 * x\n"
+
+    def get_f():
+        result_dict = {}
+        exec(_compile_generated_code(source, "<test code cache>"), result_dict)
+        return result_dict["f"]
+
+    # NOTE: the second call loads the code object from the cache
+    assert get_f()(3) == 6
+    assert get_f()(3) == 6
+
+    monkeypatch.setenv("ARRAYCONTEXT_NO_CACHE", "1")
+    assert get_f()(3) == 6
+
+# }}}
+
+
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1: